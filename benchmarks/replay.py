@@ -0,0 +1,106 @@
+"""End-to-end throughput and latency of the live pipeline, driven by a replay.
+
+    python benchmarks/replay.py --speed 10 --duration 10
+    python benchmarks/replay.py data/lab --speed 0
+
+Frames of a recorded capture (or a synthetic one) are replayed into a
+temporary directory while a reader tails the growing file with the
+incremental decoder, like the live view does. Latency is the time from a
+frame being written to it being decoded.
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from threading import Event, Thread
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+from synthetic import write_capture
+
+
+def tail(directory, stop_event, decoded, batch_size=64, poll_interval=0.005):
+    """Decode frames from the .csi file appearing in directory, note when each was done"""
+    from psgui.decoder import PicoScenesDecoder, stack_frames
+
+    decoder = None
+    while True:
+        if decoder is None:
+            names = [n for n in os.listdir(directory) if n.endswith(".csi")]
+            if names:
+                decoder = PicoScenesDecoder(os.path.join(directory, names[0]))
+        frames = list(decoder.iter_frames(max_frames=batch_size)) if decoder else []
+        if frames:
+            stack_frames(frames)
+            now = time.monotonic()
+            decoded.extend([now] * len(frames))
+        elif stop_event.is_set():
+            return
+        else:
+            time.sleep(poll_interval)
+
+
+def run(source_path, speed, duration):
+    from psgui.replay import ReplaySource, run_replay
+
+    written = []
+    decoded = []
+    out_dir = tempfile.mkdtemp(prefix="psgui-replay-")
+    stop_event = Event()
+    reader = Thread(target=tail, args=(out_dir, stop_event, decoded))
+    reader.start()
+    try:
+        start = time.monotonic()
+        stats = run_replay(ReplaySource(source_path, speed), duration, out_dir,
+                           output=None, on_frame=written.append)
+        replay_seconds = time.monotonic() - start
+        stop_event.set()
+        reader.join()
+        decode_seconds = (decoded[-1] if decoded else time.monotonic()) - start
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+    count = min(len(written), len(decoded))
+    latency = (np.array(decoded[:count]) - np.array(written[:count])) * 1000
+    print(f"Replayed {stats['packets']} frames in {replay_seconds:.2f} s "
+          f"({stats['packets'] / replay_seconds:.0f} frames/s)")
+    print(f"Decoded  {len(decoded)} frames in {decode_seconds:.2f} s "
+          f"({len(decoded) / max(decode_seconds, 1e-9):.0f} frames/s)")
+    if count:
+        print(f"Latency  p50 {np.percentile(latency, 50):.1f} ms, "
+              f"p95 {np.percentile(latency, 95):.1f} ms, max {latency.max():.1f} ms")
+    return stats, latency
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("source", nargs="?",
+                        help=".csi file or data folder, default a synthetic capture")
+    parser.add_argument("--speed", type=float, default=10.0,
+                        help="rate relative to the recording, 0 for as fast as possible")
+    parser.add_argument("--duration", "-t", type=float, default=5.0)
+    parser.add_argument("--frames", type=int, default=2000,
+                        help="frames of the synthetic capture")
+    parser.add_argument("--bandwidth", type=int, default=80,
+                        help="bandwidth of the synthetic capture in MHz")
+    args = parser.parse_args(argv)
+
+    if args.source:
+        run(args.source, args.speed, args.duration)
+        return 0
+    tmp = tempfile.mkdtemp(prefix="psgui-bench-")
+    try:
+        path = os.path.join(tmp, "synthetic.csi")
+        write_capture(path, args.frames, args.bandwidth)
+        run(path, args.speed, args.duration)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
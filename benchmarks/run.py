@@ -0,0 +1,309 @@
+"""Time the decode, transform and render hot paths on synthetic captures.
+
+    python benchmarks/run.py
+    python benchmarks/run.py --frames 1000,20000 --bandwidths 20,160 --antennas 2x2,4x4
+    python benchmarks/run.py --compare benchmarks/results/<earlier run>.json
+
+Every stage runs --repeat times on each case (frames x bandwidth x antennas)
+and keeps the fastest time. Peak memory is the largest tracemalloc peak of
+one extra traced run, which covers NumPy buffers but not memory maps.
+Results are written to benchmarks/results/ as JSON named after the commit.
+"""
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import contextlib
+import tempfile
+import tracemalloc
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+
+import numpy as np
+from synthetic import BANDWIDTH_TONES, write_capture
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+# A stage this much slower than in the baseline counts as a regression
+DEFAULT_THRESHOLD = 1.25
+
+
+def stage_decode(case):
+    from psgui.decoder import decode_file
+
+    decode_file(case["path"])
+
+
+def stage_csikit(case):
+    from CSIKit.reader import get_reader
+    from CSIKit.util import csitools
+
+    reader = get_reader(case["path"])
+    csitools.get_CSI(reader.read_file(case["path"]), metric="amplitude")
+
+
+def stage_cache_build(case):
+    from psgui.cache import load_csi
+
+    load_csi(case["path"], rebuild=True)
+
+
+def stage_read_csi(case):
+    from read import read_csi
+
+    # Warm cache, what every tool pays on each run
+    np.asarray(read_csi(case["path"])).sum()
+
+
+def _transform_stage(name):
+    def stage(case):
+        import noise
+
+        getattr(noise, name)(case["csi"], rng=np.random.default_rng(0))
+    return stage
+
+
+def stage_augment(case):
+    import noise
+
+    noise.augment(case["csi"], 1, seed=0)
+
+
+def stage_ratio_grid(case):
+    from psgui.ratio import ratio_phase_grid
+    from psgui.views import GRID_MAX_FRAMES
+
+    ratio_phase_grid(case["csi"], GRID_MAX_FRAMES)
+
+
+def stage_phase_clean(case):
+    from psgui.phase import PhaseSanitizer
+
+    PhaseSanitizer().apply(case["csi"])
+
+
+def stage_doppler(case):
+    from psgui.doppler import doppler_spectrogram
+
+    doppler_spectrogram(case["csi"])
+
+
+def stage_export(case):
+    from psgui.render import export_image
+    from psgui.views import CSIViews
+
+    export_image(CSIViews(case["csi"]).image("amplitude", (0, 0)),
+                 os.path.join(case["tmp"], "export.png"))
+
+
+_qt = {}
+
+
+def _visualizer():
+    """One offscreen CSIVisualizer shared by the redraw stages"""
+    if not _qt:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt6.QtWidgets import QApplication
+        from psgui.visualizer import CSIVisualizer
+
+        _qt["app"] = QApplication.instance() or QApplication([])
+        _qt["viz"] = CSIVisualizer()
+        _qt["viz"].resize(1000, 600)
+        _qt["viz"].show()
+    return _qt["app"], _qt["viz"]
+
+
+def stage_redraw(case):
+    from psgui.views import CSIViews
+
+    app, viz = _visualizer()
+    viz.show_image(CSIViews(case["csi"]).image("amplitude", (0, 0)))
+    app.processEvents()
+
+
+def stage_zoom(case):
+    app, viz = _visualizer()
+    if viz._full_xlim is None:
+        stage_redraw(case)
+    # Zoom into the middle tenth, then back out, as a wheel would
+    lo, hi = viz._full_xlim
+    width = (hi - lo) / 10
+    viz._set_xlim(lo + 4.5 * width, lo + 5.5 * width)
+    viz.draw()
+    viz._set_xlim(lo, hi)
+    viz.draw()
+    app.processEvents()
+
+
+# Stage name -> function of a case dict with path, csi, frames and tmp
+STAGES = {
+    "decode": stage_decode,
+    "csikit": stage_csikit,
+    "cache_build": stage_cache_build,
+    "read_csi": stage_read_csi,
+    "time_offset": _transform_stage("time_offset"),
+    "time_stretch": _transform_stage("time_stretch"),
+    "random_mask": _transform_stage("random_mask"),
+    "amplitude_scale": _transform_stage("amplitude_scale"),
+    "freq_noise": _transform_stage("freq_noise"),
+    "augment": stage_augment,
+    "ratio_grid": stage_ratio_grid,
+    "phase_clean": stage_phase_clean,
+    "doppler": stage_doppler,
+    "export": stage_export,
+    "redraw": stage_redraw,
+    "zoom": stage_zoom,
+}
+
+
+def measure(stage, case, repeat=3, memory=True):
+    """Return (fastest seconds, peak MB of a traced run or None)"""
+    best = float("inf")
+    peak = None
+    # The tools print what they load, keep the table readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            stage(case)
+            best = min(best, time.perf_counter() - start)
+        if memory:
+            tracemalloc.start()
+            try:
+                stage(case)
+                peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+            finally:
+                tracemalloc.stop()
+    return best, peak
+
+
+def parse_antennas(text):
+    """'2x2' -> (2, 2) as (rx, tx)"""
+    rx, tx = text.lower().split("x")
+    return int(rx), int(tx)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_suite(frames_list, bandwidths, antennas, stages, repeat=3, memory=True):
+    """Run every stage on every case, return the list of result dicts"""
+    from psgui.cache import load_csi
+
+    results = []
+    tmp = tempfile.mkdtemp(prefix="psgui-bench-")
+    try:
+        for frames in frames_list:
+            for bandwidth in bandwidths:
+                for no_rx, no_tx in antennas:
+                    name = f"{frames}f-{bandwidth}MHz-{no_rx}x{no_tx}"
+                    path = os.path.join(tmp, f"{name}.csi")
+                    size = write_capture(path, frames, bandwidth, no_rx, no_tx)
+                    csi, _ = load_csi(path)
+                    case = {"path": path, "csi": np.asarray(csi), "frames": frames,
+                            "tmp": tmp}
+                    print(f"{name} ({size / 2 ** 20:.1f} MB)")
+                    for stage_name in stages:
+                        try:
+                            seconds, peak = measure(STAGES[stage_name], case, repeat, memory)
+                        except ImportError as e:
+                            print(f"  {stage_name:<16} skipped ({e})")
+                            continue
+                        result = {"case": name, "stage": stage_name, "frames": frames,
+                                  "bandwidth": bandwidth, "subcarriers": BANDWIDTH_TONES[bandwidth],
+                                  "rx": no_rx, "tx": no_tx, "seconds": seconds,
+                                  "frames_per_s": frames / seconds if seconds else None,
+                                  "peak_mb": peak}
+                        results.append(result)
+                        print(f"  {stage_name:<16} {seconds * 1000:10.1f} ms "
+                              f"{result['frames_per_s']:12.0f} frames/s"
+                              + (f" {peak:9.1f} MB" if peak is not None else ""))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return results
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Print the change against a baseline run, return the regressed entries"""
+    previous = {(r["case"], r["stage"]): r for r in baseline["results"]}
+    regressions = []
+    print(f"\nCompared with {baseline.get('commit', '?')}:")
+    for result in results:
+        before = previous.get((result["case"], result["stage"]))
+        if before is None:
+            continue
+        ratio = result["seconds"] / before["seconds"] if before["seconds"] else 1.0
+        flag = ""
+        if ratio > threshold:
+            flag = "  REGRESSION"
+            regressions.append(result)
+        print(f"  {result['case']:<22} {result['stage']:<16} {ratio:6.2f}x{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--frames", default="500,2000",
+                        help="comma separated frame counts")
+    parser.add_argument("--bandwidths", default="20,80,160",
+                        help=f"comma separated MHz out of {', '.join(map(str, BANDWIDTH_TONES))}")
+    parser.add_argument("--antennas", default="2x2",
+                        help="comma separated RXxTX counts, e.g. 1x1,2x2,4x4")
+    parser.add_argument("--stages", default=",".join(STAGES),
+                        help="comma separated stages to run")
+    parser.add_argument("--skip", default="",
+                        help="comma separated stages to leave out, e.g. csikit")
+    parser.add_argument("--repeat", "-r", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip the traced run for peak memory")
+    parser.add_argument("--output", "-o", help="results file, default benchmarks/results/")
+    parser.add_argument("--compare", metavar="JSON", help="earlier results to compare with")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="slowdown ratio reported as a regression")
+    args = parser.parse_args(argv)
+
+    skip = {s for s in args.skip.split(",") if s}
+    stages = [s for s in args.stages.split(",") if s and s not in skip]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(unknown)}")
+    bandwidths = [int(b) for b in args.bandwidths.split(",")]
+    if any(b not in BANDWIDTH_TONES for b in bandwidths):
+        parser.error(f"Bandwidths must be out of {', '.join(map(str, BANDWIDTH_TONES))}")
+
+    results = run_suite([int(f) for f in args.frames.split(",")], bandwidths,
+                        [parse_antennas(a) for a in args.antennas.split(",")],
+                        stages, args.repeat, not args.no_memory)
+
+    commit = git_commit()
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({"commit": commit, "time": time.time(), "python": platform.python_version(),
+                   "numpy": np.__version__, "machine": platform.platform(),
+                   "repeat": args.repeat, "results": results}, f, indent=2)
+    print(f"Results saved to {output}")
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""Synthetic PicoScenes captures for the benchmarks.
+
+Frames carry an RxSBasic and a CSI segment laid out like those of an
+AX200/AX210 receiver, so they go through the same CSIKit decoding path as
+real captures. The CSI is a few-path channel with noise, quantized to
+int16 like the NIC reports it.
+"""
+import struct
+
+import numpy as np
+
+# Channel bandwidth in MHz -> HE-SU subcarriers reported per antenna pair
+BANDWIDTH_TONES = {20: 242, 40: 484, 80: 996, 160: 1992}
+
+CENTER_FREQ_MHZ = 5250
+FRAME_MAGIC = 0x20150315
+
+
+def _segment(name, version, payload):
+    name_bytes = name.encode("ascii") + b"\x00"
+    body = (struct.pack("<B", len(name_bytes)) + name_bytes
+            + struct.pack("<H", version) + payload)
+    return struct.pack("<I", len(body)) + body
+
+
+def encode_frame(timestamp_us, csi, bandwidth):
+    """One length-prefixed frame for a (subcarriers, rx, tx) complex matrix"""
+    tones, no_rx, no_tx = csi.shape
+    rx_basic = struct.pack("<HQHBHHBBBBbbbbb", 0x2100, timestamp_us, CENTER_FREQ_MHZ,
+                           4, bandwidth, 800, 0, no_tx, 0, no_rx, -90, -40, -40, -41, -42)
+    # PicoScenes stores (rx, tx, subcarrier) int16 I/Q pairs
+    data = np.empty((no_rx, no_tx, tones, 2), dtype=np.int16)
+    ordered = csi.transpose(1, 2, 0)
+    data[..., 0] = ordered.real
+    data[..., 1] = ordered.imag
+    payload = data.tobytes()
+    csi_header = struct.pack("<HBbHQQIHBBBHBhI", 0x2100, 0, 4, bandwidth,
+                             CENTER_FREQ_MHZ * 1_000_000, 160_000_000, 78125, tones,
+                             no_tx, no_rx, 0, 1, 0, 0, len(payload))
+    segments = _segment("RxSBasic", 1, rx_basic) + _segment("CSI", 4, csi_header + payload)
+    mpdu = struct.pack("<I", 0) + bytes.fromhex("0016ea123456") + b"\x00" * 20
+    body = struct.pack("<IHB", FRAME_MAGIC, 1, 2) + segments + mpdu
+    return struct.pack("<I", len(body)) + body
+
+
+def synthetic_csi(frames, tones, no_rx, no_tx, seed=0, paths=4, block_frames=1024):
+    """Yield (frames, tones, rx, tx) complex blocks of a slowly varying channel"""
+    rng = np.random.default_rng(seed)
+    delays = rng.uniform(0, 0.2, paths)
+    gains = rng.normal(size=(paths, no_rx, no_tx)) + 1j * rng.normal(size=(paths, no_rx, no_tx))
+    k = np.arange(tones)[:, np.newaxis]
+    # (tones, paths) steering, each path a phase ramp across subcarriers
+    steering = np.exp(-2j * np.pi * k * delays)
+    for start in range(0, frames, block_frames):
+        n = min(block_frames, frames - start)
+        t = np.arange(start, start + n)[:, np.newaxis]
+        drift = np.exp(2j * np.pi * 0.001 * t * np.arange(1, paths + 1))  # (n, paths)
+        channel = np.einsum("kp,np,prt->nkrt", steering, drift, gains)
+        noise = rng.normal(scale=0.05, size=channel.shape + (2,))
+        channel = channel + noise[..., 0] + 1j * noise[..., 1]
+        yield np.round(channel * 300)
+
+
+def write_capture(path, frames, bandwidth=20, no_rx=2, no_tx=2, seed=0):
+    """Write a synthetic .csi file, return its size in bytes"""
+    tones = BANDWIDTH_TONES[bandwidth]
+    size = 0
+    with open(path, "wb") as f:
+        index = 0
+        for block in synthetic_csi(frames, tones, no_rx, no_tx, seed):
+            for csi in block:
+                # 100 frames per second, like a typical injection rate
+                size += f.write(encode_frame(1_000_000 + index * 10_000, csi, bandwidth))
+                index += 1
+    return size
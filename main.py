@@ -1,9 +1,19 @@
 import sys
-from PyQt6.QtWidgets import QApplication
-from psgui.ui import MainWindow
+
+# Imported first so startup marks count from here
+from psgui import startup
 
 
 def main():
+    # Any arguments select the headless command line, which never imports Qt
+    if len(sys.argv) > 1:
+        from psgui.cli import main as cli_main
+        sys.exit(cli_main(sys.argv[1:]))
+
+    from PyQt6.QtWidgets import QApplication
+    from psgui.ui import MainWindow
+    startup.mark("imports")
+
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
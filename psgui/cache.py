@@ -0,0 +1,170 @@
+import os
+import json
+import uuid
+
+import numpy as np
+
+from psgui.decoder import PicoScenesDecoder
+
+# Sidecar caches live in a hidden folder next to the captures, e.g.
+# data/<subfolder>/.cache/<name>.csi.npy
+CACHE_DIR = ".cache"
+
+# Frames copied per step when extending an existing cache
+CHUNK_FRAMES = 1024
+
+
+class BuildCancelled(Exception):
+    """Raised when a cache build is cancelled through its cancel event"""
+
+
+# Matrix dtypes a cache can be stored as, complex64 halves the footprint
+CACHE_DTYPES = {"complex128": "", "complex64": ".c64"}
+
+
+def cache_paths(csi_path, dtype="complex128"):
+    """Return (matrix, timestamps, metadata) sidecar paths for a .csi file"""
+    directory, name = os.path.split(os.path.abspath(csi_path))
+    base = os.path.join(directory, CACHE_DIR, name) + CACHE_DTYPES[np.dtype(dtype).name]
+    return base + ".npy", base + ".ts.npy", base + ".json"
+
+
+def _file_signature(csi_path):
+    stat = os.stat(csi_path)
+    return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def _load_meta(meta_path):
+    try:
+        with open(meta_path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _open_cached(matrix_path, ts_path, meta):
+    frames = meta["frames"]
+    csi = np.load(matrix_path, mmap_mode="r")[:frames]
+    timestamps = np.load(ts_path, mmap_mode="r")[:frames]
+    return csi, timestamps
+
+
+def load_csi(csi_path, rebuild=False, cancel_event=None, dtype="complex128"):
+    """Return (csi, timestamps) memory-mapped from the sidecar cache of a .csi file.
+
+    The cache is built on first use and checked against the size and mtime
+    of the capture afterwards. Captures are append-only, so a file that only
+    grew is extended by decoding the new frames; anything else is rebuilt.
+    A complex64 cache is kept separately from the default complex128 one.
+    """
+    matrix_path, ts_path, meta_path = cache_paths(csi_path, dtype)
+    signature = _file_signature(csi_path)
+    meta = None if rebuild else _load_meta(meta_path)
+
+    if (meta is not None and meta.get("size") == signature["size"]
+            and meta.get("mtime") == signature["mtime"]
+            and os.path.exists(matrix_path) and os.path.exists(ts_path)):
+        return _open_cached(matrix_path, ts_path, meta)
+
+    previous = None
+    if (meta is not None and meta.get("size", 0) < signature["size"]
+            and os.path.exists(matrix_path) and os.path.exists(ts_path)):
+        previous = (meta, *_open_cached(matrix_path, ts_path, meta))
+
+    meta = _build_cache(csi_path, signature, previous, cancel_event, dtype)
+    return _open_cached(matrix_path, ts_path, meta)
+
+
+def _build_cache(csi_path, signature, previous=None, cancel_event=None,
+                 dtype="complex128"):
+    """Write the sidecar files, reusing frames of a previous cache if given"""
+    matrix_path, ts_path, meta_path = cache_paths(csi_path, dtype)
+    os.makedirs(os.path.dirname(matrix_path), exist_ok=True)
+
+    offset = 0
+    old_frames = 0
+    frame_shape = None
+    if previous is not None:
+        old_meta, old_csi, old_timestamps = previous
+        offset = old_meta["offset"]
+        old_frames = old_meta["frames"]
+        frame_shape = tuple(old_meta["shape"])
+
+    decoder = PicoScenesDecoder(csi_path, offset)
+    new_frames = decoder.count_frames()
+    frames = decoder.iter_frames(max_frames=new_frames)
+
+    # Peek at the first new frame to learn the matrix shape
+    first = None
+    if frame_shape is None:
+        first = next(frames, None)
+        if first is None:
+            raise ValueError(f"No CSI frames in {csi_path}")
+        frame_shape = first[0].shape
+
+    # Preallocate for every complete frame, frames with a different
+    # antenna layout are skipped and the unused tail is ignored on load.
+    # Temp files are unique per build, so processes building the same
+    # cache at once never truncate a file another one has mapped
+    total = old_frames + new_frames
+    tmp_matrix = _temp_path(matrix_path)
+    tmp_ts = _temp_path(ts_path)
+    tmp_meta = _temp_path(meta_path, ".tmp")
+    try:
+        csi_out = np.lib.format.open_memmap(
+            tmp_matrix, mode="w+", dtype=dtype, shape=(total, *frame_shape))
+        ts_out = np.lib.format.open_memmap(
+            tmp_ts, mode="w+", dtype=float, shape=(total,))
+
+        for start in range(0, old_frames, CHUNK_FRAMES):
+            stop = min(start + CHUNK_FRAMES, old_frames)
+            csi_out[start:stop] = old_csi[start:stop]
+            ts_out[start:stop] = old_timestamps[start:stop]
+
+        count = old_frames
+        if first is not None:
+            csi_out[count], ts_out[count] = first
+            count += 1
+        for csi, timestamp in frames:
+            if cancel_event is not None and cancel_event.is_set():
+                raise BuildCancelled(csi_path)
+            if csi.shape != frame_shape:
+                continue
+            csi_out[count] = csi
+            ts_out[count] = timestamp
+            count += 1
+
+        csi_out.flush()
+        ts_out.flush()
+        del csi_out, ts_out
+
+        meta = dict(signature, offset=decoder.offset, frames=count,
+                    shape=list(frame_shape))
+        with open(tmp_meta, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_matrix, matrix_path)
+        os.replace(tmp_ts, ts_path)
+        os.replace(tmp_meta, meta_path)
+    except BaseException:
+        # Drop the maps first, Windows can't delete a mapped file
+        csi_out = ts_out = None
+        for path in (tmp_matrix, tmp_ts, tmp_meta):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        raise
+    return meta
+
+
+def _temp_path(path, suffix=".tmp.npy"):
+    """Create an empty, uniquely named file next to path and return its name"""
+    while True:
+        tmp = f"{path}.{uuid.uuid4().hex}{suffix}"
+        try:
+            # Mode 0o666 like open(), the umask applies as for any new file
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+        except FileExistsError:
+            continue
+        os.close(fd)
+        return tmp
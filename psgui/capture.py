@@ -0,0 +1,236 @@
+import os
+import re
+import time
+import subprocess
+from threading import Barrier, Event, Lock, Thread
+
+from psgui.picolog import OutputParser
+
+_INTERFACE_OPTION = re.compile(r'(^|\s)-i\s+\S+')
+
+
+def parse_interfaces(text):
+    """'2, 3' -> ['2', '3'], empty -> [] (run the command as given)"""
+    return [part.strip() for part in str(text).split(',') if part.strip()]
+
+
+def interface_option(option, interface):
+    """Point a PicoScenes option string at one interface"""
+    if _INTERFACE_OPTION.search(option):
+        return _INTERFACE_OPTION.sub(lambda m: f"{m.group(1)}-i {interface}", option, count=1)
+    return f"{option} -i {interface}"
+
+
+def device_dir(interface, base_dir='.'):
+    """Directory the receiver of one interface writes its .csi files to"""
+    return os.path.join(base_dir, f"nic{interface}")
+
+
+def _drain(pipe, name, parser, tag, on_event, output):
+    """Read one pipe to EOF so PicoScenes never blocks on a full pipe"""
+    for line in iter(pipe.readline, ''):
+        line = line.rstrip('\n')
+        kind = parser.feed(line)
+        if kind in ('error', 'warning') and on_event is not None:
+            on_event(kind, line)
+        if output is not None:
+            output(f"[PicoScenes{tag} {name}] {line}")
+    pipe.close()
+
+
+def run_capture(option, duration, cwd=None, stop_event=None, start_barrier=None,
+                stall_timeout=2.0, stats_interval=0.5, on_stats=None,
+                on_event=None, on_stalled=None, output=print):
+    """Run one PicoScenes receiver for duration seconds, return its final stats.
+
+    Both pipes are drained on reader threads and parsed by an OutputParser.
+    on_stats gets a snapshot every stats_interval seconds, on_event error
+    and warning lines, on_stalled the idle time once per stall. Setting
+    stop_event ends the capture early. Qt-free, see ParallelCapture.
+    """
+    stop_event = stop_event or Event()
+    if start_barrier is not None:
+        start_barrier.wait(timeout=30)
+    process = subprocess.Popen(['PicoScenes', option],
+                               cwd=cwd,
+                               stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE,
+                               text=True, errors='replace',
+                               bufsize=1)
+    parser = OutputParser()
+    tag = f" {cwd}" if cwd not in (None, '.') else ""
+    readers = [Thread(target=_drain, args=(pipe, name, parser, tag, on_event, output),
+                      daemon=True)
+               for pipe, name in ((process.stdout, 'out'), (process.stderr, 'err'))]
+    for reader in readers:
+        reader.start()
+
+    deadline = time.monotonic() + duration
+    stalled = False
+    while not stop_event.wait(
+            max(min(stats_interval, deadline - time.monotonic()), 0)):
+        if time.monotonic() >= deadline or process.poll() is not None:
+            break
+        stats = parser.snapshot()
+        if on_stats is not None:
+            on_stats(stats)
+        if stats["idle"] >= stall_timeout and not stalled and on_stalled is not None:
+            on_stalled(stats["idle"])
+        stalled = stats["idle"] >= stall_timeout
+
+    if process.poll() is None:
+        process.kill()
+        process.wait()
+    # Children that inherited the pipes may keep them open, don't
+    # wait more than a second for the readers in total
+    join_deadline = time.monotonic() + 1
+    for reader in readers:
+        reader.join(timeout=max(join_deadline - time.monotonic(), 0))
+    return parser.snapshot()
+
+
+class ParallelCapture:
+    """Run one receiver per interface in parallel on threads, without Qt.
+
+    Every receiver writes to its own device directory. The receivers wait
+    on a barrier so they are launched together, share the duration and are
+    stopped together; one failing receiver stops the others. With no
+    interfaces the option is run as given in base_dir. With a
+    replay.ReplaySource every receiver replays it instead of running
+    PicoScenes.
+
+    Callbacks are called on the receiver threads: on_stats with the
+    stats summed over all receivers plus a "devices" dict of each one's
+    snapshot, on_event(interface, kind, line), on_stalled(interface, idle),
+    on_error(interface, message) and on_finished() once every receiver
+    has exited. CaptureScheduler wraps this in Qt signals, capture_parallel
+    runs it to the end.
+    """
+
+    def __init__(self, option, duration, interfaces=(), base_dir='.',
+                 stall_timeout=2.0, stats_interval=0.5, replay=None,
+                 on_stats=None, on_event=None, on_stalled=None, on_error=None,
+                 on_finished=None, output=print):
+        self.option = option
+        self.duration = duration
+        self.stall_timeout = stall_timeout
+        self.stats_interval = stats_interval
+        self.replay = replay
+        self.on_stats = on_stats
+        self.on_event = on_event
+        self.on_stalled = on_stalled
+        self.on_error = on_error
+        self.on_finished = on_finished
+        self.output = output
+
+        interfaces = list(interfaces) or [None]
+        self._barrier = Barrier(len(interfaces))
+        self._stop_event = Event()
+        self._lock = Lock()
+        self._running = set()
+        self._threads = []
+        # {interface: {"directory", "option", "stats", "error"}}
+        self.results = {}
+        for interface in interfaces:
+            if interface is None:
+                directory, device_option = base_dir, option
+            else:
+                directory = device_dir(interface, base_dir)
+                device_option = interface_option(option, interface)
+                os.makedirs(directory, exist_ok=True)
+            self.results[interface] = {"directory": directory, "option": device_option,
+                                       "stats": None, "error": None}
+
+    @property
+    def directories(self):
+        """{interface: output directory}, interface None for the plain command"""
+        return {interface: result["directory"] for interface, result in self.results.items()}
+
+    def start(self):
+        for interface in self.results:
+            self._running.add(interface)
+            thread = Thread(target=self._capture, args=(interface,), daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def stop(self):
+        """End all receivers before the duration has elapsed"""
+        self._stop_event.set()
+
+    def join(self):
+        """Wait for every receiver, Ctrl+C stops them like stop()"""
+        try:
+            for thread in self._threads:
+                thread.join()
+        except KeyboardInterrupt:
+            self.stop()
+            for thread in self._threads:
+                thread.join()
+        return self.results
+
+    def is_running(self):
+        with self._lock:
+            return bool(self._running)
+
+    def all_failed(self):
+        """True once every receiver has failed"""
+        return all(result["error"] is not None for result in self.results.values())
+
+    def _device_stats(self, interface, stats):
+        with self._lock:
+            self.results[interface]["stats"] = stats
+            snapshots = {i: r["stats"] for i, r in self.results.items()
+                         if r["stats"] is not None}
+        if self.on_stats is not None:
+            self.on_stats({
+                "packets": sum(s["packets"] for s in snapshots.values()),
+                "rate": sum(s["rate"] for s in snapshots.values()),
+                "errors": sum(s["errors"] for s in snapshots.values()),
+                "idle": max(s["idle"] for s in snapshots.values()),
+                "devices": snapshots,
+            })
+
+    def _capture(self, interface):
+        result = self.results[interface]
+        callbacks = {
+            "on_stats": lambda stats: self._device_stats(interface, stats),
+            "on_event": None if self.on_event is None else (
+                lambda kind, line: self.on_event(interface, kind, line)),
+            "on_stalled": None if self.on_stalled is None else (
+                lambda idle: self.on_stalled(interface, idle)),
+        }
+        try:
+            if self.replay is not None:
+                # Imported here, replay pulls in the decoder and CSIKit
+                from psgui.replay import run_replay
+
+                capture, source = run_replay, self.replay
+            else:
+                capture, source = run_capture, result["option"]
+            stats = capture(source, self.duration, result["directory"],
+                            self._stop_event, self._barrier, self.stall_timeout,
+                            self.stats_interval, output=self.output, **callbacks)
+            self._device_stats(interface, stats)
+        except Exception as e:
+            # One failing card ends the synchronized capture for all of them
+            result["error"] = str(e)
+            self.stop()
+            self._barrier.abort()
+        with self._lock:
+            self._running.discard(interface)
+            last = not self._running
+        if result["error"] is not None and self.on_error is not None:
+            self.on_error(interface, result["error"])
+        if last and self.on_finished is not None:
+            self.on_finished()
+
+
+def capture_parallel(option, duration, interfaces=(), base_dir='.', replay=None, **kwargs):
+    """Run a ParallelCapture to the end, return its results.
+
+    Returns {interface: {"directory", "option", "stats", "error"}},
+    interface None when the option is run as given in base_dir.
+    """
+    capture = ParallelCapture(option, duration, interfaces, base_dir, replay=replay, **kwargs)
+    capture.start()
+    return capture.join()
@@ -0,0 +1,66 @@
+import numpy as np
+
+# Frames per block when walking a capture, 1024 frames of 160 MHz 4x4
+# complex128 CSI are about 120 MB
+CHUNK_FRAMES = 1024
+
+
+def iter_chunks(csi, chunk_frames=CHUNK_FRAMES, step=1, dtype=None):
+    """Yield (first frame index, block) over an array or memmap of frames.
+
+    Only one block is read into memory at a time. With step only every
+    step-th frame is read, the index is then in the strided frames.
+    """
+    no_frames = len(csi)
+    for start in range(0, no_frames, chunk_frames * step):
+        block = np.asarray(csi[start:min(start + chunk_frames * step, no_frames):step])
+        yield start // step, block if dtype is None else block.astype(dtype, copy=False)
+
+
+class AmplitudeStats:
+    """Running amplitude count, mean, std, min and max per (subcarrier, rx, tx).
+
+    Blocks are merged with Chan's parallel variance update, so the result
+    matches a single pass over the whole capture without holding it.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = None
+        self.m2 = None
+        self.min = None
+        self.max = None
+
+    def update(self, block):
+        amplitude = np.abs(block).astype(np.float64)
+        n = len(amplitude)
+        if n == 0:
+            return self
+        mean = amplitude.mean(axis=0)
+        m2 = ((amplitude - mean) ** 2).sum(axis=0)
+        if self.count == 0:
+            self.count, self.mean, self.m2 = n, mean, m2
+            self.min, self.max = amplitude.min(axis=0), amplitude.max(axis=0)
+            return self
+
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean = self.mean + delta * n / total
+        self.m2 = self.m2 + m2 + delta ** 2 * self.count * n / total
+        self.count = total
+        np.minimum(self.min, amplitude.min(axis=0), out=self.min)
+        np.maximum(self.max, amplitude.max(axis=0), out=self.max)
+        return self
+
+    @property
+    def std(self):
+        return np.sqrt(self.m2 / self.count) if self.count else None
+
+
+def amplitude_stats(chunks):
+    """AmplitudeStats over (index, block) pairs from iter_chunks"""
+    stats = AmplitudeStats()
+    for _, block in chunks:
+        stats.update(block)
+    return stats
+
@@ -0,0 +1,362 @@
+"""Headless command line, shares the capture and processing code of the GUI without Qt.
+
+    python main.py capture --duration 10 --label activity=walking
+    python main.py capture --replay data/lab --speed 10 --subfolder replayed
+    python main.py ingest --source captures --subfolder lab
+    python main.py plot data/lab/rx_1.csi -o rx_1.png --view phase
+    python main.py calibrate data/cables/rx_1.csi -o calibration.npy
+    python main.py doppler data/lab --window 256 --hop 32
+    python main.py export datasets/lab --subfolder lab --dtype float16
+    python main.py query --subfolder lab activity=walking
+    python main.py reprocess --workers 8
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+from psgui.config import DEFAULT_CONFIG, load_config
+
+
+def parse_label_args(items):
+    """['activity=walking', ...] -> {'activity': 'walking', ...}"""
+    labels = {}
+    for item in items or []:
+        if '=' not in item:
+            raise argparse.ArgumentTypeError(f"Label must be key=value: {item}")
+        key, value = item.split('=', 1)
+        labels[key.strip()] = value.strip()
+    return labels
+
+
+def parse_pair(text):
+    """'0,1' -> (0, 1), 'all' -> None (tiled)"""
+    if text == 'all':
+        return None
+    rx, tx = (int(part) for part in text.split(','))
+    return rx, tx
+
+
+def ingest_directory(source_dir, target_dir, labels, quiet=False):
+    """Move the .csi files of one directory into target_dir, return the new entries"""
+    from psgui.ingest import find_csi_files, ingest_csi_files
+
+    csi_files = find_csi_files(source_dir)
+    if not csi_files:
+        print(f"No .csi files found in {source_dir}.")
+        return []
+    return ingest_csi_files(csi_files, target_dir, labels, source_dir,
+                            progress=None if quiet else print)
+
+
+def plot_file(csi_path, output, view="amplitude", pair=(0, 0), calibration=None):
+    """Render one view of a capture to an image file through matplotlib's Agg backend"""
+    import numpy as np
+    from psgui.cache import load_csi
+    from psgui.phase import load_calibration
+    from psgui.render import export_image
+    from psgui.views import CSIViews, VIEWS
+
+    if view not in VIEWS:
+        raise ValueError(f"Unknown view {view}, choose from {', '.join(VIEWS)}")
+    csi_matrix, _ = load_csi(csi_path)
+    views = CSIViews(np.asarray(csi_matrix),
+                     load_calibration(calibration) if calibration else None)
+    if pair is not None and pair not in views.antenna_pairs:
+        raise ValueError(f"No antenna pair {pair} in {csi_path}")
+    export_image(views.image(view, pair), output)
+    print(f"Plot saved to {output}")
+
+
+def cmd_capture(args, config):
+    from psgui.capture import capture_parallel, parse_interfaces
+    from psgui.ingest import get_target_dir
+
+    interfaces = parse_interfaces(args.interfaces if args.interfaces is not None
+                                  else config.get("interfaces", DEFAULT_CONFIG["interfaces"]))
+    replay = None
+    if args.replay:
+        from psgui.replay import ReplaySource
+
+        replay = ReplaySource(args.replay, args.speed)
+    print(f"Capturing for {args.duration:g} s"
+          + (f" on interfaces {', '.join(interfaces)}" if interfaces else "")
+          + (f" from a {replay}" if replay else ""))
+    results = capture_parallel(
+        args.command, args.duration, interfaces, args.capture_dir, replay=replay,
+        stall_timeout=config.get("stall_timeout", DEFAULT_CONFIG["stall_timeout"]),
+        on_stalled=lambda interface, idle: print(
+            f"Warning: no packets received for {idle:.1f} s"
+            + (f" on interface {interface}" if interface is not None else ""),
+            file=sys.stderr),
+        output=None if args.quiet else print)
+
+    failed = 0
+    entries = []
+    target_dir = get_target_dir(args.subfolder, args.data_dir)
+    for interface, result in results.items():
+        name = f"interface {interface}" if interface is not None else "receiver"
+        if result["error"] is not None:
+            print(f"Error running {name}: {result['error']}", file=sys.stderr)
+            failed += 1
+            continue
+        stats = result["stats"]
+        print(f"{name}: {stats['packets']} packets, {stats['errors']} errors")
+        if args.no_ingest:
+            continue
+        labels = dict(args.labels)
+        if interface is not None:
+            labels["interface"] = interface
+        entries += ingest_directory(result["directory"], target_dir, labels, args.quiet)
+
+    for entry in entries:
+        print(json.dumps(entry))
+    if args.plot and entries:
+        plot_file(os.path.join(target_dir, entries[0]["data"]), args.plot)
+    return 1 if failed == len(results) else 0
+
+
+def cmd_ingest(args, config):
+    from psgui.ingest import get_target_dir
+
+    target_dir = get_target_dir(args.subfolder, args.data_dir)
+    for entry in ingest_directory(args.source, target_dir, args.labels, args.quiet):
+        print(json.dumps(entry))
+    return 0
+
+
+def cmd_plot(args, config):
+    plot_file(args.csi_file, args.output, args.view, args.pair, args.calibration)
+    return 0
+
+
+def cmd_calibrate(args, config):
+    import numpy as np
+    from psgui.cache import load_csi
+    from psgui.phase import estimate_calibration
+
+    csi_matrix, _ = load_csi(args.csi_file)
+    offsets = estimate_calibration(csi_matrix, args.reference)
+    np.save(args.output, offsets)
+    _, no_rx, no_tx = offsets.shape
+    for rx in range(no_rx):
+        for tx in range(no_tx):
+            print(f"RX{rx}-TX{tx} {np.degrees(offsets[:, rx, tx]).mean():8.2f} deg")
+    print(f"Calibration saved to {args.output}")
+    return 0
+
+
+def cmd_query(args, config):
+    from psgui.manifest import Manifest
+
+    target_dir = os.path.join(args.data_dir, args.subfolder.strip() or "default")
+    if not os.path.isdir(target_dir):
+        print(f"No such data directory: {target_dir}", file=sys.stderr)
+        return 1
+    with Manifest(target_dir) as manifest:
+        for entry in manifest.query(**args.labels):
+            print(json.dumps(entry))
+    return 0
+
+
+def cmd_reprocess(args, config):
+    from psgui.reprocess import reprocess
+
+    def report(result):
+        if result["status"] == "failed":
+            print(f"Failed {result['path']}: {result['error']}", file=sys.stderr)
+        elif not args.quiet:
+            print(f"{result['status']:>9} {result['path']} ({result['seconds']:.2f} s)")
+
+    start = time.perf_counter()
+    results = reprocess(args.data_dir, args.subfolder, args.features.split(','),
+                        args.force, args.workers, report)
+    counts = {status: sum(r["status"] == status for r in results)
+              for status in ("processed", "skipped", "failed")}
+    print(f"{len(results)} files in {time.perf_counter() - start:.1f} s: "
+          + ", ".join(f"{count} {status}" for status, count in counts.items()))
+    return 1 if counts["failed"] else 0
+
+
+def cmd_doppler(args, config):
+    from psgui.cache import load_csi
+    from psgui.doppler import save_doppler
+    from psgui.reprocess import feature_paths, find_data_files
+
+    folder = os.path.isdir(args.path)
+    csi_files = find_data_files(args.path) if folder else [args.path]
+    if not csi_files:
+        print(f"No captures found in {args.path}.")
+        return 1
+    if folder and args.output:
+        print("--output is ignored for a data folder", file=sys.stderr)
+    for csi_path in csi_files:
+        if args.output and not folder:
+            output = args.output
+        else:
+            # Next to the reprocess features, <name>.csi.doppler.npz
+            output = os.path.splitext(feature_paths(csi_path, ["doppler"])[0]["doppler"])[0]
+            output += ".npz"
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        csi_matrix, timestamps = load_csi(csi_path)
+        spectra = save_doppler(output, csi_matrix, timestamps, window=args.window,
+                               hop=args.hop, signal=args.signal,
+                               reference=args.reference,
+                               subcarrier_mean=not args.per_subcarrier)
+        if not args.quiet:
+            print(f"{csi_path}: {len(spectra)} windows to {output}")
+    return 0
+
+
+def cmd_export(args, config):
+    from psgui.dataset import export_dataset
+
+    start = time.perf_counter()
+    index = export_dataset(args.output, args.data_dir, args.subfolder, args.labels,
+                           args.dtype, args.shard_frames, args.workers, args.force,
+                           None if args.quiet else print)
+    frames = sum(capture["frames"] for capture in index["captures"])
+    print(f"{frames} frames of {len(index['captures'])} captures in "
+          f"{len(index['shards'])} shards, {time.perf_counter() - start:.1f} s")
+    for key, values in index["classes"].items():
+        print(f"  {key}: {', '.join(values)}")
+    return 0
+
+
+def build_parser(config):
+    parser = argparse.ArgumentParser(prog="psgui", description=__doc__.split('\n')[0])
+    subparsers = parser.add_subparsers(dest="command_name", required=True)
+
+    def add_data_args(sub):
+        sub.add_argument("--subfolder", default=config.get(
+            "subfolder_name", DEFAULT_CONFIG["subfolder_name"]),
+            help="data/<subfolder> the captures are moved to")
+        sub.add_argument("--data-dir", default="data")
+        sub.add_argument("--quiet", "-q", action="store_true",
+                         help="only print results")
+
+    capture = subparsers.add_parser("capture", help="run PicoScenes and ingest the capture")
+    capture.add_argument("--duration", "-t", type=float, default=config.get(
+        "duration", DEFAULT_CONFIG["duration"]))
+    capture.add_argument("--command", "-c", default=config.get(
+        "picoscenes_rx_command", DEFAULT_CONFIG["picoscenes_rx_command"]),
+        help="PicoScenes option string")
+    capture.add_argument("--interfaces", "-i", default=None,
+                         help="comma separated interfaces captured in parallel")
+    capture.add_argument("--capture-dir", default=".",
+                         help="directory PicoScenes writes to")
+    capture.add_argument("--replay", metavar="PATH", default=config.get(
+        "replay_source", DEFAULT_CONFIG["replay_source"]) or None,
+        help="replay a .csi file or data folder instead of running PicoScenes")
+    capture.add_argument("--speed", type=float, default=config.get(
+        "replay_speed", DEFAULT_CONFIG["replay_speed"]),
+        help="replay rate relative to the recording, 0 for as fast as possible")
+    capture.add_argument("--label", "-l", dest="labels", action="append",
+                         metavar="KEY=VALUE")
+    capture.add_argument("--no-ingest", action="store_true",
+                         help="leave the .csi files where PicoScenes wrote them")
+    capture.add_argument("--plot", metavar="PATH",
+                         help="also render the first capture to PATH")
+    add_data_args(capture)
+    capture.set_defaults(func=cmd_capture)
+
+    ingest = subparsers.add_parser("ingest", help="move .csi files into the data directory")
+    ingest.add_argument("--source", "-s", default=".")
+    ingest.add_argument("--label", "-l", dest="labels", action="append",
+                        metavar="KEY=VALUE")
+    add_data_args(ingest)
+    ingest.set_defaults(func=cmd_ingest)
+
+    plot = subparsers.add_parser("plot", help="render a view of a capture to a file")
+    plot.add_argument("csi_file")
+    plot.add_argument("--output", "-o", required=True,
+                      help="image file, format from the extension")
+    # Checked in plot_file, importing psgui.views here would pull in NumPy
+    plot.add_argument("--view", default="amplitude",
+                      help="amplitude, phase, phase_clean, ratio, ratio_grid or complex")
+    plot.add_argument("--pair", type=parse_pair, default=(0, 0),
+                      help="RX,TX antenna pair or 'all' for the tiled grid")
+    plot.add_argument("--calibration", default=config.get(
+        "phase_calibration", DEFAULT_CONFIG["phase_calibration"]) or None,
+        help="offsets from the calibrate command, for phase_clean")
+    plot.set_defaults(func=cmd_plot)
+
+    calibrate = subparsers.add_parser(
+        "calibrate", help="estimate per-antenna phase offsets from a reference capture")
+    calibrate.add_argument("csi_file", help="static capture, ideally over cables")
+    calibrate.add_argument("--output", "-o", default="calibration.npy")
+    calibrate.add_argument("--reference", type=parse_pair, default=(0, 0),
+                           help="RX,TX pair the offsets are relative to")
+    calibrate.set_defaults(func=cmd_calibrate)
+
+    query = subparsers.add_parser("query", help="list manifest entries matching labels")
+    query.add_argument("labels", nargs="*", metavar="KEY=VALUE")
+    query.add_argument("--subfolder", default=config.get(
+        "subfolder_name", DEFAULT_CONFIG["subfolder_name"]))
+    query.add_argument("--data-dir", default="data")
+    query.set_defaults(func=cmd_query)
+
+    reprocess = subparsers.add_parser(
+        "reprocess", help="rebuild caches and feature arrays of a whole data tree")
+    reprocess.add_argument("--data-dir", default="data")
+    reprocess.add_argument("--subfolder", default=None,
+                           help="only this subfolder, default all of them")
+    reprocess.add_argument("--features", default="amplitude,phase",
+                           help="comma separated feature arrays to write")
+    reprocess.add_argument("--workers", "-j", type=int, default=None,
+                           help="worker processes, default one per core")
+    reprocess.add_argument("--force", action="store_true",
+                           help="redo files whose content hasn't changed")
+    reprocess.add_argument("--quiet", "-q", action="store_true")
+    reprocess.set_defaults(func=cmd_reprocess)
+
+    doppler = subparsers.add_parser(
+        "doppler", help="write Doppler spectrograms of a capture or data folder")
+    doppler.add_argument("path", help=".csi file or data folder")
+    doppler.add_argument("--output", "-o", default=None,
+                         help=".npz file for a single capture, default next to "
+                              "the reprocess features")
+    doppler.add_argument("--window", type=int, default=128, help="frames per window")
+    doppler.add_argument("--hop", type=int, default=16, help="frames between windows")
+    doppler.add_argument("--signal", default="ratio", help="ratio or amplitude")
+    doppler.add_argument("--reference", type=parse_pair, default=(0, 0),
+                         help="RX,TX pair of the conjugate ratio")
+    doppler.add_argument("--per-subcarrier", action="store_true",
+                         help="keep every subcarrier instead of their mean")
+    doppler.add_argument("--quiet", "-q", action="store_true")
+    doppler.set_defaults(func=cmd_doppler)
+
+    export = subparsers.add_parser(
+        "export", help="write the captures matching labels as training shards")
+    export.add_argument("output", help="dataset folder")
+    export.add_argument("labels", nargs="*", metavar="KEY=VALUE")
+    export.add_argument("--data-dir", default="data")
+    export.add_argument("--subfolder", default=None,
+                        help="only this subfolder, default all of them")
+    export.add_argument("--dtype", default="complex64", help="complex64 or float16")
+    export.add_argument("--shard-frames", type=int, default=65536,
+                        help="frames per shard")
+    export.add_argument("--workers", "-j", type=int, default=None,
+                        help="worker processes, default one per core")
+    export.add_argument("--force", action="store_true",
+                        help="replace a dataset already in the folder")
+    export.add_argument("--quiet", "-q", action="store_true")
+    export.set_defaults(func=cmd_export)
+
+    return parser
+
+
+def main(argv=None):
+    config = load_config()
+    parser = build_parser(config)
+    args = parser.parse_args(argv)
+    try:
+        args.labels = parse_label_args(args.labels) if hasattr(args, "labels") else {}
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    try:
+        return args.func(args, config)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
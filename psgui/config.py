@@ -5,7 +5,30 @@ import json
 DEFAULT_CONFIG = {
     "duration": 5,
     "picoscenes_rx_command": "-d debug -i 2 --mode logger --preset RX_CBW_80 --plot",
-    "subfolder_name": "default"
+    "subfolder_name": "default",
+    # Comma separated PicoScenes interfaces captured in parallel, empty
+    # runs picoscenes_rx_command as given
+    "interfaces": "",
+    "live_view": True,
+    "live_window_frames": 2000,
+    # "matplotlib" or "qimage" for fast colormapped-QImage drawing
+    "render_backend": "matplotlib",
+    # Lines kept in the log panel, and an optional rotating log file
+    "log_max_lines": 5000,
+    "log_file": "",
+    # Seconds without a received packet before the NIC counts as stalled
+    "stall_timeout": 2.0,
+    # A .csi file or data folder replayed instead of running PicoScenes,
+    # at replay_speed times the recorded rate (0: as fast as possible)
+    "replay_source": "",
+    "replay_speed": 1.0,
+    # Name of a shared memory ring the live frames are published to for
+    # other local processes (empty: off), and the frames it keeps
+    "shared_ring": "",
+    "shared_ring_frames": 4096,
+    # Per-antenna phase offsets from `main.py calibrate`, removed by the
+    # sanitized phase view (empty: no calibration)
+    "phase_calibration": ""
 }
 
 CONFIG_FILE = "psgui.json"
@@ -0,0 +1,309 @@
+import os
+import json
+import queue
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from threading import Event, Thread
+
+import numpy as np
+
+from psgui.cache import load_csi
+from psgui.chunks import iter_chunks
+from psgui.reprocess import find_data_entries
+
+# Written last, a folder without it holds no finished export
+INDEX_FILE = "index.json"
+LABELS_FILE = "labels.npy"
+DATASET_VERSION = 1
+
+# Stored dtypes. float16 has no complex type, it keeps real and imaginary
+# parts in a trailing axis of 2
+DATASET_DTYPES = ("complex64", "float16")
+
+# Frames per shard, 64 Ki frames of 80 MHz 2x2 complex64 are about 2 GB
+SHARD_FRAMES = 65536
+
+
+def shard_name(index):
+    return f"shard_{index:05d}.npy"
+
+
+def stored_shape(frame_shape, dtype):
+    """Shape of one stored frame"""
+    return (*frame_shape, 2) if dtype == "float16" else tuple(frame_shape)
+
+
+def to_complex(batch):
+    """Complex64 CSI of a batch read from a float16 dataset (or already complex)"""
+    if np.iscomplexobj(batch):
+        return batch
+    return batch[..., 0].astype(np.float32) + 1j * batch[..., 1].astype(np.float32)
+
+
+def _convert(block, dtype):
+    if dtype == "float16":
+        return np.stack([block.real, block.imag], axis=-1).astype(np.float16)
+    return block.astype(np.complex64)
+
+
+def _capture_info(csi_path):
+    """(frames, frame shape) of a capture, building its complex64 cache if needed"""
+    csi, _ = load_csi(csi_path, dtype="complex64")
+    return len(csi), csi.shape[1:]
+
+
+def _write_shard(path, frames, frame_shape, dtype, segments):
+    """Fill one shard from (capture path, first frame, stop frame, shard offset) segments"""
+    out = np.lib.format.open_memmap(path + ".tmp.npy", mode="w+", dtype=np.dtype(
+        np.float16 if dtype == "float16" else np.complex64),
+        shape=(frames, *stored_shape(frame_shape, dtype)))
+    for csi_path, first, stop, offset in segments:
+        csi, _ = load_csi(csi_path, dtype="complex64")
+        for start, block in iter_chunks(csi[first:stop]):
+            out[offset + start:offset + start + len(block)] = _convert(block, dtype)
+    # Drop the map before the rename, Windows can't replace a mapped file
+    out.flush()
+    del out
+    os.replace(path + ".tmp.npy", path)
+    return path
+
+
+def plan_shards(frame_counts, shard_frames=SHARD_FRAMES):
+    """Lay captures end to end and cut them into shards of shard_frames frames.
+
+    Returns the first global frame of every capture and, per shard, its
+    frame count and (capture index, first, stop, shard offset) segments.
+    """
+    offsets = np.concatenate([[0], np.cumsum(frame_counts)]).astype(np.int64)
+    total = int(offsets[-1])
+    shards = []
+    for shard_start in range(0, total, shard_frames):
+        shard_stop = min(shard_start + shard_frames, total)
+        segments = []
+        for capture, (first, stop) in enumerate(zip(offsets[:-1], offsets[1:])):
+            lo, hi = max(first, shard_start), min(stop, shard_stop)
+            if lo < hi:
+                segments.append((capture, int(lo - first), int(hi - first),
+                                 int(lo - shard_start)))
+        shards.append((shard_stop - shard_start, segments))
+    return offsets[:-1], shards
+
+
+def export_dataset(out_dir, data_dir="data", subfolder=None, labels=None,
+                   dtype="complex64", shard_frames=SHARD_FRAMES, workers=None,
+                   force=False, progress=None):
+    """Convert the captures of a data tree into memory-mappable shards.
+
+    The captures matching labels are decoded (through their caches) and
+    copied end to end into fixed-size .npy shards of dtype, one process
+    per shard. index.json records every capture's labels and frame range
+    and labels.npy its class index per label key, -1 where it has none.
+    Captures whose antenna layout differs from the first are left out.
+    progress is called with a message per finished step. Returns the index.
+    """
+    if dtype not in DATASET_DTYPES:
+        raise ValueError(f"Unknown dataset dtype {dtype}, choose from "
+                         f"{', '.join(DATASET_DTYPES)}")
+    index_path = os.path.join(out_dir, INDEX_FILE)
+    if os.path.exists(index_path) and not force:
+        raise ValueError(f"{out_dir} already holds a dataset, pass force to replace it")
+    entries = find_data_entries(data_dir, subfolder, **(labels or {}))
+    if not entries:
+        raise ValueError(f"No captures in {data_dir} match {labels or 'any labels'}")
+    report = progress or (lambda message: None)
+
+    # Decoding is what takes long, so caches are built in parallel too
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        infos = list(pool.map(_capture_info, [path for path, _ in entries]))
+    frame_shape = infos[0][1]
+    captures = []
+    for (path, capture_labels), (frames, shape) in zip(entries, infos):
+        if shape != frame_shape:
+            report(f"Skipping {path}: frames of {shape}, not {frame_shape}")
+        elif frames:
+            captures.append({"file": os.path.relpath(path, data_dir),
+                             "path": path, "labels": capture_labels, "frames": frames})
+    if not captures:
+        raise ValueError("No frames to export")
+
+    offsets, shards = plan_shards([c["frames"] for c in captures], shard_frames)
+    os.makedirs(out_dir, exist_ok=True)
+    if os.path.exists(index_path):
+        # Invalidate the old export before its shards are overwritten
+        os.remove(index_path)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = []
+        for i, (frames, segments) in enumerate(shards):
+            segments = [(captures[c]["path"], first, stop, offset)
+                        for c, first, stop, offset in segments]
+            futures.append(pool.submit(_write_shard, os.path.join(out_dir, shard_name(i)),
+                                       frames, frame_shape, dtype, segments))
+        for future in as_completed(futures):
+            report(f"Wrote {future.result()}")
+    # Shards left over from a larger export
+    written = {shard_name(i) for i in range(len(shards))}
+    for name in os.listdir(out_dir):
+        if name.startswith("shard_") and name.endswith(".npy") and name not in written:
+            os.remove(os.path.join(out_dir, name))
+
+    keys = sorted({key for c in captures for key in c["labels"]})
+    classes = {key: sorted({c["labels"][key] for c in captures if key in c["labels"]})
+               for key in keys}
+    label_index = np.full((len(captures), len(keys)), -1, dtype=np.int32)
+    for i, capture in enumerate(captures):
+        for j, key in enumerate(keys):
+            if key in capture["labels"]:
+                label_index[i, j] = classes[key].index(capture["labels"][key])
+    np.save(os.path.join(out_dir, LABELS_FILE), label_index)
+
+    index = {
+        "version": DATASET_VERSION,
+        "dtype": dtype,
+        "frame_shape": list(frame_shape),
+        "shard_frames": shard_frames,
+        "shards": [{"file": shard_name(i), "frames": frames}
+                   for i, (frames, _) in enumerate(shards)],
+        "label_keys": keys,
+        "classes": classes,
+        "captures": [{"file": c["file"], "labels": c["labels"], "frames": c["frames"],
+                      "offset": int(offset)} for c, offset in zip(captures, offsets)],
+    }
+    with open(index_path + ".tmp", "w") as f:
+        json.dump(index, f, indent=2)
+    os.replace(index_path + ".tmp", index_path)
+    report(f"Exported {int(sum(c['frames'] for c in captures))} frames of "
+           f"{len(captures)} captures into {len(shards)} shards")
+    return index
+
+
+class ShardDataset:
+    """Shuffled, windowed mini-batches over the memory-mapped shards of an export.
+
+    Every window is window consecutive frames of one capture, windows start
+    every stride frames. Batches are (x, y): x of shape (batch, window,
+    subcarriers, rx, tx) in the stored dtype (a trailing axis of 2 for
+    float16, see to_complex), y the class index of label per window, or the
+    capture index without a label. A thread gathers the next prefetch
+    batches while the current one is used, so an epoch costs little more
+    than reading its frames from disk.
+    """
+
+    def __init__(self, path, window=256, stride=None, batch_size=32, label=None,
+                 shuffle=True, seed=None, prefetch=4, drop_last=False, captures=None):
+        with open(os.path.join(path, INDEX_FILE), "r") as f:
+            self.index = json.load(f)
+        self.path = path
+        self.window = window
+        self.stride = stride or window
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.prefetch = prefetch
+        self.drop_last = drop_last
+        self.rng = np.random.default_rng(seed)
+        self.shard_frames = self.index["shard_frames"]
+        self.shards = [np.load(os.path.join(path, shard["file"]), mmap_mode="r")
+                       for shard in self.index["shards"]]
+
+        capture_labels = np.load(os.path.join(path, LABELS_FILE))
+        # Label values in class index order
+        self.classes = None
+        if label is None:
+            targets = np.arange(len(self.index["captures"]))
+        elif label in self.index["label_keys"]:
+            targets = capture_labels[:, self.index["label_keys"].index(label)]
+            self.classes = self.index["classes"][label]
+        else:
+            raise ValueError(f"No label {label} in {path}, choose from "
+                             f"{', '.join(self.index['label_keys'])}")
+
+        # Global first frame and target of every window; captures limits
+        # them to a subset, e.g. for a train/test split by capture
+        selected = None if captures is None else set(captures)
+        starts, window_targets = [], []
+        for i, capture in enumerate(self.index["captures"]):
+            if selected is not None and i not in selected:
+                continue
+            first = np.arange(capture["offset"],
+                              capture["offset"] + capture["frames"] - window + 1,
+                              self.stride, dtype=np.int64)
+            starts.append(first)
+            window_targets.append(np.full(len(first), targets[i], dtype=np.int64))
+        self.starts = np.concatenate(starts) if starts else np.empty(0, np.int64)
+        self.targets = (np.concatenate(window_targets) if window_targets
+                        else np.empty(0, np.int64))
+
+    def __len__(self):
+        """Batches per epoch"""
+        if self.drop_last:
+            return len(self.starts) // self.batch_size
+        return -(-len(self.starts) // self.batch_size)
+
+    @property
+    def sample_shape(self):
+        return (self.window, *self.shards[0].shape[1:]) if self.shards else ()
+
+    def read(self, start, out):
+        """Copy window frames from global frame start into out, across shards if needed"""
+        done = 0
+        while done < self.window:
+            shard, offset = divmod(start + done, self.shard_frames)
+            count = min(self.window - done, self.shard_frames - offset)
+            out[done:done + count] = self.shards[shard][offset:offset + count]
+            done += count
+        return out
+
+    def _batch(self, order):
+        # Read in frame order, which keeps the disk access mostly sequential
+        order = order[np.argsort(self.starts[order], kind="stable")]
+        x = np.empty((len(order), *self.sample_shape), dtype=self.shards[0].dtype)
+        for row, i in enumerate(order):
+            self.read(int(self.starts[i]), x[row])
+        return x, self.targets[order]
+
+    def _batches(self):
+        order = (self.rng.permutation(len(self.starts)) if self.shuffle
+                 else np.arange(len(self.starts)))
+        for start in range(0, len(order), self.batch_size):
+            chunk = order[start:start + self.batch_size]
+            if self.drop_last and len(chunk) < self.batch_size:
+                return
+            yield chunk
+
+    def __iter__(self):
+        """One epoch of batches, gathered ahead of time on a background thread"""
+        batches = queue.Queue(maxsize=max(self.prefetch, 1))
+        stop_event = Event()
+        done = object()
+
+        def put(item):
+            # Poll so an abandoned epoch doesn't block the thread forever
+            while not stop_event.is_set():
+                try:
+                    batches.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def gather():
+            try:
+                for chunk in self._batches():
+                    if not put(self._batch(chunk)):
+                        return
+            except Exception as e:
+                put(e)
+                return
+            put(done)
+
+        worker = Thread(target=gather, daemon=True)
+        worker.start()
+        try:
+            while True:
+                item = batches.get()
+                if item is done:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop_event.set()
+            worker.join()
@@ -0,0 +1,238 @@
+import os
+import json
+import struct
+
+import numpy as np
+from CSIKit.reader import PicoScenesBeamformReader
+from CSIKit.reader.readers.pico.AbstractPicoScenesFrameSegment import AbstractPicoScenesFrameSegment
+from CSIKit.reader.readers.pico.FrameContainer import FrameContainer
+from CSIKit.reader.readers.pico.ModularPicoScenesFrame import ModularPicoScenesFrame
+from CSIKit.util import stringops
+
+# Every PicoScenes frame starts with a little-endian uint32 holding the
+# length of the remaining frame bytes
+LENGTH_PREFIX = struct.Struct("<I")
+
+
+def decode_frame(frame_bytes):
+    """Decode one length-prefixed PicoScenes frame, return (csi, timestamp) or None"""
+    frame = ModularPicoScenesFrame(frame_bytes[:ModularPicoScenesFrame.SIZE])
+    frame_pos = ModularPicoScenesFrame.SIZE
+    container = FrameContainer()
+
+    # Same segment walk as CSIKit's PicoScenesBeamformReader.read_file
+    for _ in range(frame.numRxSegments):
+        seg_length = LENGTH_PREFIX.unpack_from(frame_bytes, frame_pos)[0] + 4
+        segment = AbstractPicoScenesFrameSegment(
+            frame_bytes[frame_pos:frame_pos + seg_length])
+        subseg_start = frame_pos + segment.pos
+        subseg_bytes = frame_bytes[subseg_start:subseg_start + seg_length]
+
+        segment_class = PicoScenesBeamformReader.SEGMENT_MAPPING.get(
+            segment.subsegmentName)
+        if segment_class is not None:
+            setattr(container, segment.subsegmentName,
+                    segment_class(subseg_bytes, segment.subsegmentVersion))
+
+        frame_pos += seg_length
+
+    try:
+        container.set_source_mac(stringops.hexToMACString(
+            frame_bytes[frame_pos + 4:frame_pos + 10].hex()))
+        csi = np.asarray(container.get_frame().csi_matrix)
+        timestamp = container.get_timestamp_seconds()
+    except (AttributeError, KeyError):
+        # Frame without RxSBasic/CSI segments or from an unknown device
+        return None
+
+    # Normalise to (subcarriers, rx, tx) like csitools.get_CSI
+    if csi.ndim == 1:
+        csi = csi[:, np.newaxis, np.newaxis]
+    elif csi.ndim == 2:
+        csi = csi[:, :, np.newaxis]
+
+    return csi, timestamp
+
+
+# Device type and timestamp open every RxSBasic version
+RX_BASIC_HEAD = struct.Struct("<HQ")
+
+# Intel MVM (AX200/AX210) frames take their timestamp from the muClock of
+# the MVMExtra segment, which is at this offset of its version 1 payload
+MVM_DEVICE_TYPE = 0x2000
+MVM_CLOCK = struct.Struct("<I")
+MVM_CLOCK_OFFSET = 90
+
+
+def frame_timestamp(frame_bytes):
+    """Receive timestamp in seconds read straight from the frame's segments.
+
+    Much cheaper than decode_frame when only the timing of frames is
+    needed, e.g. to replay a capture. The clock is the one decode_frame
+    (CSIKit's FrameContainer.get_timestamp_seconds) reports: MVMExtra's
+    muClock on Intel MVM devices, the RxSBasic timestamp otherwise.
+    Returns None if the frame lacks the segment holding it.
+    """
+    pos = ModularPicoScenesFrame.SIZE
+    rx_basic = mu_clock = None
+    for _ in range(frame_bytes[pos - 1]):
+        seg_length = LENGTH_PREFIX.unpack_from(frame_bytes, pos)[0]
+        name_length = frame_bytes[pos + 4]
+        name = frame_bytes[pos + 5:pos + 5 + name_length].rstrip(b"\x00")
+        payload = pos + 5 + name_length + 2
+        if name == b"RxSBasic":
+            rx_basic = RX_BASIC_HEAD.unpack_from(frame_bytes, payload)
+        elif name == b"MVMExtra" and struct.unpack_from(
+                "<H", frame_bytes, payload - 2)[0] == 1:
+            mu_clock = MVM_CLOCK.unpack_from(frame_bytes, payload + MVM_CLOCK_OFFSET)[0]
+        pos += LENGTH_PREFIX.size + seg_length
+    if rx_basic is None:
+        return None
+    device_type, timestamp = rx_basic
+    if device_type == MVM_DEVICE_TYPE:
+        # decode_frame drops MVM frames without an MVMExtra too
+        timestamp = mu_clock
+        if timestamp is None:
+            return None
+    return timestamp / FrameContainer.TIMESTAMP_SECONDS_MAP.get(device_type, 1e6)
+
+
+def stack_frames(frames):
+    """Stack (csi, timestamp) pairs into a (frames, subcarriers, rx, tx) matrix and timestamps.
+
+    Frames whose antenna layout differs from the first one are dropped, as
+    csitools.get_CSI does for inhomogeneous captures.
+    """
+    if not frames:
+        return None, np.empty(0)
+
+    shape = frames[0][0].shape
+    frames = [f for f in frames if f[0].shape == shape]
+    csi = np.stack([f[0] for f in frames])
+    timestamps = np.array([f[1] for f in frames], dtype=float)
+    return csi, timestamps
+
+
+def decode_file(path, offset=0):
+    """Decode all complete frames after offset, return (csi, timestamps, decoder)"""
+    decoder = PicoScenesDecoder(path, offset)
+    csi, timestamps = stack_frames(list(decoder.iter_frames()))
+    return csi, timestamps, decoder
+
+
+class PicoScenesDecoder:
+    """Frame-level reader for a PicoScenes .csi file starting at a byte offset.
+
+    The offset only ever moves past complete frames, so a decoder (or its
+    saved state) can be resumed on a file that is still growing and will
+    only parse the frames appended since the last call.
+    """
+
+    def __init__(self, path, offset=0):
+        self.path = path
+        self.offset = offset
+
+    def state(self):
+        """Return a JSON-serialisable snapshot to resume decoding later"""
+        return {"path": self.path, "offset": self.offset}
+
+    @classmethod
+    def from_state(cls, state):
+        return cls(state["path"], state.get("offset", 0))
+
+    def save_state(self, state_path):
+        """Save the current offset next to other derived data"""
+        with open(state_path, "w") as f:
+            json.dump(self.state(), f)
+
+    @classmethod
+    def load_state(cls, path, state_path):
+        """Resume decoding path from a saved state file, start over if it is unusable"""
+        try:
+            with open(state_path, "r") as f:
+                state = json.load(f)
+            if state.get("path") == path:
+                return cls.from_state(state)
+        except (OSError, ValueError, KeyError):
+            pass
+        return cls(path)
+
+    def has_new_data(self):
+        """Check whether the file has grown past the current offset"""
+        try:
+            return os.path.getsize(self.path) > self.offset
+        except OSError:
+            return False
+
+    def count_frames(self):
+        """Count complete frames after the current offset without decoding them"""
+        count = 0
+        if not os.path.exists(self.path):
+            return count
+
+        size = os.path.getsize(self.path)
+        pos = self.offset if self.offset <= size else 0
+        with open(self.path, "rb") as f:
+            while pos + LENGTH_PREFIX.size <= size:
+                f.seek(pos)
+                frame_length = LENGTH_PREFIX.unpack(f.read(LENGTH_PREFIX.size))[0]
+                pos += LENGTH_PREFIX.size + frame_length
+                if pos > size:
+                    break
+                count += 1
+        return count
+
+    def iter_frames(self, max_frames=None):
+        """Yield (csi, timestamp) for each complete frame after the current offset"""
+        for frame_bytes in self.iter_raw_frames(max_frames):
+            decoded = decode_frame(frame_bytes)
+            if decoded is not None:
+                yield decoded
+
+    def iter_raw_frames(self, max_frames=None):
+        """Yield the undecoded bytes, length prefix included, of each complete frame"""
+        if not os.path.exists(self.path):
+            return
+
+        # The file was truncated or replaced, the saved offset is meaningless
+        if os.path.getsize(self.path) < self.offset:
+            self.offset = 0
+
+        count = 0
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            while max_frames is None or count < max_frames:
+                prefix = f.read(LENGTH_PREFIX.size)
+                if len(prefix) < LENGTH_PREFIX.size:
+                    break
+
+                frame_length = LENGTH_PREFIX.unpack(prefix)[0]
+                body = f.read(frame_length)
+                if len(body) < frame_length:
+                    # Frame is still being written, retry from here next time
+                    break
+
+                self.offset += LENGTH_PREFIX.size + frame_length
+                count += 1
+                yield prefix + body
+
+    def iter_chunks(self, chunk_frames=1024, dtype=None):
+        """Yield (csi, timestamps) blocks of up to chunk_frames frames.
+
+        Only one block is held in memory, so arbitrarily long captures can
+        be processed without a cache. Frames whose antenna layout differs
+        from the first block's are dropped, as in stack_frames.
+        """
+        shape = None
+        while True:
+            frames = list(self.iter_frames(max_frames=chunk_frames))
+            if not frames:
+                return
+            if shape is None:
+                shape = frames[0][0].shape
+            frames = [f for f in frames if f[0].shape == shape]
+            if not frames:
+                continue
+            csi, timestamps = stack_frames(frames)
+            yield (csi if dtype is None else csi.astype(dtype, copy=False)), timestamps
+
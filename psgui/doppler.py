@@ -0,0 +1,232 @@
+import numpy as np
+
+from psgui.chunks import CHUNK_FRAMES, iter_chunks
+
+# Series a Doppler spectrum is taken of, see DopplerSTFT
+SIGNALS = ("ratio", "amplitude")
+
+# Window updates between exact FFT recomputes, bounding the rounding
+# error the sliding DFT accumulates
+RESYNC_HOPS = 64
+
+
+def frame_rate(timestamps):
+    """Frames per second from receive timestamps in seconds, None if unknown"""
+    if timestamps is None or len(timestamps) < 2:
+        return None
+    step = float(np.median(np.diff(np.asarray(timestamps, dtype=np.float64))))
+    return 1.0 / step if step > 0 else None
+
+
+def doppler_frequencies(window, rate=None):
+    """Doppler frequency of every output bin, in Hz with a frame rate, else cycles/frame"""
+    return np.fft.fftshift(np.fft.fftfreq(window, 1.0 / (rate or 1.0)))
+
+
+class DopplerSTFT:
+    """Sliding Doppler spectra of CSI streams, fed block by block.
+
+    Every subcarrier of every antenna pair is one series: the conjugate
+    product with the reference pair for signal="ratio", which cancels the
+    per-frame offsets and keeps the sign of the Doppler shift, or the
+    amplitude for signal="amplitude". A window of window frames starts
+    every hop frames, its mean is removed and it is Hann-weighted.
+
+    A window costs one FFT, O(window log window) per series. For hops of
+    at most log2(window) frames a sliding DFT is cheaper: the hop frames
+    leaving and entering the window change every bin by one (bins x hop)
+    matrix product over all series at once, and an exact FFT every resync
+    hops bounds the rounding error it accumulates; its Hann weighting is a
+    three-tap filter across bins, applied on output. Frames are kept in a
+    ring buffer of one window, so memory doesn't grow with the stream.
+
+    push returns (spectra, end frames), spectra of shape (windows, bins,
+    rx, tx), or (windows, bins, subcarriers, rx, tx) with
+    subcarrier_mean=False, zero Doppler in the middle bin. Amplitude
+    spectra are symmetric around it. With normalize every window's
+    spectrum sums to 1 per series.
+    """
+
+    def __init__(self, window=128, hop=16, signal="ratio", reference=(0, 0),
+                 subcarrier_mean=True, normalize=True, resync=RESYNC_HOPS,
+                 dtype=np.float32):
+        if signal not in SIGNALS:
+            raise ValueError(f"Unknown signal {signal}, choose from {', '.join(SIGNALS)}")
+        if not 0 < hop <= window:
+            raise ValueError("hop must be between 1 and window")
+        self.window = window
+        self.hop = hop
+        self.signal = signal
+        self.reference = reference
+        self.subcarrier_mean = subcarrier_mean
+        self.normalize = normalize
+        self.resync = resync
+        self.dtype = dtype
+        self.sliding = hop <= np.log2(window)
+
+        k = np.arange(window)
+        # Periodic Hann, its spectrum is the three taps _power filters with
+        self._hann = (0.5 - 0.5 * np.cos(2 * np.pi * k / window)).astype(
+            np.float32)[:, np.newaxis]
+        if self.sliding:
+            # Contribution of the j-th frame of a hop to bin k, and the
+            # shift of every bin's phase reference by one hop
+            self._twiddles = np.exp(-2j * np.pi * np.outer(k, np.arange(hop)) / window)
+            self._rotation = np.exp(2j * np.pi * k * hop / window)[:, np.newaxis]
+        self.reset()
+
+    def reset(self):
+        """Forget the stream, the next push starts a new first window"""
+        self._shape = None
+        # The current window, oldest frame at _head once it is full
+        self._ring = None
+        self._head = 0
+        self._filled = 0
+        # Frames of the next hop
+        self._pending = None
+        self._pending_count = 0
+        self._spectrum = None
+        self._since_resync = 0
+        self.frames = 0
+
+    def frequencies(self, rate=None):
+        return doppler_frequencies(self.window, rate)
+
+    def _series(self, csi):
+        """(frames, subcarriers * rx * tx) series of a CSI block"""
+        if self.signal == "ratio":
+            ref = np.conj(csi[:, :, self.reference[0], self.reference[1]])
+            values = csi * ref[:, :, np.newaxis, np.newaxis]
+        else:
+            values = np.abs(csi)
+        # The sliding DFT accumulates, single precision is enough for an FFT
+        return values.reshape(len(csi), -1).astype(
+            np.complex128 if self.sliding else np.complex64)
+
+    def push(self, csi):
+        """Feed a (frames, subcarriers, rx, tx) block, return the windows it completed"""
+        if self._shape is not None and csi.shape[1:] != self._shape:
+            # New antenna layout, start over
+            self.reset()
+        self._shape = csi.shape[1:]
+        series = self._series(csi)
+        if self._ring is None:
+            self._ring = np.zeros((self.window, series.shape[1]), dtype=series.dtype)
+            self._pending = np.zeros((self.hop, series.shape[1]), dtype=series.dtype)
+
+        spectra, ends = [], []
+        used = 0
+        while used < len(series):
+            if self._filled < self.window:
+                take = min(self.window - self._filled, len(series) - used)
+                self._ring[self._filled:self._filled + take] = series[used:used + take]
+                self._filled += take
+                used += take
+                if self._filled < self.window:
+                    break
+                if self.sliding:
+                    self._spectrum = np.fft.fft(self._ring, axis=0)
+            else:
+                take = min(self.hop - self._pending_count, len(series) - used)
+                self._pending[self._pending_count:self._pending_count + take] = (
+                    series[used:used + take])
+                self._pending_count += take
+                used += take
+                if self._pending_count < self.hop:
+                    break
+                self._advance()
+            spectra.append(self._power())
+            ends.append(self.frames + used)
+        self.frames += len(csi)
+        return self._output(spectra, ends)
+
+    def _advance(self):
+        """Slide the window by the pending hop"""
+        self._pending_count = 0
+        rows = (self._head + np.arange(self.hop)) % self.window
+        if not self.sliding:
+            # _power transforms the window itself
+            self._ring[rows] = self._pending
+            self._head = (self._head + self.hop) % self.window
+            return
+        self._since_resync += 1
+        if self._since_resync < self.resync:
+            self._spectrum += self._twiddles @ (self._pending - self._ring[rows])
+            self._spectrum *= self._rotation
+            self._ring[rows] = self._pending
+            self._head = (self._head + self.hop) % self.window
+            return
+        self._since_resync = 0
+        self._ring[rows] = self._pending
+        self._head = (self._head + self.hop) % self.window
+        self._spectrum = np.fft.fft(np.roll(self._ring, -self._head, axis=0), axis=0)
+
+    def _power(self):
+        """Power spectrum of the current window, mean removed and Hann-weighted"""
+        if self.sliding:
+            # Three taps across bins in single precision. The mean of a
+            # window is its bin 0, leaving it out of the taps equals
+            # subtracting the mean before the weighting
+            raw = self._spectrum.astype(np.complex64)
+            raw[0] = 0
+            spectrum = raw * np.float32(0.5)
+            spectrum[1:] -= np.float32(0.25) * raw[:-1]
+            spectrum[:-1] -= np.float32(0.25) * raw[1:]
+            spectrum[0] -= np.float32(0.25) * raw[-1]
+            spectrum[-1] -= np.float32(0.25) * raw[0]
+        else:
+            # The ring holds the window rotated by _head, rotating the
+            # weights to match only changes the phases of the spectrum
+            weighted = self._ring - self._ring.mean(axis=0)
+            weighted *= np.roll(self._hann, self._head, axis=0)
+            spectrum = np.fft.fft(weighted, axis=0)
+        power = spectrum.real ** 2 + spectrum.imag ** 2
+        power = power.reshape(self.window, *self._shape)
+        if self.subcarrier_mean:
+            power = power.mean(axis=1)
+        if self.normalize:
+            total = power.sum(axis=0, keepdims=True)
+            power = power / np.where(total > 0, total, 1.0)
+        return np.fft.fftshift(power, axes=0).astype(self.dtype)
+
+    def _output(self, spectra, ends):
+        """Stack spectra with the index of the frame after each window"""
+        ends = np.asarray(ends, dtype=np.int64)
+        if not spectra:
+            shape = self._shape[1:] if self.subcarrier_mean else self._shape
+            return np.empty((0, self.window, *shape), dtype=self.dtype), ends
+        return np.stack(spectra), ends
+
+
+def doppler_spectrogram(csi, window=128, hop=16, signal="ratio", reference=(0, 0),
+                        subcarrier_mean=True, chunk_frames=CHUNK_FRAMES):
+    """Doppler spectra of a whole capture, streamed in chunks like a live capture.
+
+    Returns (spectra, end frames) as DopplerSTFT.push does.
+    """
+    stft = DopplerSTFT(window, hop, signal, reference, subcarrier_mean)
+    spectra, ends = [], []
+    for _, block in iter_chunks(csi, chunk_frames):
+        block_spectra, block_ends = stft.push(block)
+        spectra.append(block_spectra)
+        ends.append(block_ends)
+    if not spectra:
+        raise ValueError("Can't take Doppler spectra of a capture without frames")
+    return np.concatenate(spectra), np.concatenate(ends)
+
+
+def save_doppler(path, csi, timestamps=None, **params):
+    """Write the Doppler spectrogram of a capture to an .npz file, return the spectra.
+
+    The archive holds spectra, end_frames, frequencies (in Hz if the frame
+    rate is known from timestamps, else cycles/frame) and the parameters.
+    """
+    spectra, ends = doppler_spectrogram(csi, **params)
+    rate = frame_rate(timestamps)
+    window = params.get("window", 128)
+    np.savez(path, spectra=spectra, end_frames=ends,
+             frequencies=doppler_frequencies(window, rate),
+             frame_rate=np.float64(rate or np.nan),
+             window=window, hop=params.get("hop", 16),
+             signal=params.get("signal", "ratio"))
+    return spectra
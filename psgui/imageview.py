@@ -0,0 +1,183 @@
+import numpy as np
+from PyQt6.QtWidgets import QWidget, QSizePolicy
+from PyQt6.QtGui import QImage, QPainter, QColor
+from PyQt6.QtCore import QTimer, Qt
+
+from psgui.render import colormap_lut, export_image, max_pool, to_argb
+from psgui.ringbuffer import PooledRingBuffer
+from psgui.views import LIVE_MODES, ViewImage
+
+
+class CSIImageView(QWidget):
+    """CSI heatmap painted straight from a colormapped QImage, without matplotlib.
+
+    Offers the same display methods as CSIVisualizer for large matrices and
+    live views; figures are still exported through matplotlib.
+    """
+
+    TITLE_HEIGHT = 20
+
+    def __init__(self, parent=None, cmap='viridis'):
+        super().__init__(parent)
+        self.setSizePolicy(QSizePolicy.Policy.Expanding,
+                           QSizePolicy.Policy.Expanding)
+        self.lut = colormap_lut(cmap)
+        self.cmap = cmap
+        self.title = "CSI Visualizer"
+
+        # Source (y, x) image and the pixels painted from it, the ARGB
+        # array must outlive the QImage that wraps it
+        self._source = None
+        self._view_image = None
+        self._pixels = None
+        self._image = None
+        self._vmin = 0.0
+        self._vmax = 1.0
+
+        # Live waterfall state, see start_live
+        self._live_buffer = None
+        self._live_display = None
+        self._live_window = 0
+        self._live_mode = "amplitude"
+        self._live_dirty = False
+        self._live_timer = QTimer(self)
+        self._live_timer.timeout.connect(self._redraw_live)
+
+    def clear_plot(self):
+        """Clear plot and display default message"""
+        self.stop_live()
+        self.title = "CSI Visualizer"
+        self._source = None
+        self._view_image = None
+        self._pixels = None
+        self._image = None
+        self.update()
+
+    def show_magnitude(self, csi_magnitude, timestamps=None):
+        """Show a prepared (frames, subcarriers) magnitude array in dB, must run in the UI thread"""
+        return self.show_image(ViewImage(csi_magnitude,
+                                         'CSI Amplitude Heatmap (RX1-TX1)',
+                                         'Frame Index', 'Subcarrier Index',
+                                         'Amplitude (dB)'))
+
+    def show_image(self, image, timestamps=None):
+        """Show a prepared ViewImage, must run in the UI thread"""
+        try:
+            self.stop_live()
+            self.title = image.title
+            self.lut = colormap_lut(image.cmap)
+            self._view_image = image
+            self._source = image.data.T
+            self._vmin = image.vmin
+            self._vmax = image.vmax
+            self._render()
+            return True
+        except Exception as e:
+            print(f"Visualization error: {str(e)}")
+            self.clear_plot()
+            return False
+
+    def save_figure(self, path):
+        """Export the current image through matplotlib"""
+        if self._view_image is None:
+            return False
+        export_image(self._view_image, path)
+        return True
+
+    def _image_rect(self):
+        rect = self.rect()
+        rect.setTop(self.TITLE_HEIGHT)
+        return rect
+
+    def _render(self):
+        """Pool the source to the widget size, colormap it and wrap it in a QImage"""
+        if self._source is None:
+            return
+        rect = self._image_rect()
+        pooled = max_pool(self._source, rect.height(), rect.width())
+        self._pixels = to_argb(pooled, self.lut, self._vmin, self._vmax)
+        height, width = self._pixels.shape
+        self._image = QImage(self._pixels.data, width, height, width * 4,
+                             QImage.Format.Format_ARGB32)
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor('white'))
+        if self._image is None:
+            painter.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter, self.title)
+            return
+        painter.drawText(0, 0, self.width(), self.TITLE_HEIGHT,
+                         Qt.AlignmentFlag.AlignCenter,
+                         f"{self.title}  [{self._vmin:.3g}, {self._vmax:.3g}]")
+        rect = self._image_rect()
+        painter.drawImage(rect, self._image)
+
+        # Divider lines between the blocks of a tiled antenna grid
+        image = self._view_image
+        if image is not None and image.tiles is not None and self._source is not None:
+            block_width, block_height, _ = image.tiles
+            no_y, no_x = self._source.shape
+            painter.setPen(QColor('white'))
+            for x0 in range(block_width, no_x, block_width):
+                x = rect.left() + int(rect.width() * x0 / no_x)
+                painter.drawLine(x, rect.top(), x, rect.bottom())
+            for y0 in range(block_height, no_y, block_height):
+                y = rect.bottom() - int(rect.height() * y0 / no_y)
+                painter.drawLine(rect.left(), y, rect.right(), y)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._render()
+
+    def start_live(self, window_frames=2000, fps=30):
+        """Switch to a scrolling waterfall of the last window_frames frames"""
+        self.stop_live()
+        self._view_image = None
+        self._live_window = window_frames
+        self._set_live_mode("amplitude")
+        self._live_timer.start(int(1000 / fps))
+
+    def _set_live_mode(self, mode):
+        self._live_mode = mode
+        self.title = LIVE_MODES[mode]["title"]
+        self.lut = colormap_lut(LIVE_MODES[mode]["cmap"])
+        self._vmin, self._vmax = 0.0, 0.0
+
+    def stop_live(self):
+        self._live_timer.stop()
+        self._live_buffer = None
+        self._live_display = None
+        self._live_dirty = False
+
+    def push_frames(self, csi_magnitude, mode="amplitude"):
+        """Queue a (frames, subcarriers) block for the next waterfall refresh.
+
+        mode is a key of LIVE_MODES, switching it starts a new waterfall.
+        """
+        if not self._live_timer.isActive():
+            return
+        if (self._live_buffer is None or mode != self._live_mode
+                or self._live_buffer.frame_shape != csi_magnitude.shape[1:]):
+            self._set_live_mode(mode)
+            self._live_buffer = PooledRingBuffer(self._live_window,
+                                                 csi_magnitude.shape[1:])
+        self._live_buffer.extend(csi_magnitude)
+        self._live_dirty = True
+
+    def _redraw_live(self):
+        if not self._live_dirty or self._live_buffer is None:
+            return
+        self._live_dirty = False
+        # The buffer keeps the window pooled to the widget size as frames arrive
+        rect = self._image_rect()
+        self._live_buffer.fit(rect.height(), rect.width())
+        self._live_display = self._live_buffer.display()
+        self._source = self._live_display
+        # Only grow the color range so the waterfall doesn't flicker
+        if LIVE_MODES[self._live_mode]["symmetric"]:
+            self._vmax = max(self._vmax, float(np.abs(self._live_display).max()))
+            self._vmin = -self._vmax
+        else:
+            self._vmax = max(self._vmax, float(self._live_display.max()))
+        self._render()
@@ -0,0 +1,65 @@
+import os
+import shutil
+from threading import Lock
+
+from psgui.manifest import Manifest
+
+# Captures of different runs may be ingested concurrently by the worker pool
+_manifest_lock = Lock()
+
+
+def find_csi_files(directory='.'):
+    """List .csi files waiting in directory"""
+    return sorted(f for f in os.listdir(directory) if f.endswith('.csi'))
+
+
+def get_target_dir(subfolder_name, data_dir='data'):
+    """Return data/<subfolder>, creating it if needed"""
+    subfolder_name = subfolder_name.strip() or "default"
+    target_dir = os.path.join(data_dir, subfolder_name)
+    os.makedirs(target_dir, exist_ok=True)
+    return target_dir
+
+
+def target_name(csi_file, target_dir, interface=None):
+    """Name a capture file gets in target_dir, never that of an existing file.
+
+    Files of one NIC in a parallel capture are prefixed nic<interface>_,
+    since every NIC's PicoScenes names its files the same way. A name
+    that is still taken gets a _1, _2, ... suffix.
+    """
+    if interface is not None:
+        csi_file = f"nic{interface}_{csi_file}"
+    stem, ext = os.path.splitext(csi_file)
+    name, suffix = csi_file, 0
+    while os.path.exists(os.path.join(target_dir, name)):
+        suffix += 1
+        name = f"{stem}_{suffix}{ext}"
+    return name
+
+
+def ingest_csi_files(csi_files, target_dir, labels, source_dir='.', progress=None):
+    """Move CSI files into target_dir and add them to its manifest.
+
+    Files are renamed with target_name, using the interface label, so no
+    file already in target_dir is overwritten. Returns the manifest
+    entries of the moved files. This step can't be cancelled: files left
+    behind in source_dir would be picked up by the next capture's
+    snapshot and recorded under that run's labels.
+    """
+    entries = []
+
+    with _manifest_lock, Manifest(target_dir) as manifest:
+        for csi_file in csi_files:
+            # Move file to target directory
+            name = target_name(csi_file, target_dir, labels.get("interface"))
+            shutil.move(os.path.join(source_dir, csi_file),
+                        os.path.join(target_dir, name))
+
+            # Each entry is committed right after its file is moved
+            entries.append(manifest.add(name, labels))
+            if progress:
+                renamed = f" as {name}" if name != csi_file else ""
+                progress(f"Moved {csi_file} to {target_dir}{renamed}")
+
+    return entries
@@ -0,0 +1,204 @@
+import numpy as np
+
+from psgui.chunks import CHUNK_FRAMES, iter_chunks
+
+# circular is the angle of the mean unit phasor, for phases wrapped to
+# [-pi, pi] whose arithmetic mean across the wrap would be meaningless
+REDUCTIONS = ("min", "max", "mean", "circular")
+
+# What each reduction keeps per bin, sums combine exactly across levels
+_STORED = {"min": "min", "max": "max", "mean": "sum", "circular": "phasor"}
+
+# Coarsest level kept, fewer bins than this are never worth drawing from
+MIN_LEVEL_FRAMES = 64
+
+# Most bins of the finest stored level, finer levels are reduced from the
+# source for the visible window only, so the pyramid's size doesn't grow
+# with the capture
+STORED_BINS = 16384
+
+
+def _bin(values, size, reduce):
+    """Reduce every size frames along the first axis, a short last bin included"""
+    if reduce == "phasor":
+        values = np.exp(1j * values).astype(np.complex64)
+        reduce = "sum"
+    full = len(values) // size * size
+    if reduce == "sum":
+        op = np.add.reduce
+    else:
+        op = np.minimum.reduce if reduce == "min" else np.maximum.reduce
+    binned = op(values[:full].reshape(-1, size, *values.shape[1:]), axis=1)
+    if full < len(values):
+        binned = np.concatenate([binned, op(values[full:], axis=0)[np.newaxis]])
+    return binned
+
+
+def _halve(values, reduce):
+    """Combine bins pairwise, an odd last bin stays alone"""
+    even = len(values) // 2 * 2
+    a, b = values[0:even:2], values[1:even:2]
+    if reduce in ("sum", "phasor"):
+        halved = a + b
+    else:
+        halved = np.minimum(a, b) if reduce == "min" else np.maximum(a, b)
+    if even < len(values):
+        halved = np.concatenate([halved, values[even:]])
+    return halved
+
+
+class FramePyramid:
+    """Min/max pyramid along the frame axis of a capture-sized array.
+
+    Level k bins 2**k frames. Level 0 is the source itself (an array or a
+    memmap) and is only read for the visible window. Levels of at most
+    stored_bins bins are built in one chunked pass and kept, finer ones
+    are reduced from the source for the requested window only. Only the
+    reductions asked for are kept; a mean is derived from per-bin sums
+    and a circular mean from per-bin sums of unit phasors.
+    transform maps raw source blocks to the displayed values, e.g. np.abs
+    on complex CSI.
+    """
+
+    def __init__(self, source, transform=None, chunk_frames=CHUNK_FRAMES,
+                 reductions=REDUCTIONS, stored_bins=STORED_BINS):
+        unknown = set(reductions) - set(REDUCTIONS)
+        if unknown:
+            raise ValueError(f"Unknown reductions {', '.join(sorted(unknown))}")
+        self.source = source
+        self.transform = transform
+        self.chunk_frames = chunk_frames
+        self.no_frames = len(source)
+        self.reductions = tuple(reductions)
+        self._stored = tuple(_STORED[name] for name in reductions)
+
+        # Levels above 0, down to MIN_LEVEL_FRAMES bins
+        self.no_levels = 0
+        while -(-self.no_frames // 2 ** self.no_levels) > MIN_LEVEL_FRAMES:
+            self.no_levels += 1
+
+        # Stored levels by level index
+        self.levels = {}
+        first = 1
+        while first < self.no_levels and -(-self.no_frames // 2 ** first) > stored_bins:
+            first += 1
+        if first > self.no_levels or not self._stored:
+            return
+        level = self._reduce(0, self.no_frames, 2 ** first)
+        self.levels[first] = level
+        for k in range(first + 1, self.no_levels + 1):
+            level = {name: _halve(values, name) for name, values in level.items()}
+            self.levels[k] = level
+
+    def _values(self, block):
+        values = block if self.transform is None else self.transform(block)
+        return np.asarray(values, dtype=np.float32)
+
+    def _reduce(self, start, stop, size, reductions=None):
+        """Bins of size frames over source frames start..stop, read chunk by chunk"""
+        reductions = reductions or self._stored
+        # Chunks of whole bins, so no bin straddles two of them
+        chunk_frames = -(-self.chunk_frames // size) * size
+        blocks = {name: [] for name in reductions}
+        for _, block in iter_chunks(self.source[start:stop], chunk_frames):
+            values = self._values(block)
+            for name in reductions:
+                blocks[name].append(_bin(values.astype(np.float64) if name == "sum"
+                                         else values, size, name))
+        return {name: np.concatenate(parts) for name, parts in blocks.items()}
+
+    def level_for(self, frames, pixels):
+        """Finest level that fits frames into at most pixels bins"""
+        level = 0
+        while level < self.no_levels and frames > pixels * 2 ** level:
+            level += 1
+        return level
+
+    def window(self, start, stop, pixels, reduce="max", level=None):
+        """Values of frames start..stop at the level for pixels columns.
+
+        Returns (values, first frame, end frame), the range widened to whole
+        bins. Only the bins of the window are read or copied.
+        """
+        start = int(min(max(start, 0), self.no_frames - 1))
+        stop = int(min(max(stop, start + 1), self.no_frames))
+        if level is None:
+            level = self.level_for(stop - start, max(int(pixels), 1))
+        if level == 0:
+            return self._values(self.source[start:stop]), start, stop
+        size = 2 ** level
+        first, last = start // size, -(-stop // size)
+        end = min(last * size, self.no_frames)
+        name = _STORED[reduce]
+        if level in self.levels and name in self.levels[level]:
+            values = self.levels[level][name][first:last]
+        else:
+            values = self._reduce(first * size, end, size, (name,))[name]
+        if reduce == "circular":
+            values = np.angle(values).astype(np.float32)
+        elif reduce == "mean":
+            counts = np.full(len(values), size, dtype=np.float64)
+            counts[-1] = end - (last - 1) * size
+            values = (values / counts.reshape(-1, *[1] * (values.ndim - 1))).astype(
+                np.float32)
+        return values, first * size, end
+
+
+class LODImage:
+    """Keeps a matplotlib image at the pyramid level matching its axes.
+
+    The image is redrawn from the pyramid whenever the x limits change
+    (zoom, pan, resize via limits). The window served is one view wider
+    on each side, so small pans reuse it without touching the pyramid.
+    select picks a 2D (frames, y) slice of the window values, transposed
+    for imshow like plot_view. x is frame_x0 + frame * frame_scale.
+    """
+
+    def __init__(self, axes, artist, pyramid, reduce="max", select=None,
+                 frame_x0=0.0, frame_scale=1.0):
+        self.axes = axes
+        self.artist = artist
+        self.pyramid = pyramid
+        self.reduce = reduce
+        self.select = select
+        self.frame_x0 = frame_x0
+        self.frame_scale = frame_scale or 1.0
+        self._y_extent = list(artist.get_extent()[2:])
+        self._served = None
+
+        # Limits come from the view from now on, not from the image extent
+        axes.set_autoscalex_on(False)
+        self._callback = axes.callbacks.connect('xlim_changed', self._on_xlim)
+        self.refresh()
+
+    def disconnect(self):
+        self.axes.callbacks.disconnect(self._callback)
+
+    def _on_xlim(self, axes):
+        if self.refresh():
+            axes.figure.canvas.draw_idle()
+
+    def refresh(self):
+        """Serve the level for the current limits, return True if the image changed"""
+        x0, x1 = sorted(self.axes.get_xlim())
+        start = (x0 - self.frame_x0) / self.frame_scale
+        stop = (x1 - self.frame_x0) / self.frame_scale + 1
+        pixels = max(self.axes.bbox.width, 1)
+        level = self.pyramid.level_for(stop - start, pixels)
+        if self._served is not None:
+            served_level, first, end = self._served
+            if served_level == level and first <= max(start, 0) and end >= min(
+                    stop, self.pyramid.no_frames):
+                return False
+
+        span = stop - start
+        values, first, end = self.pyramid.window(start - span, stop + span,
+                                                 pixels, self.reduce, level)
+        if self.select is not None:
+            values = self.select(values)
+        self.artist.set_data(values.T)
+        self.artist.set_extent([self.frame_x0 + first * self.frame_scale,
+                                self.frame_x0 + (end - 1) * self.frame_scale,
+                                *self._y_extent])
+        self._served = (level, first, end)
+        return True
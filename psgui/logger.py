@@ -1,43 +1,121 @@
 import io
 import sys
+import logging
+from collections import deque
+from logging.handlers import RotatingFileHandler
+from threading import Lock
+
+from PyQt6.QtCore import QTimer
+
+# Rotation of the optional log file
+LOG_FILE_MAX_BYTES = 5 * 1024 * 1024
+LOG_FILE_BACKUPS = 3
 
 
 class QTextEditLogger(io.TextIOBase):
-    """Custom stream class that redirects output to QTextEdit"""
+    """Thread-safe stream that redirects output to a QTextEdit in batches.
+
+    write() may be called from any thread, it only queues complete lines.
+    A timer in the UI thread appends everything queued since the last tick
+    in one call. The widget keeps at most max_lines lines, and lines
+    arriving faster than they can be shown are dropped from the front of
+    the queue. When log_file is given every line is also written there,
+    rotated at LOG_FILE_MAX_BYTES.
+    """
 
-    def __init__(self, text_widget):
+    def __init__(self, text_widget, max_lines=5000, log_file=None,
+                 flush_interval=100):
         super().__init__()
         self.text_widget = text_widget
+        self.text_widget.document().setMaximumBlockCount(max_lines)
         self.buffer = ""
+        self.pending = deque(maxlen=max_lines)
+        self.dropped = 0
+        self.lock = Lock()
+        self.original_stdout = None
+
+        self.file_logger = None
+        if log_file:
+            handler = RotatingFileHandler(log_file, maxBytes=LOG_FILE_MAX_BYTES,
+                                          backupCount=LOG_FILE_BACKUPS,
+                                          encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+            self.file_logger = logging.getLogger('psgui.log_file')
+            self.file_logger.propagate = False
+            self.file_logger.setLevel(logging.INFO)
+            self.file_logger.addHandler(handler)
+
+        # Parented to the widget so it fires in the UI thread
+        self.timer = QTimer(text_widget)
+        self.timer.timeout.connect(self.flush_to_widget)
+        self.timer.start(flush_interval)
+
+    def _queue(self, lines):
+        # Called with the lock held
+        overflow = len(self.pending) + len(lines) - self.pending.maxlen
+        if overflow > 0:
+            self.dropped += overflow
+        self.pending.extend(lines)
 
     def write(self, text):
-        # Buffer text until newline is encountered
-        self.buffer += text
-        if '\n' in self.buffer:
+        with self.lock:
+            # Buffer text until newline is encountered
+            self.buffer += text
+            if '\n' not in self.buffer:
+                return len(text)
             lines = self.buffer.split('\n')
             self.buffer = lines[-1]  # Keep last line (might be incomplete)
+            self._queue(lines[:-1])
 
-            # Add complete lines to text box
-            for i in range(len(lines)-1):
-                self.text_widget.append(lines[i])
-
-            # Scroll to bottom
-            scrollbar = self.text_widget.verticalScrollBar()
-            if scrollbar:
-                scrollbar.setValue(scrollbar.maximum())
-
+        if self.file_logger is not None:
+            for line in lines[:-1]:
+                self.file_logger.info(line)
         return len(text)
 
     def flush(self):
-        # Flush buffer if it contains content
-        if self.buffer:
-            self.text_widget.append(self.buffer)
-            self.buffer = ""
+        # Flush buffer if it contains content, the widget catches up on the next tick
+        with self.lock:
+            if not self.buffer:
+                return
+            line, self.buffer = self.buffer, ""
+            self._queue([line])
+        if self.file_logger is not None:
+            self.file_logger.info(line)
+
+    def flush_to_widget(self):
+        """Append all queued lines in one call, must run in the UI thread"""
+        with self.lock:
+            if not self.pending:
+                return
+            lines = list(self.pending)
+            self.pending.clear()
+            dropped, self.dropped = self.dropped, 0
+
+        if dropped:
+            lines.insert(0, f"... {dropped} lines dropped ...")
+        self.text_widget.append('\n'.join(lines))
+
+        # Scroll to bottom
+        scrollbar = self.text_widget.verticalScrollBar()
+        if scrollbar:
+            scrollbar.setValue(scrollbar.maximum())
+
+    def restore(self):
+        """Put back the original stdout and close the log file"""
+        if self.original_stdout is not None:
+            sys.stdout = self.original_stdout
+        self.timer.stop()
+        self.flush()
+        self.flush_to_widget()
+        if self.file_logger is not None:
+            for handler in self.file_logger.handlers[:]:
+                handler.close()
+                self.file_logger.removeHandler(handler)
 
 
-def setup_logger(text_widget):
-    """Set up log redirection, return original stdout"""
-    logger = QTextEditLogger(text_widget)
-    original_stdout = sys.stdout
+def setup_logger(text_widget, max_lines=5000, log_file=None):
+    """Set up log redirection, return the logger, restore() undoes it"""
+    logger = QTextEditLogger(text_widget, max_lines, log_file)
+    logger.original_stdout = sys.stdout
     sys.stdout = logger
-    return original_stdout
+    return logger
@@ -0,0 +1,128 @@
+import os
+import json
+import time
+import sqlite3
+
+MANIFEST_DB = 'manifest.db'
+LEGACY_MANIFEST = 'manifest.json'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS captures (
+    id INTEGER PRIMARY KEY,
+    data TEXT NOT NULL,
+    added REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS labels (
+    capture_id INTEGER NOT NULL REFERENCES captures(id) ON DELETE CASCADE,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (capture_id, key)
+);
+CREATE INDEX IF NOT EXISTS captures_data ON captures(data);
+CREATE INDEX IF NOT EXISTS labels_key_value ON labels(key, value, capture_id);
+"""
+
+
+class Manifest:
+    """SQLite manifest of the captures in one data/<subfolder> directory.
+
+    Every add is its own transaction, so a crash never loses or corrupts
+    entries already recorded. Labels are indexed by (key, value), so
+    queries don't scan the whole manifest. A legacy manifest.json is
+    imported the first time the directory is opened.
+    """
+
+    def __init__(self, target_dir):
+        self.target_dir = target_dir
+        self.path = os.path.join(target_dir, MANIFEST_DB)
+        self.conn = sqlite3.connect(self.path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        with self.conn:
+            self.conn.executescript(_SCHEMA)
+        self._migrate_json()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM captures").fetchone()[0]
+
+    def _migrate_json(self):
+        """Import manifest.json once, then keep it as manifest.json.migrated"""
+        json_path = os.path.join(self.target_dir, LEGACY_MANIFEST)
+        if not os.path.exists(json_path):
+            return
+        try:
+            with open(json_path, 'r') as f:
+                entries = json.load(f)
+        except json.JSONDecodeError:
+            print(f"Warning: {json_path} is not valid, skipping migration.")
+            return
+
+        with self.conn:
+            for entry in entries:
+                self._insert(entry["data"], entry.get("labels", {}))
+        os.replace(json_path, json_path + '.migrated')
+        print(f"Migrated {len(entries)} entries from {json_path} to {self.path}")
+
+    def _insert(self, data, labels):
+        cursor = self.conn.execute(
+            "INSERT INTO captures (data, added) VALUES (?, ?)", (data, time.time()))
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO labels (capture_id, key, value) VALUES (?, ?, ?)",
+            [(cursor.lastrowid, key, str(value)) for key, value in labels.items()])
+
+    def add(self, data, labels):
+        """Record one capture file with its labels, return the manifest entry"""
+        with self.conn:
+            self._insert(data, labels)
+        return {"data": data, "labels": labels}
+
+    def query(self, **labels):
+        """Return entries whose labels match all given key=value pairs.
+
+        query() returns every entry, query(activity='walking') only the
+        walking captures, in the order they were added.
+        """
+        sql = "SELECT id, data FROM captures"
+        params = []
+        for i, (key, value) in enumerate(labels.items()):
+            sql += (" WHERE" if i == 0 else " AND") + (
+                " id IN (SELECT capture_id FROM labels WHERE key = ? AND value = ?)")
+            params += [key, str(value)]
+        rows = self.conn.execute(sql + " ORDER BY id", params).fetchall()
+        return self._entries(rows)
+
+    def find(self, data):
+        """Return the entries recorded for a capture file name"""
+        rows = self.conn.execute(
+            "SELECT id, data FROM captures WHERE data = ? ORDER BY id", (data,)).fetchall()
+        return self._entries(rows)
+
+    def label_values(self, key):
+        """Distinct values of one label key with their capture counts"""
+        return self.conn.execute(
+            "SELECT value, COUNT(*) FROM labels WHERE key = ? GROUP BY value ORDER BY value",
+            (key,)).fetchall()
+
+    def _entries(self, rows):
+        if not rows:
+            return []
+        labels = {capture_id: {} for capture_id, _ in rows}
+        ids = list(labels)
+        # Stay well below SQLite's bound parameter limit
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            for capture_id, key, value in self.conn.execute(
+                    "SELECT capture_id, key, value FROM labels WHERE capture_id IN "
+                    f"({','.join('?' * len(chunk))})", chunk):
+                labels[capture_id][key] = value
+        return [{"data": data, "labels": labels[capture_id]} for capture_id, data in rows]
@@ -0,0 +1,115 @@
+import numpy as np
+
+from psgui.chunks import CHUNK_FRAMES, iter_chunks
+
+
+def estimate_calibration(csi, reference=(0, 0), chunk_frames=CHUNK_FRAMES):
+    """Per-antenna phase offsets from a reference capture, (subcarriers, rx, tx) radians.
+
+    The capture should be static, ideally over cables. Conjugate products
+    with the reference pair cancel STO/CFO, which every chain of one frame
+    shares, so their mean phase is what the chains add on their own. The
+    reference pair's offset is 0.
+    """
+    total = None
+    for _, block in iter_chunks(csi, chunk_frames):
+        ref = np.conj(block[:, :, reference[0], reference[1]])
+        product = (block * ref[:, :, np.newaxis, np.newaxis]).sum(axis=0)
+        total = product if total is None else total + product
+    if total is None:
+        raise ValueError("Can't calibrate from a capture without frames")
+    return np.angle(total).astype(np.float32)
+
+
+def load_calibration(path):
+    """Offsets saved from estimate_calibration, e.g. by `main.py calibrate`"""
+    offsets = np.load(path)
+    if offsets.ndim not in (2, 3):
+        raise ValueError(f"{path} holds no (rx, tx) or (subcarriers, rx, tx) offsets")
+    return offsets
+
+
+class PhaseSanitizer:
+    """Clean CSI phase of whole (frames, subcarriers, rx, tx) blocks at once.
+
+    In order: per-antenna calibration offsets are removed, the phase is
+    unwrapped across subcarriers, and a linear fit over subcarriers is
+    subtracted from every frame. The slope is the timing offset (STO) and
+    the constant the frequency offset (CFO) of that frame. With
+    per_antenna=False one fit over all chains is subtracted, which keeps
+    the phase differences between antennas (for angle of arrival); with
+    True each chain gets its own fit.
+
+    Frames are independent, so blocks of a live stream and chunks of a
+    capture give the same result as the whole capture.
+    """
+
+    def __init__(self, calibration=None, subcarriers=None, unwrap=True,
+                 detrend=True, per_antenna=False, dtype=np.float32):
+        # Unit phasors of the offsets, multiplying by them is cheaper than
+        # subtracting and rewrapping, broadcast as (subcarriers, rx, tx)
+        self.correction = None
+        if calibration is not None:
+            calibration = np.asarray(calibration)
+            if calibration.ndim == 2:
+                calibration = calibration[np.newaxis]
+            self.correction = np.exp(-1j * calibration).astype(np.complex64)
+        self.subcarriers = subcarriers
+        self.unwrap = unwrap
+        self.detrend = detrend
+        self.per_antenna = per_antenna
+        self.dtype = dtype
+        self._x = {}
+
+    def _centered_index(self, no_subcarriers):
+        """Subcarrier positions minus their mean and the fit's denominator, per size"""
+        if no_subcarriers not in self._x:
+            x = (np.arange(no_subcarriers) if self.subcarriers is None
+                 else np.asarray(self.subcarriers, dtype=np.float64))
+            if len(x) != no_subcarriers:
+                raise ValueError(f"{len(x)} subcarrier indices for "
+                                 f"{no_subcarriers} subcarriers")
+            x = (x - x.mean()).astype(self.dtype)
+            self._x[no_subcarriers] = x, max(float(np.dot(x, x)), 1e-12)
+        return self._x[no_subcarriers]
+
+    def __call__(self, csi):
+        """Sanitized phase of a (frames, subcarriers, rx, tx) block, in radians"""
+        if self.correction is not None:
+            if self.correction.shape[1:] != csi.shape[2:]:
+                raise ValueError(f"Calibration for {self.correction.shape[1:]} antennas, "
+                                 f"CSI has {csi.shape[2:]}")
+            # (rx, tx) offsets were given one subcarrier axis of length 1
+            if self.correction.shape[0] not in (1, csi.shape[1]):
+                raise ValueError(f"Calibration for {self.correction.shape[0]} subcarriers, "
+                                 f"CSI has {csi.shape[1]}")
+            csi = csi * self.correction
+        phase = np.angle(csi).astype(self.dtype, copy=False)
+        if self.unwrap:
+            phase = np.unwrap(phase, axis=1)
+        if not self.detrend:
+            return phase
+
+        x, denom = self._centered_index(csi.shape[1])
+        # Least squares slope and intercept of every frame and chain in
+        # one contraction over subcarriers
+        slope = np.einsum('s,fsab->fab', x, phase) / denom
+        offset = phase.mean(axis=1)
+        if not self.per_antenna:
+            slope = slope.mean(axis=(1, 2), keepdims=True)
+            offset = offset.mean(axis=(1, 2), keepdims=True)
+        phase -= slope[:, np.newaxis] * x[:, np.newaxis, np.newaxis]
+        phase -= offset[:, np.newaxis]
+        return phase
+
+    def apply(self, csi, chunk_frames=CHUNK_FRAMES):
+        """Sanitized phase of a whole capture, read chunk by chunk (memmaps welcome)"""
+        out = np.empty(csi.shape, dtype=self.dtype)
+        for start, block in iter_chunks(csi, chunk_frames):
+            out[start:start + len(block)] = self(block)
+        return out
+
+
+def sanitize_phase(csi, calibration=None, per_antenna=False):
+    """Sanitized phase of a capture with PhaseSanitizer's defaults"""
+    return PhaseSanitizer(calibration, per_antenna=per_antenna).apply(csi)
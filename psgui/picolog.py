@@ -0,0 +1,98 @@
+import re
+import time
+from collections import deque
+from threading import Lock
+
+# A received frame is printed with its RxSBasic segment in debug mode
+PACKET_PATTERN = re.compile(r'RxSBasic|ModularPicoScenesRxFrame')
+ERROR_PATTERN = re.compile(r'\b(error|fail(ed|ure)?|exception|abort(ed)?)\b', re.IGNORECASE)
+WARNING_PATTERN = re.compile(r'\bwarn(ing)?\b', re.IGNORECASE)
+
+
+class OutputParser:
+    """Classify PicoScenes output lines and keep receive counters.
+
+    Fed from the reader threads of both pipes, so every method is
+    thread-safe. Qt-free, CaptureScheduler turns its results into signals.
+    """
+
+    def __init__(self, rate_window=1.0):
+        self.rate_window = rate_window
+        self.lock = Lock()
+        self.started = time.monotonic()
+        self.packets = 0
+        self.errors = 0
+        self.warnings = 0
+        self.lines = 0
+        self.last_packet = None
+        self.last_error = None
+        self._packet_times = deque()
+
+    def feed(self, line, now=None):
+        """Account for one output line, return 'packet', 'error', 'warning' or 'info'"""
+        now = time.monotonic() if now is None else now
+        if PACKET_PATTERN.search(line):
+            kind = 'packet'
+        elif ERROR_PATTERN.search(line):
+            kind = 'error'
+        elif WARNING_PATTERN.search(line):
+            kind = 'warning'
+        else:
+            kind = 'info'
+
+        with self.lock:
+            self.lines += 1
+            if kind == 'packet':
+                self._count_packet(now)
+            elif kind == 'error':
+                self.errors += 1
+                self.last_error = line
+            elif kind == 'warning':
+                self.warnings += 1
+        return kind
+
+    def count_packet(self, now=None):
+        """Account for a packet known from elsewhere than an output line, e.g. a replay"""
+        with self.lock:
+            self._count_packet(time.monotonic() if now is None else now)
+
+    def _count_packet(self, now):
+        # Called with the lock held
+        self.packets += 1
+        self.last_packet = now
+        self._packet_times.append(now)
+        self._expire(now)
+
+    def _expire(self, now):
+        # Called with the lock held
+        while self._packet_times and self._packet_times[0] < now - self.rate_window:
+            self._packet_times.popleft()
+
+    def rate(self, now=None):
+        """Packets per second over the last rate_window seconds"""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            self._expire(now)
+            return len(self._packet_times) / self.rate_window
+
+    def idle_time(self, now=None):
+        """Seconds since the last packet, or since start if none arrived yet"""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            return now - (self.started if self.last_packet is None else self.last_packet)
+
+    def snapshot(self, now=None):
+        """Counters as a plain dict, for signals and logs"""
+        now = time.monotonic() if now is None else now
+        rate = self.rate(now)
+        idle = self.idle_time(now)
+        with self.lock:
+            return {
+                "packets": self.packets,
+                "errors": self.errors,
+                "warnings": self.warnings,
+                "lines": self.lines,
+                "rate": rate,
+                "idle": idle,
+                "last_error": self.last_error,
+            }
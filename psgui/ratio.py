@@ -0,0 +1,58 @@
+import numpy as np
+
+from psgui.chunks import CHUNK_FRAMES, iter_chunks
+
+
+def antenna_pairs(no_rx, no_tx):
+    """RX/TX pairs in the order the ratio engine flattens them"""
+    return [(rx, tx) for rx in range(no_rx) for tx in range(no_tx)]
+
+
+def frame_step(no_frames, max_frames=None):
+    """Stride along frames that keeps at most max_frames, for display"""
+    if not max_frames or no_frames <= max_frames:
+        return 1
+    return -(-no_frames // max_frames)
+
+
+def _flatten_pairs(csi, step):
+    no_frames, no_subcarriers, no_rx, no_tx = csi.shape
+    return np.asarray(csi[::step]).reshape(-1, no_subcarriers, no_rx * no_tx)
+
+
+def pair_ratio_phase(csi, step=1, dtype=np.float32):
+    """Phase of all pair ratios as (frames, subcarriers, pairs, pairs).
+
+    The phase grid is antisymmetric, so only pairs i < j are computed (as
+    conjugate products, which have the ratio's phase without a division)
+    and the lower triangle is filled by negation.
+    """
+    flat = _flatten_pairs(csi, step)
+    no_pairs = flat.shape[-1]
+    rows, cols = np.triu_indices(no_pairs, k=1)
+
+    phase = np.zeros((*flat.shape[:2], no_pairs, no_pairs), dtype=dtype)
+    upper = np.angle(flat[..., rows] * np.conj(flat[..., cols]))
+    phase[..., rows, cols] = upper
+    phase[..., cols, rows] = -upper
+    return phase
+
+
+def ratio_phase_grid(csi, max_frames=None, chunk_frames=CHUNK_FRAMES):
+    """Tile all pair ratio phases into a (pairs * subcarriers, pairs * frames) image.
+
+    Row blocks are the numerator pair and column blocks the denominator, as
+    in tools/ratio.py. Returns the image and the frames per block after
+    downsampling to at most max_frames frames per block. The capture is
+    read chunk_frames (kept) frames at a time, so a memmap larger than RAM
+    only costs the image.
+    """
+    no_frames, no_subcarriers, no_rx, no_tx = csi.shape
+    step = frame_step(no_frames, max_frames)
+    no_pairs = no_rx * no_tx
+    kept = -(-no_frames // step)
+    grid = np.empty((no_pairs, no_subcarriers, no_pairs, kept), dtype=np.float32)
+    for start, block in iter_chunks(csi, chunk_frames, step):
+        phase = pair_ratio_phase(block)
+        grid[..., start:start + len(block)] = phase.transpose(2, 1, 3, 0)
+    return grid.reshape(no_pairs * no_subcarriers, no_pairs * kept), kept
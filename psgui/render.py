@@ -0,0 +1,115 @@
+import numpy as np
+
+_luts = {}
+
+
+def max_pool(image, height, width):
+    """Max-pool a 2D image down to roughly height x width pixels.
+
+    Detail beyond the target size is never visible, but still costs time
+    to colormap and resample. Taking the maximum of each bin, rather than
+    every n-th value, keeps short peaks visible. The last bin along an axis
+    may be partial, so no rows or columns are dropped.
+    """
+    fy = max(image.shape[0] // max(int(height), 1), 1)
+    fx = max(image.shape[1] // max(int(width), 1), 1)
+    if fx == 1 and fy == 1:
+        return image
+    # Strided elementwise maxima are much faster than reducing over
+    # short axes of a reshaped view
+    pooled = image[0::fy, 0::fx].copy()
+    for i in range(fy):
+        for j in range(fx):
+            if i or j:
+                part = image[i::fy, j::fx]
+                # Shorter by one where the last bin is partial
+                target = pooled[:part.shape[0], :part.shape[1]]
+                np.maximum(target, part, out=target)
+    return pooled
+
+
+def colormap_lut(name='viridis'):
+    """Return a 256-entry uint32 ARGB lookup table for a matplotlib colormap"""
+    if name not in _luts:
+        # Only the colormap registry is needed, not the figure machinery
+        from matplotlib import colormaps
+
+        rgba = (colormaps[name](np.linspace(0, 1, 256)) * 255).astype(np.uint32)
+        _luts[name] = ((rgba[:, 3] << 24) | (rgba[:, 0] << 16)
+                       | (rgba[:, 1] << 8) | rgba[:, 2])
+    return _luts[name]
+
+
+def to_argb(image, lut, vmin, vmax):
+    """Map a 2D float image to uint32 ARGB pixels through a LUT, row 0 at the bottom"""
+    scale = 255.0 / (vmax - vmin) if vmax > vmin else 0.0
+    indices = np.empty(image.shape, dtype=np.float32)
+    np.subtract(image, vmin, out=indices)
+    np.multiply(indices, scale, out=indices)
+    np.clip(indices, 0, 255, out=indices)
+    # Flip rows so low subcarriers end up at the bottom of the widget
+    return lut.take(indices[::-1].astype(np.uint8))
+
+
+def plot_view(fig, axes, image, timestamps=None, max_columns=None):
+    """Draw a ViewImage on matplotlib axes, return the colorbar.
+
+    With max_columns, images wider than that are drawn from their frame
+    pyramid instead of handing every frame to imshow.
+    """
+    from matplotlib.ticker import FuncFormatter
+
+    data = image.data
+    if max_columns and len(data) > max_columns:
+        data, _, _ = image.pyramid().window(0, len(data), max_columns, image.reduce)
+    im = axes.imshow(data.T,  # Transpose for correct orientation
+                     aspect='auto',
+                     origin='lower',
+                     cmap=image.cmap,
+                     vmin=image.vmin,
+                     vmax=image.vmax,
+                     interpolation='none',
+                     extent=image.extent)
+
+    axes.set_xlabel(image.xlabel if timestamps is None else 'Time (ms)')
+    axes.set_ylabel(image.ylabel)
+    axes.set_title(image.title)
+
+    # If timestamps are available, set custom x-ticks at regular intervals
+    if timestamps is not None and len(timestamps) > 1:
+        # Convert timestamps to milliseconds relative to first frame
+        rel_timestamps_ms = [(ts - timestamps[0])/1000 for ts in timestamps]
+        # Set 5 tick marks along the x-axis
+        tick_indices = np.linspace(0, len(timestamps)-1, 5).astype(int)
+        axes.set_xticks(tick_indices)
+        axes.set_xticklabels([f"{rel_timestamps_ms[idx]:.1f}" for idx in tick_indices])
+
+    # Divider lines and labels for tiled antenna grids
+    if image.tiles is not None:
+        block_width, block_height, labels = image.tiles
+        axes.xaxis.set_major_formatter(
+            FuncFormatter(lambda v, pos: int(v % block_width)))
+        axes.yaxis.set_major_formatter(
+            FuncFormatter(lambda v, pos: int(v % block_height)))
+        for x0 in sorted({x0 for x0, _, _ in labels} - {0}):
+            axes.axvline(x0, color='white', linewidth=1, linestyle='--')
+        for y0 in sorted({y0 for _, y0, _ in labels} - {0}):
+            axes.axhline(y0, color='white', linewidth=1, linestyle='--')
+        for x0, y0, label in labels:
+            axes.text(x0 + block_width / 2, y0 + block_height / 2, label,
+                      color='white', ha='center', va='center', weight='bold')
+
+    return fig.colorbar(im, ax=axes, label=image.cbar_label)
+
+
+def export_image(image, path):
+    """Save a ViewImage as an export-quality matplotlib figure"""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=(8, 5), dpi=150)
+    FigureCanvasAgg(fig)
+    axes = fig.add_subplot(111)
+    plot_view(fig, axes, image, max_columns=fig.get_figwidth() * fig.dpi)
+    fig.tight_layout()
+    fig.savefig(path)
@@ -0,0 +1,144 @@
+import os
+import time
+from threading import Event
+
+from psgui.decoder import PicoScenesDecoder, frame_timestamp
+from psgui.picolog import OutputParser
+
+# Recorded gaps longer than this (or negative, across files) are replaced
+# by the previous gap, so a replay never idles into a stall
+MAX_GAP = 1.0
+
+# Frames written between flushes when replaying as fast as possible
+FLUSH_FRAMES = 64
+
+
+def find_replay_files(path):
+    """The .csi files to replay from a file or a data directory, in name order.
+
+    Directories are walked recursively, skipping the sidecar folders.
+    """
+    if os.path.isfile(path):
+        return [path]
+    files = []
+    for directory, dirs, names in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+        files += [os.path.join(directory, name) for name in sorted(names)
+                  if name.endswith('.csi')]
+    return files
+
+
+class ReplaySource:
+    """Recorded captures replayed in place of a live PicoScenes receiver.
+
+    speed scales the recorded frame timing, 10 plays ten times faster and
+    0 as fast as the disk allows. With loop the files start over until
+    the capture duration has elapsed.
+    """
+
+    def __init__(self, path, speed=1.0, loop=True):
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self.files = find_replay_files(path)
+        if not self.files:
+            raise ValueError(f"No .csi files to replay in {path}")
+
+    def __repr__(self):
+        rate = f"{self.speed:g}x" if self.speed else "max rate"
+        return f"replay of {len(self.files)} files from {self.path} at {rate}"
+
+    def iter_frames(self):
+        """Yield (frame bytes, timestamp) over all files, looping if enabled"""
+        while True:
+            count = 0
+            for path in self.files:
+                for frame_bytes in PicoScenesDecoder(path).iter_raw_frames():
+                    count += 1
+                    yield frame_bytes, frame_timestamp(frame_bytes)
+            if not self.loop or not count:
+                return
+
+
+def replay_path(cwd=None):
+    """Name of the .csi file a replay writes, like PicoScenes' rx_*.csi"""
+    now = time.time()
+    name = time.strftime("rx_replay_%Y%m%d_%H%M%S", time.localtime(now))
+    return os.path.join(cwd or '.', f"{name}_{int(now * 1000) % 1000:03d}.csi")
+
+
+def run_replay(source, duration, cwd=None, stop_event=None, start_barrier=None,
+               stall_timeout=2.0, stats_interval=0.5, on_stats=None,
+               on_event=None, on_stalled=None, output=print, on_frame=None):
+    """Write the frames of a ReplaySource to cwd like a receiver, return its final stats.
+
+    Same callbacks and stats as capture.run_capture, so anything that
+    watches a live capture (log panel, live view, processing) runs
+    unchanged. on_frame gets the monotonic time each frame was written,
+    for latency measurements.
+    """
+    stop_event = stop_event or Event()
+    if start_barrier is not None:
+        start_barrier.wait(timeout=30)
+    parser = OutputParser()
+    path = replay_path(cwd)
+    tag = f" {cwd}" if cwd not in (None, '.') else ""
+    if output is not None:
+        output(f"[Replay{tag}] {source} to {path}")
+
+    start = time.monotonic()
+    deadline = start + duration
+    next_stats = start + stats_interval
+    stalled = False
+
+    def report(now):
+        nonlocal next_stats, stalled
+        next_stats = now + stats_interval
+        stats = parser.snapshot(now)
+        if on_stats is not None:
+            on_stats(stats)
+        if stats["idle"] >= stall_timeout and not stalled and on_stalled is not None:
+            on_stalled(stats["idle"])
+        stalled = stats["idle"] >= stall_timeout
+
+    def wait_until(target):
+        """Sleep until target, reporting stats on the way, False once stopped"""
+        while True:
+            now = time.monotonic()
+            if now >= next_stats:
+                report(now)
+            if now >= target:
+                return not stop_event.is_set()
+            if stop_event.wait(min(target, next_stats) - now):
+                return False
+
+    due = start
+    previous_ts = None
+    gap = 0.0
+    unflushed = 0
+    with open(path, 'wb') as f:
+        for frame_bytes, timestamp in source.iter_frames():
+            if source.speed and previous_ts is not None and timestamp is not None:
+                delta = timestamp - previous_ts
+                gap = delta if 0 <= delta <= MAX_GAP else gap
+                due += gap / source.speed
+            previous_ts = timestamp if timestamp is not None else previous_ts
+
+            # Hand the frames written so far to readers before waiting
+            if unflushed and (due > time.monotonic() or unflushed >= FLUSH_FRAMES):
+                f.flush()
+                unflushed = 0
+            if not wait_until(min(due, deadline)) or time.monotonic() >= deadline:
+                break
+
+            f.write(frame_bytes)
+            unflushed += 1
+            parser.count_packet()
+            if on_frame is not None:
+                on_frame(time.monotonic())
+
+    stats = parser.snapshot()
+    if output is not None:
+        output(f"[Replay{tag}] {stats['packets']} frames in "
+               f"{time.monotonic() - start:.1f} s")
+    return stats
@@ -0,0 +1,170 @@
+import os
+import json
+import time
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from psgui.cache import load_csi
+from psgui.chunks import iter_chunks
+from psgui.manifest import LEGACY_MANIFEST, MANIFEST_DB, Manifest
+from psgui.phase import PhaseSanitizer
+
+# Derived arrays live next to the sidecar cache, e.g.
+# data/<subfolder>/.features/<name>.csi.amplitude.npy
+FEATURES_DIR = ".features"
+
+# Bump when the feature computation changes, so every file is redone
+FEATURE_VERSION = 1
+
+# Feature name -> function of the complex (frames, subcarriers, rx, tx) matrix
+FEATURES = {
+    "amplitude": lambda csi: np.abs(csi).astype(np.float32),
+    "phase": lambda csi: np.angle(csi).astype(np.float32),
+    "phase_clean": lambda csi: PhaseSanitizer()(csi),
+}
+
+HASH_BLOCK = 1 << 20
+
+
+def content_hash(path):
+    """BLAKE2b of a file's contents, read in 1 MiB blocks"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def feature_paths(csi_path, features):
+    """Return ({feature: .npy path}, metadata path) for a .csi file"""
+    directory, name = os.path.split(os.path.abspath(csi_path))
+    base = os.path.join(directory, FEATURES_DIR, name)
+    return {feature: f"{base}.{feature}.npy" for feature in features}, base + ".json"
+
+
+def find_data_entries(data_dir="data", subfolder=None, **labels):
+    """List (.csi path, labels) of the captures in the manifests under data_dir.
+
+    Every directory holding a manifest counts, so nested subfolders are
+    found too. Only entries matching all labels are listed, and entries
+    whose file is gone are skipped.
+    """
+    entries = []
+    top = os.path.join(data_dir, subfolder) if subfolder else data_dir
+    for directory, dirs, names in os.walk(top):
+        # Don't descend into the sidecar folders
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        if MANIFEST_DB not in names and LEGACY_MANIFEST not in names:
+            continue
+        with Manifest(directory) as manifest:
+            seen = set()
+            for entry in manifest.query(**labels):
+                path = os.path.join(directory, entry["data"])
+                if entry["data"] not in seen and os.path.exists(path):
+                    seen.add(entry["data"])
+                    entries.append((path, entry["labels"]))
+    return entries
+
+
+def find_data_files(data_dir="data", subfolder=None):
+    """List the .csi files recorded in the manifests under data_dir"""
+    return [path for path, _ in find_data_entries(data_dir, subfolder)]
+
+
+def _is_current(csi_path, meta_path, paths, params):
+    """True if the features on disk were derived from this exact file content"""
+    try:
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return False, None
+    if meta.get("params") != params or not all(os.path.exists(p) for p in paths.values()):
+        return False, None
+
+    stat = os.stat(csi_path)
+    if meta.get("size") == stat.st_size and meta.get("mtime_ns") == stat.st_mtime_ns:
+        return True, meta
+    # Touched or copied: only the hash can tell whether it changed
+    digest = content_hash(csi_path)
+    if digest != meta.get("hash"):
+        return False, digest
+    meta["mtime_ns"] = stat.st_mtime_ns
+    with open(meta_path, "w") as f:
+        json.dump(meta, f, indent=2)
+    return True, meta
+
+
+def reprocess_file(csi_path, features=tuple(FEATURES), force=False):
+    """Rebuild the cache and feature arrays of one capture unless unchanged.
+
+    Returns a result dict with the path, status ('skipped', 'processed' or
+    'failed'), frames and seconds spent. Runs in a worker process.
+    """
+    start = time.perf_counter()
+    paths, meta_path = feature_paths(csi_path, features)
+    params = {"version": FEATURE_VERSION, "features": sorted(features)}
+    result = {"path": csi_path, "status": "skipped", "frames": None}
+    try:
+        digest = None
+        if not force:
+            current, info = _is_current(csi_path, meta_path, paths, params)
+            if current:
+                result["frames"] = info.get("frames")
+                result["seconds"] = time.perf_counter() - start
+                return result
+            digest = info
+
+        stat = os.stat(csi_path)
+        digest = digest or content_hash(csi_path)
+        csi, _ = load_csi(csi_path, rebuild=force)
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        outputs = {}
+        for feature, path in paths.items():
+            # Write next to the target and rename, readers never see half a file
+            outputs[feature] = np.lib.format.open_memmap(
+                path + ".tmp.npy", mode="w+", dtype=np.float32, shape=csi.shape)
+        # One pass over the cache in chunks, captures may be larger than RAM
+        for first, block in iter_chunks(csi):
+            for feature, out in outputs.items():
+                out[first:first + len(block)] = FEATURES[feature](block)
+        for feature in list(outputs):
+            # Drop the map before the rename, Windows can't replace a mapped file
+            outputs.pop(feature).flush()
+            os.replace(paths[feature] + ".tmp.npy", paths[feature])
+
+        meta = {"hash": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                "frames": int(csi.shape[0]), "shape": list(csi.shape), "params": params}
+        with open(meta_path + ".tmp", "w") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(meta_path + ".tmp", meta_path)
+        result.update(status="processed", frames=meta["frames"])
+    except Exception as e:
+        result.update(status="failed", error=str(e))
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def reprocess(data_dir="data", subfolder=None, features=tuple(FEATURES),
+              force=False, workers=None, progress=None):
+    """Reprocess every capture under data_dir on a process pool.
+
+    Files are independent, so throughput scales with workers (default: one
+    per core) until the disk saturates. progress is called with each
+    result dict as it completes. Returns all results.
+    """
+    unknown = set(features) - set(FEATURES)
+    if unknown:
+        raise ValueError(f"Unknown features: {', '.join(sorted(unknown))}")
+    files = find_data_files(data_dir, subfolder)
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(reprocess_file, path, tuple(features), force)
+                   for path in files]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if progress:
+                progress(result)
+    return results
@@ -0,0 +1,135 @@
+import numpy as np
+
+
+class FrameRingBuffer:
+    """Fixed-size NumPy ring buffer keeping the last capacity frames"""
+
+    def __init__(self, capacity, frame_shape, dtype=np.float32):
+        self.capacity = capacity
+        self.frame_shape = tuple(frame_shape)
+        self.data = np.zeros((capacity, *self.frame_shape), dtype=dtype)
+        self.head = 0  # index the next frame is written to
+        self.count = 0
+        self.total = 0  # frames ever written, for frame numbering
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
+        self.total = 0
+
+    def extend(self, frames):
+        """Append a (n, *frame_shape) block, overwriting the oldest frames"""
+        n = len(frames)
+        if n == 0:
+            return
+        self.total += n
+        if n >= self.capacity:
+            self.data[:] = frames[-self.capacity:]
+            self.head = 0
+            self.count = self.capacity
+            return
+
+        # At most two slice copies, before and after the wrap point
+        first = min(n, self.capacity - self.head)
+        self.data[self.head:self.head + first] = frames[:first]
+        if first < n:
+            self.data[:n - first] = frames[first:]
+        self.head = (self.head + n) % self.capacity
+        self.count = min(self.count + n, self.capacity)
+
+    def ordered(self, out=None):
+        """Copy the buffer oldest to newest into out (shape of data), return it"""
+        if out is None:
+            out = np.zeros_like(self.data)
+        if self.count < self.capacity:
+            # Unwritten slots go to the front so the newest frame is always last
+            empty = self.capacity - self.count
+            out[:empty] = 0
+            out[empty:] = self.data[:self.count]
+        else:
+            split = self.capacity - self.head
+            out[:split] = self.data[self.head:]
+            out[split:] = self.data[:self.head]
+        return out
+
+
+class PooledRingBuffer:
+    """Last capacity frames, plus a copy max-pooled down to a display size.
+
+    Frames are pooled as they arrive, pool_frames frames to a column and
+    pool_rows values to a row, so a refresh copies one display-sized block
+    instead of pooling the whole window again. The full-resolution frames
+    are kept to re-pool from when the display size changes.
+    """
+
+    def __init__(self, capacity, frame_shape, dtype=np.float32):
+        self.frames = FrameRingBuffer(capacity, frame_shape, dtype)
+        self.pool_frames = 0
+        self.pool_rows = 0
+        self.columns = None
+        self._pending = None  # frames of the column still being filled
+        self._no_pending = 0
+        self._display = None
+
+    @property
+    def frame_shape(self):
+        return self.frames.frame_shape
+
+    def __len__(self):
+        return len(self.frames)
+
+    def extend(self, frames):
+        """Append a (n, rows) block and pool it into the display columns"""
+        self.frames.extend(frames)
+        if self.columns is not None:
+            self._pool(frames)
+
+    def fit(self, height, width):
+        """Pool to at most height x width, re-pooling the window if that changed"""
+        capacity = self.frames.capacity
+        no_rows = self.frame_shape[0]
+        pool_frames = -(-capacity // max(int(width), 1))
+        pool_rows = -(-no_rows // max(int(height), 1))
+        if (pool_frames, pool_rows) == (self.pool_frames, self.pool_rows):
+            return
+        self.pool_frames = pool_frames
+        self.pool_rows = pool_rows
+        rows = -(-no_rows // pool_rows)
+        self.columns = FrameRingBuffer(-(-capacity // pool_frames), (rows,),
+                                       self.frames.data.dtype)
+        self._pending = np.zeros((pool_frames, no_rows), self.frames.data.dtype)
+        self._no_pending = 0
+        self._display = np.zeros_like(self.columns.data)
+        self._pool(self.frames.ordered()[capacity - len(self.frames):])
+
+    def _pool(self, frames):
+        """Pool whole columns of frames, keep the remainder pending"""
+        if self._no_pending:
+            take = min(self.pool_frames - self._no_pending, len(frames))
+            self._pending[self._no_pending:self._no_pending + take] = frames[:take]
+            self._no_pending += take
+            frames = frames[take:]
+            if self._no_pending < self.pool_frames:
+                return
+            self._add_columns(self._pending)
+            self._no_pending = 0
+        whole = len(frames) - len(frames) % self.pool_frames
+        if whole:
+            self._add_columns(frames[:whole])
+        self._no_pending = len(frames) - whole
+        self._pending[:self._no_pending] = frames[whole:]
+
+    def _add_columns(self, frames):
+        columns = frames.reshape(-1, self.pool_frames, frames.shape[1]).max(axis=1)
+        if self.pool_rows > 1:
+            # reduceat pools the last, partial row bin instead of dropping it
+            columns = np.maximum.reduceat(
+                columns, np.arange(0, columns.shape[1], self.pool_rows), axis=1)
+        self.columns.extend(columns)
+
+    def display(self):
+        """Pooled window as a (rows, columns) image, oldest column first"""
+        return self.columns.ordered(self._display).T
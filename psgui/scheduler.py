@@ -0,0 +1,68 @@
+from PyQt6.QtCore import pyqtSignal, QObject
+
+from psgui.capture import ParallelCapture
+
+
+class CaptureSchedulerSignals(QObject):
+    # All receivers have exited
+    finished = pyqtSignal()
+    error = pyqtSignal(str, str)
+    # {"packets", "rate", "errors", "idle", "devices": {interface: snapshot}}
+    stats = pyqtSignal(object)
+    # (kind, line) for 'error' and 'warning' lines, prefixed with the interface
+    event = pyqtSignal(str, str)
+    stalled = pyqtSignal(str, float)
+
+
+class CaptureScheduler(QObject):
+    """Qt front end of a capture.ParallelCapture, reporting through signals.
+
+    One supervised PicoScenes receiver (or replay) per interface, started
+    together in their own device directories. With no interfaces the
+    option is run as given in base_dir. finished is only emitted if at
+    least one receiver didn't fail.
+    """
+
+    def __init__(self, option, duration, interfaces=(), base_dir='.',
+                 stall_timeout=2.0, replay=None):
+        super().__init__()
+        self.signals = CaptureSchedulerSignals()
+        # Signals emitted on the receiver threads are queued to the UI thread
+        self.capture = ParallelCapture(
+            option, duration, interfaces, base_dir, stall_timeout, replay=replay,
+            on_stats=self.signals.stats.emit,
+            on_event=lambda interface, kind, line: self.signals.event.emit(
+                kind, line if interface is None else f"[nic{interface}] {line}"),
+            on_stalled=lambda interface, idle: self.signals.stalled.emit(
+                str(interface or ''), idle),
+            on_error=lambda interface, error_msg: self.signals.error.emit(
+                str(interface or ''), error_msg),
+            on_finished=self._on_finished)
+
+    @property
+    def directories(self):
+        """{interface: output directory}, interface None for the plain command"""
+        return self.capture.directories
+
+    @property
+    def stall_timeout(self):
+        return self.capture.stall_timeout
+
+    def start(self):
+        self.capture.start()
+
+    def stop(self):
+        """End all receivers before the duration has elapsed"""
+        self.capture.stop()
+
+    def is_running(self):
+        return self.capture.is_running()
+
+    def all_failed(self):
+        """True once every receiver has failed, finished is then never emitted"""
+        return self.capture.all_failed()
+
+    def _on_finished(self):
+        # Only report success if at least one receiver captured something
+        if not self.capture.all_failed():
+            self.signals.finished.emit()
@@ -0,0 +1,242 @@
+import json
+import time
+from PyQt6.QtCore import pyqtSignal, QObject, QThreadPool, QTimer
+
+from psgui.scheduler import CaptureScheduler
+from psgui.tasks import create_processing_task
+
+
+class RunSpec:
+    """One capture of a session plan"""
+
+    def __init__(self, index, labels, duration, gap=0.0, repetition=0):
+        self.index = index
+        self.labels = labels
+        self.duration = duration
+        self.gap = gap
+        self.repetition = repetition
+        # Filled in while the session runs, see CollectionSession._record
+        self.timings = {}
+        self.status = "pending"
+
+
+def expand_plan(plan, duration=5, labels=None):
+    """Turn a plan into the list of RunSpecs to capture, in order.
+
+    A plan looks like:
+
+        {"duration": 5, "gap": 1, "repetitions": 1, "labels": {"room": "lab"},
+         "runs": [{"labels": {"activity": "walking"}, "repetitions": 20},
+                  {"labels": {"activity": "sitting"}, "duration": 10}]}
+
+    Top-level values are defaults for every run, duration and labels
+    default to the given arguments. Run labels are merged over the
+    top-level ones.
+    """
+    base_labels = dict(labels or {})
+    base_labels.update(plan.get("labels", {}))
+    runs = []
+    for entry in plan.get("runs", []):
+        run_labels = dict(base_labels)
+        run_labels.update(entry.get("labels", {}))
+        for repetition in range(int(entry.get("repetitions", plan.get("repetitions", 1)))):
+            runs.append(RunSpec(len(runs), run_labels,
+                                float(entry.get("duration", plan.get("duration", duration))),
+                                float(entry.get("gap", plan.get("gap", 0))),
+                                repetition))
+    return runs
+
+
+def load_plan(path, duration=5, labels=None):
+    """Read a JSON plan file, see expand_plan"""
+    with open(path, 'r') as f:
+        return expand_plan(json.load(f), duration, labels)
+
+
+class CollectionSessionSignals(QObject):
+    # (RunSpec, CaptureScheduler) before the scheduler is started
+    run_started = pyqtSignal(object, object)
+    run_captured = pyqtSignal(object)
+    # (RunSpec, ProcessingTask) before the task is queued
+    task_started = pyqtSignal(object, object)
+    run_processed = pyqtSignal(object)
+    # Summary dict once every capture and its processing are done
+    finished = pyqtSignal(object)
+
+
+class CollectionSession(QObject):
+    """Capture a list of RunSpecs back to back without user interaction.
+
+    Run N is processed on the thread pool while run N + 1 is captured, its
+    files being snapshotted when its capture ends. Timings of every run are
+    appended to log_path as JSON lines.
+
+    scheduler_factory and task_factory take the arguments of
+    CaptureScheduler and create_processing_task, to swap in other capture
+    or processing backends.
+    """
+
+    def __init__(self, runs, command, target_dir, interfaces=(), stall_timeout=2.0,
+                 view=("amplitude", (0, 0)), log_path=None, thread_pool=None,
+                 replay=None, scheduler_factory=CaptureScheduler,
+                 task_factory=create_processing_task):
+        super().__init__()
+        self.runs = runs
+        self.command = command
+        self.target_dir = target_dir
+        self.interfaces = interfaces
+        self.stall_timeout = stall_timeout
+        # ReplaySource captured from instead of PicoScenes, if any
+        self.replay = replay
+        self.view = view
+        self.log_path = log_path
+        self.thread_pool = thread_pool or QThreadPool.globalInstance()
+        self.scheduler_factory = scheduler_factory
+        self.task_factory = task_factory
+        self.signals = CollectionSessionSignals()
+
+        self.scheduler = None
+        self._next = 0
+        self._tasks = {}
+        self._stopped = False
+        self._started = None
+
+    @property
+    def current_run(self):
+        return self.runs[self._next - 1] if self.scheduler is not None else None
+
+    def start(self):
+        self._started = time.time()
+        self._start_next()
+
+    def stop(self):
+        """Stop the running capture and skip the remaining runs, queued processing completes"""
+        self._stopped = True
+        if self.scheduler is not None:
+            self.scheduler.stop()
+        self._check_finished()
+
+    def is_running(self):
+        return self.scheduler is not None or bool(self._tasks) or (
+            not self._stopped and self._next < len(self.runs))
+
+    def _start_next(self):
+        if self._stopped or self._next >= len(self.runs):
+            self._check_finished()
+            return
+        run = self.runs[self._next]
+        self._next += 1
+
+        self.scheduler = self.scheduler_factory(self.command, run.duration, self.interfaces,
+                                                stall_timeout=self.stall_timeout,
+                                                replay=self.replay)
+        self.scheduler.signals.finished.connect(lambda run=run: self._on_captured(run))
+        self.scheduler.signals.error.connect(
+            lambda interface, error_msg, run=run: self._on_capture_error(run, error_msg))
+        self.scheduler.signals.stats.connect(
+            lambda stats, run=run: run.timings.update(packets=stats["packets"]))
+        run.status = "capturing"
+        run.timings["capture_start"] = time.time()
+        self.signals.run_started.emit(run, self.scheduler)
+        self.scheduler.start()
+
+    def _on_captured(self, run):
+        run.timings["capture_end"] = time.time()
+        directories = self.scheduler.directories
+        self.scheduler = None
+        self.signals.run_captured.emit(run)
+
+        # Snapshot and queue this run's files before the next capture starts
+        tasks = []
+        for interface, directory in directories.items():
+            labels = dict(run.labels)
+            if interface is not None:
+                labels["interface"] = interface
+            task = self.task_factory(directory, self.target_dir, labels, view=self.view)
+            if task is not None:
+                tasks.append(task)
+
+        run.status = "processing" if tasks else "empty"
+        run.timings["processing_start"] = time.time()
+        self._tasks[run.index] = set(tasks)
+        for task in tasks:
+            task.signals.finished.connect(
+                lambda result, run=run, task=task: self._on_processed(run, task, result))
+            task.signals.cancelled.connect(
+                lambda run=run, task=task: self._on_processed(run, task, None, "cancelled"))
+            task.signals.error.connect(
+                lambda error_msg, run=run, task=task: self._on_processed(run, task, None, error_msg))
+            self.signals.task_started.emit(run, task)
+            self.thread_pool.start(task)
+        if not tasks:
+            self._on_processed(run, None, None)
+
+        QTimer.singleShot(int(run.gap * 1000), self._start_next)
+
+    def _on_capture_error(self, run, error_msg):
+        run.timings["error"] = error_msg
+        if self.scheduler is not None and self.scheduler.all_failed():
+            # No receiver captured anything, move on to the next run
+            self.scheduler = None
+            run.status = "failed"
+            run.timings["capture_end"] = time.time()
+            self._record(run)
+            self.signals.run_captured.emit(run)
+            QTimer.singleShot(int(run.gap * 1000), self._start_next)
+
+    def _on_processed(self, run, task, result, error=None):
+        pending = self._tasks.get(run.index, set())
+        pending.discard(task)
+        if error is not None:
+            run.timings["error"] = error
+            # Sticky, a later task finishing fine doesn't make the run done
+            if run.status == "processing":
+                run.status = "failed"
+        if result is not None:
+            run.timings["files"] = run.timings.get("files", 0) + len(result.entries)
+        if pending:
+            return
+        del self._tasks[run.index]
+        run.timings["processing_end"] = time.time()
+        if run.status == "processing":
+            run.status = "done"
+        self._record(run)
+        self.signals.run_processed.emit(run)
+        self._check_finished()
+
+    def _record(self, run):
+        if not self.log_path:
+            return
+        record = {"run": run.index, "repetition": run.repetition,
+                  "labels": run.labels, "duration": run.duration,
+                  "status": run.status, **run.timings}
+        for start, end, key in (("capture_start", "capture_end", "capture_s"),
+                                ("processing_start", "processing_end", "processing_s")):
+            if start in run.timings and end in run.timings:
+                record[key] = round(run.timings[end] - run.timings[start], 3)
+        with open(self.log_path, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+
+    def summary(self):
+        done = [run for run in self.runs if run.status == "done"]
+        captures = [run.timings["capture_end"] - run.timings["capture_start"]
+                    for run in done]
+        processing = [run.timings["processing_end"] - run.timings["processing_start"]
+                      for run in done]
+        return {
+            "runs": len(self.runs),
+            "done": len(done),
+            "failed": sum(run.status == "failed" for run in self.runs),
+            "empty": sum(run.status == "empty" for run in self.runs),
+            "skipped": sum(run.status == "pending" for run in self.runs),
+            "elapsed_s": round(time.time() - self._started, 3),
+            "mean_capture_s": round(sum(captures) / len(captures), 3) if captures else None,
+            "mean_processing_s": round(sum(processing) / len(processing), 3) if processing else None,
+            "log": self.log_path,
+        }
+
+    def _check_finished(self):
+        if not self.is_running() and self._started is not None:
+            summary = self.summary()
+            self._started = None
+            self.signals.finished.emit(summary)
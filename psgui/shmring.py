@@ -0,0 +1,225 @@
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+# Header of uint64 fields at the start of the block
+MAGIC = 0x50534752494E4731  # "PSGRING1"
+HEADER_FIELDS = 16
+_MAGIC, _CAPACITY, _WRITE_SEQ, _DTYPE, _NDIM, _DIMS = 0, 1, 2, 3, 4, 5
+MAX_DIMS = 4
+
+# Arrays in the block start on cache line boundaries
+ALIGN = 64
+
+
+def _aligned(offset):
+    return -(-offset // ALIGN) * ALIGN
+
+
+def _layout(capacity, frame_shape, dtype):
+    """Byte offsets of (slot sequences, timestamps, frames) and the total size"""
+    seq_offset = HEADER_FIELDS * 8
+    ts_offset = _aligned(seq_offset + capacity * 8)
+    frame_offset = _aligned(ts_offset + capacity * 8)
+    frame_bytes = int(np.prod(frame_shape)) * np.dtype(dtype).itemsize
+    return seq_offset, ts_offset, frame_offset, frame_offset + capacity * frame_bytes
+
+
+def _open_shared_memory(name):
+    """Attach without handing the block to this process' resource tracker.
+
+    Before Python 3.13 every attaching process registers the block and its
+    tracker unlinks it on exit, which would pull it from under the GUI.
+    """
+    try:
+        return SharedMemory(name=name, track=False)
+    except TypeError:
+        shm = SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class SharedFrameRing:
+    """Ring of fixed-shape CSI frames in shared memory, one writer, any number of readers.
+
+    Frame n of the stream lives in slot n % capacity. Every slot carries
+    the sequence number + 1 of the frame it holds, 0 while being written,
+    and the header the count of published frames. Readers never lock:
+    they copy slots and keep only those whose sequence still matches
+    afterwards, so a lagging reader loses the oldest frames instead of
+    slowing the writer down.
+    """
+
+    def __init__(self, shm, owner=False, tracked=True):
+        self.shm = shm
+        self.owner = owner
+        # False when attached through _open_shared_memory
+        self.tracked = tracked
+        header = np.ndarray((HEADER_FIELDS,), dtype=np.uint64, buffer=shm.buf)
+        if int(header[_MAGIC]) != MAGIC:
+            del header
+            shm.close()
+            raise ValueError(f"Shared memory {shm.name} is not a CSI frame ring")
+        self.header = header
+        self.capacity = int(header[_CAPACITY])
+        # Stored as the dtype's type character, e.g. 'F' for complex64
+        self.dtype = np.dtype(chr(int(header[_DTYPE])))
+        ndim = int(header[_NDIM])
+        self.frame_shape = tuple(int(d) for d in header[_DIMS:_DIMS + ndim])
+
+        seq_offset, ts_offset, frame_offset, _ = _layout(
+            self.capacity, self.frame_shape, self.dtype)
+        self.slot_seq = np.ndarray((self.capacity,), dtype=np.uint64,
+                                   buffer=shm.buf, offset=seq_offset)
+        self.timestamps = np.ndarray((self.capacity,), dtype=np.float64,
+                                     buffer=shm.buf, offset=ts_offset)
+        self.frames = np.ndarray((self.capacity, *self.frame_shape), dtype=self.dtype,
+                                 buffer=shm.buf, offset=frame_offset)
+
+    @classmethod
+    def create(cls, name, frame_shape, capacity=4096, dtype=np.complex64):
+        """Create a new ring, the creating process is its only writer"""
+        frame_shape = tuple(frame_shape)
+        if len(frame_shape) > MAX_DIMS:
+            raise ValueError(f"Frames can have at most {MAX_DIMS} dimensions")
+        size = _layout(capacity, frame_shape, dtype)[-1]
+        shm = SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray((HEADER_FIELDS,), dtype=np.uint64, buffer=shm.buf)
+        header[:] = 0
+        header[_CAPACITY] = capacity
+        header[_DTYPE] = ord(np.dtype(dtype).char)
+        header[_NDIM] = len(frame_shape)
+        header[_DIMS:_DIMS + len(frame_shape)] = frame_shape
+        np.ndarray((capacity,), dtype=np.uint64, buffer=shm.buf,
+                   offset=_layout(capacity, frame_shape, dtype)[0])[:] = 0
+        # Magic last, readers attaching meanwhile see an invalid block
+        header[_MAGIC] = MAGIC
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """Attach to an existing ring by name, as a reader"""
+        return cls(_open_shared_memory(name), tracked=False)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def write_seq(self):
+        """Frames published so far, the sequence number of the next frame"""
+        return int(self.header[_WRITE_SEQ])
+
+    def publish(self, csi, timestamps=None):
+        """Append a (frames, *frame_shape) block, overwriting the oldest frames"""
+        n = len(csi)
+        if n == 0:
+            return
+        if tuple(csi.shape[1:]) != self.frame_shape:
+            raise ValueError(f"Frame shape {csi.shape[1:]} does not match "
+                             f"the ring's {self.frame_shape}")
+        start = self.write_seq
+        # Frames that would be overwritten within this block are skipped
+        skip = max(n - self.capacity, 0)
+        seqs = np.arange(start + skip, start + n, dtype=np.uint64)
+        slots = seqs % self.capacity
+        self.slot_seq[slots] = 0
+        self.frames[slots] = csi[skip:]
+        self.timestamps[slots] = 0.0 if timestamps is None else timestamps[skip:]
+        self.slot_seq[slots] = seqs + 1
+        self.header[_WRITE_SEQ] = start + n
+
+    def read(self, since=0, max_frames=None):
+        """Copy the frames published since sequence number since.
+
+        Returns (csi, timestamps, seqs). Frames already overwritten are
+        missing, compare seqs[0] with since to count them. The next call
+        should pass seqs[-1] + 1, or write_seq if nothing was returned.
+        """
+        end = self.write_seq
+        first = max(since, end - self.capacity)
+        if max_frames is not None:
+            first = max(first, end - max_frames)
+        seqs = np.arange(first, max(end, first), dtype=np.uint64)
+        slots = seqs % self.capacity
+        csi = self.frames[slots]
+        timestamps = self.timestamps[slots]
+        # Slots rewritten while copying hold newer frames now, drop them
+        valid = self.slot_seq[slots] == seqs + 1
+        return csi[valid], timestamps[valid], seqs[valid]
+
+    def latest(self, count):
+        """Copy of the newest count frames, as read"""
+        return self.read(max_frames=count)
+
+    def views(self, since=0):
+        """Zero-copy (first seq, csi view, timestamp view) segments since a sequence.
+
+        At most two segments, before and after the wrap point. The views
+        alias the ring, check is_valid(first seq) after using them.
+        """
+        end = self.write_seq
+        first = max(since, end - self.capacity)
+        segments = []
+        while first < end:
+            slot = first % self.capacity
+            n = min(end - first, self.capacity - slot)
+            segments.append((first, self.frames[slot:slot + n],
+                             self.timestamps[slot:slot + n]))
+            first += n
+        return segments
+
+    def is_valid(self, seq):
+        """True if frame seq has not been overwritten yet"""
+        return seq >= self.write_seq - self.capacity
+
+    def close(self):
+        # Drop the views before the mapping goes away
+        self.header = self.slot_seq = self.timestamps = self.frames = None
+        self.shm.close()
+
+    def unlink(self):
+        """Remove the ring once its writer is done, attached readers keep their mapping"""
+        if not self.tracked and not hasattr(self.shm, "_track"):
+            # Before 3.13 unlink also unregisters, which expects a registration
+            resource_tracker.register(self.shm._name, "shared_memory")
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_writer(name, frame_shape, capacity=4096, dtype=np.complex64):
+    """Create the ring, or reuse one left by a previous capture with the same layout.
+
+    Reusing keeps the sequence numbers running, so readers attached across
+    captures see one continuous stream. A ring of another layout is replaced.
+    """
+    try:
+        ring = SharedFrameRing.attach(name)
+    except FileNotFoundError:
+        return SharedFrameRing.create(name, frame_shape, capacity, dtype)
+    except ValueError:
+        ring = None
+    if (ring is not None and ring.frame_shape == tuple(frame_shape)
+            and ring.capacity == capacity and ring.dtype == np.dtype(dtype)):
+        ring.owner = True
+        return ring
+    if ring is not None:
+        ring.close()
+    remove_ring(name)
+    return SharedFrameRing.create(name, frame_shape, capacity, dtype)
+
+
+def remove_ring(name):
+    """Unlink a ring by name if it exists, readers keep their mapping"""
+    try:
+        shm = SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    shm.close()
+    shm.unlink()
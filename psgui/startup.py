@@ -0,0 +1,41 @@
+import os
+import json
+import time
+import importlib
+
+# Origin of all marks, main.py imports this module before anything heavy
+_origin = time.perf_counter()
+_marks = {}
+
+# Set to a file path to append one JSON line of marks per GUI start
+STARTUP_LOG_ENV = "PSGUI_STARTUP_LOG"
+
+
+def mark(name):
+    """Record milliseconds since startup under name, return them"""
+    _marks[name] = round((time.perf_counter() - _origin) * 1000, 1)
+    return _marks[name]
+
+
+def marks():
+    return dict(_marks)
+
+
+def report():
+    """Print the marks and append them to $PSGUI_STARTUP_LOG if set"""
+    summary = ", ".join(f"{name} {ms:.0f} ms" for name, ms in _marks.items())
+    print(f"Startup: {summary}")
+    path = os.environ.get(STARTUP_LOG_ENV)
+    if path:
+        with open(path, 'a') as f:
+            f.write(json.dumps({"time": time.time(), **_marks}) + '\n')
+
+
+def preload(modules):
+    """Import modules, meant for a background thread while the window is idle.
+
+    Python's import lock makes a concurrent import of the same module in
+    the UI thread wait for this one instead of importing it twice.
+    """
+    for name in modules:
+        importlib.import_module(name)
@@ -0,0 +1,135 @@
+import os
+import queue
+import time
+from threading import Thread, Event
+
+from PyQt6.QtCore import pyqtSignal, QObject
+
+from psgui.decoder import PicoScenesDecoder, stack_frames
+
+
+class FrameBatch:
+    """Decoded frames from one .csi file, stacked as (frames, subcarriers, rx, tx)"""
+
+    def __init__(self, path, csi, timestamps):
+        self.path = path
+        self.csi = csi
+        self.timestamps = timestamps
+
+    def __len__(self):
+        return len(self.timestamps)
+
+
+class CSIStreamSignals(QObject):
+    frames_ready = pyqtSignal()
+    error = pyqtSignal(str)
+
+
+class CSIStreamWorker(Thread):
+    """Tail .csi files growing in a directory and decode frames as they arrive.
+
+    Batches are handed to the UI through a bounded queue; when the UI falls
+    behind the worker blocks on the queue and stops reading, so the unread
+    part of the capture stays on disk instead of piling up in memory.
+
+    With ring_name every batch is also published to a shmring.SharedFrameRing
+    of that name, before the UI gets it, for other local processes to read.
+    """
+
+    def __init__(self, directory='.', batch_size=64, max_batches=16,
+                 poll_interval=0.05, ring_name=None, ring_capacity=4096):
+        super().__init__(daemon=True)
+        self.directory = directory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.batches = queue.Queue(maxsize=max_batches)
+        self.signals = CSIStreamSignals()
+        self.frame_count = 0
+        self._decoders = {}
+        self._stop_event = Event()
+        self._start_time = None
+        self.ring_name = ring_name
+        self.ring_capacity = ring_capacity
+        self.ring = None
+
+    def stop(self):
+        self._stop_event.set()
+
+    def take_batches(self):
+        """Return all queued batches without blocking, call from the UI thread"""
+        batches = []
+        while True:
+            try:
+                batches.append(self.batches.get_nowait())
+            except queue.Empty:
+                return batches
+
+    def run(self):
+        self._start_time = time.time()
+        try:
+            while not self._stop_event.is_set():
+                self._discover_files()
+                got_frames = False
+                for decoder in list(self._decoders.values()):
+                    if self._read_batches(decoder):
+                        got_frames = True
+                if not got_frames:
+                    self._stop_event.wait(self.poll_interval)
+        except Exception as e:
+            self.signals.error.emit(str(e))
+        finally:
+            # The ring outlives the capture, readers stay attached between runs
+            if self.ring is not None:
+                self.ring.close()
+                self.ring = None
+
+    def _discover_files(self):
+        """Pick up .csi files created since the stream was started"""
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if not name.endswith('.csi') or path in self._decoders:
+                continue
+            try:
+                # Allow for coarse filesystem mtime resolution
+                if os.path.getmtime(path) >= self._start_time - 1:
+                    self._decoders[path] = PicoScenesDecoder(path)
+            except OSError:
+                continue
+
+    def _read_batches(self, decoder):
+        """Decode available frames of one file into batches, return True if any"""
+        got_frames = False
+        while not self._stop_event.is_set():
+            frames = list(decoder.iter_frames(max_frames=self.batch_size))
+            if not frames:
+                break
+            got_frames = True
+
+            batch = FrameBatch(decoder.path, *stack_frames(frames))
+            if self.ring_name:
+                self._publish(batch)
+            if not self._put(batch):
+                break
+            self.frame_count += len(batch)
+            self.signals.frames_ready.emit()
+
+        return got_frames
+
+    def _publish(self, batch):
+        """Publish a batch to the shared ring, created from the first batch's shape"""
+        from psgui.shmring import open_writer
+
+        if self.ring is None:
+            self.ring = open_writer(self.ring_name, batch.csi.shape[1:], self.ring_capacity)
+        if batch.csi.shape[1:] == self.ring.frame_shape:
+            self.ring.publish(batch.csi, batch.timestamps)
+
+    def _put(self, batch):
+        """Block until the UI has room for another batch or the stream is stopped"""
+        while not self._stop_event.is_set():
+            try:
+                self.batches.put(batch, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
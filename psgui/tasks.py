@@ -0,0 +1,134 @@
+import os
+from threading import Event
+
+import numpy as np
+from PyQt6.QtCore import pyqtSignal, QObject, QRunnable
+
+from psgui.cache import BuildCancelled, load_csi
+from psgui.ingest import find_csi_files, ingest_csi_files
+from psgui.views import CSIViews
+
+
+class ProcessingResult:
+    """Outcome of processing one capture, handed back to the UI thread"""
+
+    def __init__(self, target_dir, entries, csi_file_path=None, views=None):
+        self.target_dir = target_dir
+        self.entries = entries
+        self.csi_file_path = csi_file_path
+        self.views = views
+
+
+class ProcessingSignals(QObject):
+    progress = pyqtSignal(int, str)
+    finished = pyqtSignal(object)
+    cancelled = pyqtSignal()
+    error = pyqtSignal(str)
+
+
+class ProcessingTask(QRunnable):
+    """Move captured files, update the manifest and decode the capture off the UI thread"""
+
+    def __init__(self, csi_files, target_dir, labels, source_dir='.',
+                 view=("amplitude", (0, 0)), calibration=None):
+        super().__init__()
+        self.csi_files = csi_files
+        self.target_dir = target_dir
+        self.labels = labels
+        self.source_dir = source_dir
+        self.view = view
+        self.calibration = calibration
+        self.signals = ProcessingSignals()
+        self._cancel_event = Event()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+
+    def run(self):
+        try:
+            total = len(self.csi_files)
+            moved = []
+
+            def on_moved(message):
+                moved.append(message)
+                self.signals.progress.emit(
+                    int(50 * len(moved) / total), message)
+
+            # Every snapshotted file is moved even if cancelled meanwhile,
+            # only the decoding below stops early
+            entries = ingest_csi_files(self.csi_files, self.target_dir,
+                                       self.labels, self.source_dir, on_moved)
+            if self.is_cancelled():
+                self.signals.cancelled.emit()
+                return
+
+            # Decode the first file and prepare its views, so switching
+            # views in the UI doesn't touch the file again
+            csi_file_path = os.path.join(self.target_dir, entries[0]["data"])
+            self.signals.progress.emit(50, f"Decoding {csi_file_path}")
+            views = None
+            try:
+                csi_matrix, _ = load_csi(csi_file_path,
+                                         cancel_event=self._cancel_event)
+                self.signals.progress.emit(75, "Preparing views")
+                views = CSIViews(np.asarray(csi_matrix), self.calibration)
+                views.precompute()
+                view, pair = self.view
+                if pair is not None and pair not in views.antenna_pairs:
+                    pair = (0, 0)
+                # The UI only draws it, the pyramid pass happens here
+                views.image(view, pair).pyramid()
+            except BuildCancelled:
+                raise
+            except Exception as e:
+                # The files are already moved, still report them
+                self.signals.progress.emit(
+                    100, f"Failed to parse CSI data: {str(e)}")
+
+            self.signals.progress.emit(100, "Processing finished")
+            self.signals.finished.emit(ProcessingResult(
+                self.target_dir, entries, csi_file_path, views))
+        except BuildCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.error.emit(str(e))
+
+
+class ViewSignals(QObject):
+    finished = pyqtSignal(object, object)
+    error = pyqtSignal(str)
+
+
+class ViewTask(QRunnable):
+    """Prepare another view of processed CSIViews, pyramid included, off the UI thread"""
+
+    def __init__(self, views, view, pair):
+        super().__init__()
+        self.views = views
+        self.view = view
+        self.pair = pair
+        self.signals = ViewSignals()
+
+    def run(self):
+        try:
+            image = self.views.image(self.view, self.pair)
+            image.pyramid()
+            self.signals.finished.emit((self.view, self.pair), image)
+        except Exception as e:
+            self.signals.error.emit(str(e))
+
+
+def create_processing_task(source_dir, target_dir, labels, view=("amplitude", (0, 0)),
+                           calibration=None):
+    """Snapshot the .csi files in source_dir into a ProcessingTask, None if there are none.
+
+    Taking the snapshot now lets a new capture write .csi files into the
+    same directory while this one is processed.
+    """
+    csi_files = find_csi_files(source_dir)
+    if not csi_files:
+        return None
+    return ProcessingTask(csi_files, target_dir, labels, source_dir, view, calibration)
@@ -1,34 +1,115 @@
 import os
-import sys
+import time
 import json
-import shutil
+from threading import Thread
 from PyQt6.QtWidgets import (QMainWindow, QTextEdit,
                              QPushButton, QVBoxLayout, QHBoxLayout, QWidget, QLabel,
-                             QLineEdit, QGroupBox, QFormLayout, QApplication,
-                             QSplitter)
-from PyQt6.QtCore import pyqtSlot, Qt
+                             QLineEdit, QGroupBox, QFormLayout,
+                             QSplitter, QCheckBox, QProgressBar, QFileDialog,
+                             QComboBox)
+from PyQt6.QtCore import pyqtSignal, pyqtSlot, Qt, QThreadPool
 
 from psgui.config import DEFAULT_CONFIG, load_config, save_config
-from psgui.runner import ScriptRunner
+from psgui.ingest import get_target_dir
+from psgui.manifest import MANIFEST_DB
+from psgui.capture import parse_interfaces
+from psgui.scheduler import CaptureScheduler
 from psgui.logger import setup_logger
-from psgui.visualizer import CSIVisualizer
+from psgui import startup
+
+# Loaded in the background once the window is up, they pull in NumPy,
+# CSIKit and matplotlib, see MainWindow.preload_modules
+BACKGROUND_MODULES = ['psgui.views', 'psgui.tasks', 'psgui.stream', 'psgui.session']
 
 
 class MainWindow(QMainWindow):
+    # Emitted from the preload thread once the heavy modules are imported
+    modules_loaded = pyqtSignal()
+
     def __init__(self):
         super().__init__()
         self.config = load_config()
+        self._csi_viz = None
         self.initUI()
-        self.script_runner = None
+        self.scheduler = None
+        self.session = None
+        self.stream_worker = None
+        self.live_sanitizer = None
+        self.live_doppler = None
+        self.thread_pool = QThreadPool.globalInstance()
+        self.processing_tasks = []
+        # View switches in flight, see on_view_changed
+        self.view_tasks = []
         self.last_manifest_entry = None
         self.last_csi_file_path = None
-        self.original_stdout = setup_logger(self.info_display)
+        self.csi_views = None
+        self.log_sink = setup_logger(
+            self.info_display,
+            self.config.get("log_max_lines", DEFAULT_CONFIG["log_max_lines"]),
+            self.config.get("log_file", DEFAULT_CONFIG["log_file"]))
         print("Log output redirected to UI")
+        self.modules_loaded.connect(self.on_modules_loaded)
+        self._shown = False
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self._shown:
+            # Only start importing the heavy modules once the window is up
+            self._shown = True
+            startup.mark("window")
+            self.preload_modules()
+
+    def preload_modules(self):
+        backend = self.config.get("render_backend",
+                                  DEFAULT_CONFIG["render_backend"])
+        modules = BACKGROUND_MODULES + [
+            'psgui.imageview' if backend == "qimage" else 'psgui.visualizer']
+        Thread(target=lambda: (startup.preload(modules), self.modules_loaded.emit()),
+               daemon=True).start()
+
+    @pyqtSlot()
+    def on_modules_loaded(self):
+        self.load_visualizer()
+        startup.mark("visualizer")
+        startup.report()
+
+    @property
+    def csi_viz(self):
+        """The visualizer, created on first use if the preload hasn't finished yet"""
+        if self._csi_viz is None:
+            self.load_visualizer()
+        return self._csi_viz
+
+    def load_visualizer(self):
+        """Swap the placeholder for the visualizer and fill the view selector"""
+        if self._csi_viz is not None:
+            return
+        from psgui.views import VIEWS
+
+        self._csi_viz = self.create_visualizer(self.viz_placeholder.parentWidget())
+        self.viz_layout.replaceWidget(self.viz_placeholder, self._csi_viz)
+        self.viz_placeholder.deleteLater()
+        self.view_combo.blockSignals(True)
+        for view, label in VIEWS.items():
+            self.view_combo.addItem(label, view)
+        self.view_combo.blockSignals(False)
 
     def closeEvent(self, event):
         """Save configuration and restore stdout when window is closed"""
-        sys.stdout = self.original_stdout
+        if self.session is not None:
+            self.session.stop()
+        if self.scheduler is not None:
+            self.scheduler.stop()
+        self.stop_stream()
+        for task in self.processing_tasks:
+            task.cancel()
+        self.thread_pool.waitForDone()
+        ring_name = self.config.get("shared_ring")
+        if ring_name:
+            from psgui.shmring import remove_ring
+            remove_ring(ring_name)
         self.save_current_config()
+        self.log_sink.restore()
         event.accept()
 
     def save_current_config(self):
@@ -40,6 +121,9 @@ class MainWindow(QMainWindow):
 
         self.config["picoscenes_rx_command"] = self.command_input.text()
         self.config["subfolder_name"] = self.subfolder_input.text()
+        self.config["interfaces"] = self.interfaces_input.text()
+        self.config["live_view"] = self.live_view_checkbox.isChecked()
+        self.config["replay_source"] = self.replay_input.text()
 
         if not save_config(self.config):
             print("Error saving configuration")
@@ -68,11 +152,29 @@ class MainWindow(QMainWindow):
             "picoscenes_rx_command", DEFAULT_CONFIG["picoscenes_rx_command"]))
         config_layout.addRow("PicoScenes RX Command:", self.command_input)
 
+        # One receiver per interface, run in parallel
+        self.interfaces_input = QLineEdit(
+            self.config.get("interfaces", DEFAULT_CONFIG["interfaces"]))
+        self.interfaces_input.setPlaceholderText("e.g. 2, 3 (empty: as in the command)")
+        config_layout.addRow("Interfaces:", self.interfaces_input)
+
+        # Recorded captures emulating the receiver, for testing without a NIC
+        self.replay_input = QLineEdit(
+            self.config.get("replay_source", DEFAULT_CONFIG["replay_source"]))
+        self.replay_input.setPlaceholderText("empty: run PicoScenes, or a .csi file / data folder")
+        config_layout.addRow("Replay From:", self.replay_input)
+
         # Subfolder name input
         self.subfolder_input = QLineEdit(
             self.config.get("subfolder_name", "default"))
         config_layout.addRow("Subfolder Name:", self.subfolder_input)
 
+        # Live view toggle
+        self.live_view_checkbox = QCheckBox("Decode frames while collecting")
+        self.live_view_checkbox.setChecked(
+            self.config.get("live_view", DEFAULT_CONFIG["live_view"]))
+        config_layout.addRow("Live View:", self.live_view_checkbox)
+
         config_group.setLayout(config_layout)
         main_layout.addWidget(config_group)
 
@@ -81,6 +183,23 @@ class MainWindow(QMainWindow):
         self.run_button = QPushButton("Collect CSI")
         self.run_button.clicked.connect(self.on_run_button_clicked)
         buttons_layout.addWidget(self.run_button)
+        self.plan_button = QPushButton("Run Plan...")
+        self.plan_button.clicked.connect(self.on_plan_button_clicked)
+        buttons_layout.addWidget(self.plan_button)
+        self.live_status = QLabel("Live: idle")
+        buttons_layout.addWidget(self.live_status)
+        self.receiver_status = QLabel("RX: idle")
+        buttons_layout.addWidget(self.receiver_status)
+
+        # Background processing progress
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setVisible(False)
+        buttons_layout.addWidget(self.progress_bar)
+        self.cancel_button = QPushButton("Cancel Processing")
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.on_cancel_button_clicked)
+        buttons_layout.addWidget(self.cancel_button)
         main_layout.addLayout(buttons_layout)
 
         # Create splitter for upper and lower sections
@@ -115,9 +234,30 @@ class MainWindow(QMainWindow):
         viz_widget = QWidget()
         viz_layout = QVBoxLayout(viz_widget)
 
-        # Add CSI visualization component
-        self.csi_viz = CSIVisualizer(viz_widget)
-        viz_layout.addWidget(self.csi_viz)
+        # Add CSI visualization component, the placeholder is replaced once
+        # matplotlib has been imported in the background
+        self.viz_layout = viz_layout
+        self.viz_placeholder = QLabel("Loading visualizer...")
+        self.viz_placeholder.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        viz_layout.addWidget(self.viz_placeholder, 1)
+
+        # View and antenna pair selection
+        view_layout = QHBoxLayout()
+        view_layout.addWidget(QLabel("View:"))
+        # Filled by load_visualizer
+        self.view_combo = QComboBox()
+        self.view_combo.currentIndexChanged.connect(self.on_view_changed)
+        view_layout.addWidget(self.view_combo)
+        view_layout.addWidget(QLabel("Antennas:"))
+        self.pair_combo = QComboBox()
+        self.set_antenna_pairs([(0, 0)])
+        self.pair_combo.currentIndexChanged.connect(self.on_view_changed)
+        view_layout.addWidget(self.pair_combo)
+        view_layout.addStretch()
+        self.save_plot_button = QPushButton("Save Plot")
+        self.save_plot_button.clicked.connect(self.on_save_plot_clicked)
+        view_layout.addWidget(self.save_plot_button)
+        viz_layout.addLayout(view_layout)
 
         splitter.addWidget(viz_widget)
 
@@ -127,11 +267,73 @@ class MainWindow(QMainWindow):
 
         self.setCentralWidget(central_widget)
 
+    def create_visualizer(self, parent):
+        """Create the visualizer for the configured render backend"""
+        backend = self.config.get("render_backend",
+                                  DEFAULT_CONFIG["render_backend"])
+        if backend == "qimage":
+            from psgui.imageview import CSIImageView
+            return CSIImageView(parent)
+
+        from psgui.visualizer import CSIVisualizer
+        return CSIVisualizer(parent)
+
+    def set_antenna_pairs(self, pairs):
+        """Fill the antenna selector, keeping the current choice when possible"""
+        current = self.pair_combo.currentData()
+        self.pair_combo.blockSignals(True)
+        self.pair_combo.clear()
+        for rx, tx in pairs:
+            self.pair_combo.addItem(f"RX{rx}-TX{tx}", (rx, tx))
+        self.pair_combo.addItem("All (tiled)", None)
+        index = self.pair_combo.findData(current)
+        self.pair_combo.setCurrentIndex(max(index, 0))
+        self.pair_combo.blockSignals(False)
+
+    def current_view(self):
+        return self.view_combo.currentData() or "amplitude", self.pair_combo.currentData()
+
+    @pyqtSlot()
+    def on_view_changed(self):
+        """Show the selected view of the last capture from its cached arrays"""
+        if self.csi_views is None:
+            return
+        from psgui.tasks import ViewTask
+
+        # The image and its pyramid are prepared on the pool, drawing
+        # them is all that is left for the UI thread
+        task = ViewTask(self.csi_views, *self.current_view())
+        task.signals.finished.connect(
+            lambda key, image, task=task: self.on_view_ready(task, key, image))
+        task.signals.error.connect(
+            lambda error_msg, task=task: self.on_view_error(task, error_msg))
+        # Keep a reference, the pool doesn't own the Python object
+        self.view_tasks.append(task)
+        self.thread_pool.start(task)
+
+    def on_view_ready(self, task, key, image):
+        self.view_tasks.remove(task)
+        # Drop views the user has moved on from while they were prepared
+        if task.views is self.csi_views and key == self.current_view():
+            self.csi_viz.show_image(image)
+
+    def on_view_error(self, task, error_msg):
+        self.view_tasks.remove(task)
+        print(f"Visualization error: {error_msg}")
+        self.csi_viz.clear_plot()
+
+    @pyqtSlot()
+    def on_save_plot_clicked(self):
+        """Export the current plot through matplotlib"""
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Save Plot", "csi.pdf", "Figures (*.pdf *.png *.svg)")
+        if path and self.csi_viz.save_figure(path):
+            print(f"Plot saved to {path}")
+
     @pyqtSlot()
     def on_run_button_clicked(self):
         self.run_button.setEnabled(False)
         print("Running data collection script...")
-        QApplication.processEvents()
 
         # Get current parameters
         command = self.command_input.text()
@@ -141,23 +343,236 @@ class MainWindow(QMainWindow):
             print("Invalid duration value. Using default.")
             duration = DEFAULT_CONFIG["duration"]
 
-        self.script_runner = ScriptRunner(command, duration)
-        self.script_runner.signals.finished.connect(self.on_script_finished)
-        self.script_runner.signals.error.connect(self.on_script_error)
-        self.script_runner.start()
+        try:
+            replay = self.replay_source()
+        except ValueError as e:
+            print(f"Cannot replay: {e}")
+            self.run_button.setEnabled(True)
+            return
+
+        scheduler = CaptureScheduler(
+            command, duration, parse_interfaces(self.interfaces_input.text()),
+            stall_timeout=self.config.get("stall_timeout", DEFAULT_CONFIG["stall_timeout"]),
+            replay=replay)
+        scheduler.signals.finished.connect(self.on_script_finished)
+        scheduler.signals.error.connect(self.on_script_error)
+        self.watch_scheduler(scheduler)
+        scheduler.start()
+
+    def replay_source(self):
+        """ReplaySource for the Replay From field, None to run PicoScenes"""
+        path = self.replay_input.text().strip()
+        if not path:
+            return None
+        from psgui.replay import ReplaySource
+
+        replay = ReplaySource(path, float(self.config.get(
+            "replay_speed", DEFAULT_CONFIG["replay_speed"])))
+        print(f"Capturing from a {replay}")
+        return replay
+
+    def watch_scheduler(self, scheduler):
+        """Show the receive stats and live view of a capture before it starts"""
+        self.scheduler = scheduler
+        scheduler.signals.stats.connect(self.on_script_stats)
+        scheduler.signals.event.connect(self.on_script_event)
+        scheduler.signals.stalled.connect(self.on_script_stalled)
+        self.receiver_status.setStyleSheet("")
+        self.receiver_status.setText("RX: starting")
+
+        if self.live_view_checkbox.isChecked():
+            self.start_stream()
+
+    @pyqtSlot()
+    def on_plan_button_clicked(self):
+        """Run a JSON collection plan unattended, or stop the running one"""
+        from psgui.session import load_plan
+
+        if self.session is not None:
+            print("Stopping session after the current capture...")
+            self.session.stop()
+            return
+
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Run Collection Plan", "", "Plans (*.json)")
+        if not path:
+            return
+        try:
+            duration = float(self.duration_input.text())
+        except ValueError:
+            duration = DEFAULT_CONFIG["duration"]
+        try:
+            runs = load_plan(path, duration, self.parse_labels())
+        except (OSError, ValueError) as e:
+            print(f"Invalid plan {path}: {e}")
+            return
+        if not runs:
+            print(f"Plan {path} has no runs.")
+            return
+        try:
+            replay = self.replay_source()
+        except ValueError as e:
+            print(f"Cannot replay: {e}")
+            return
+        self.start_session(runs, replay)
+
+    def start_session(self, runs, replay=None):
+        from psgui.session import CollectionSession
+
+        target_dir = get_target_dir(self.subfolder_input.text())
+        log_path = os.path.join(
+            target_dir, time.strftime("session-%Y%m%d-%H%M%S.jsonl"))
+        self.session = CollectionSession(
+            runs, self.command_input.text(), target_dir,
+            parse_interfaces(self.interfaces_input.text()),
+            self.config.get("stall_timeout", DEFAULT_CONFIG["stall_timeout"]),
+            view=self.current_view(), log_path=log_path,
+            thread_pool=self.thread_pool, replay=replay)
+        self.session.signals.run_started.connect(self.on_session_run_started)
+        self.session.signals.run_captured.connect(self.on_session_run_captured)
+        self.session.signals.task_started.connect(
+            lambda run, task: self.watch_task(task))
+        self.session.signals.finished.connect(self.on_session_finished)
+        self.run_button.setEnabled(False)
+        self.plan_button.setText("Stop Session")
+        print(f"Starting session of {len(runs)} runs, timings in {log_path}")
+        self.session.start()
+
+    def on_session_run_started(self, run, scheduler):
+        print(f"Run {run.index + 1}/{len(self.session.runs)}: "
+              f"{run.labels} for {run.duration:g} s")
+        self.watch_scheduler(scheduler)
+
+    def on_session_run_captured(self, run):
+        self.stop_stream()
+
+    def on_session_finished(self, summary):
+        print(f"Session finished: {json.dumps(summary)}")
+        self.session = None
+        self.plan_button.setText("Run Plan...")
+        self.run_button.setEnabled(True)
+
+    def phase_calibration(self):
+        """Offsets from the configured phase_calibration file, None if unset or unreadable"""
+        path = self.config.get("phase_calibration", DEFAULT_CONFIG["phase_calibration"])
+        if not path:
+            return None
+        from psgui.phase import load_calibration
+        try:
+            return load_calibration(path)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring phase calibration {path}: {e}")
+            return None
+
+    def start_stream(self):
+        """Start decoding frames from the .csi files PicoScenes is writing"""
+        from psgui.stream import CSIStreamWorker
+
+        self.stop_stream()
+        # With several interfaces the live view follows the first one
+        directory = next(iter(self.scheduler.directories.values()))
+        self.stream_worker = CSIStreamWorker(
+            directory,
+            ring_name=self.config.get("shared_ring", DEFAULT_CONFIG["shared_ring"]) or None,
+            ring_capacity=self.config.get("shared_ring_frames",
+                                          DEFAULT_CONFIG["shared_ring_frames"]))
+        self.stream_worker.signals.frames_ready.connect(self.on_stream_frames)
+        self.stream_worker.signals.error.connect(self.on_stream_error)
+        self.stream_worker.start()
+        from psgui.doppler import DopplerSTFT
+        from psgui.phase import PhaseSanitizer
+        from psgui.views import DOPPLER_HOP, DOPPLER_WINDOW
+        self.live_sanitizer = PhaseSanitizer(self.phase_calibration())
+        self.live_doppler = DopplerSTFT(DOPPLER_WINDOW, DOPPLER_HOP)
+        self.csi_viz.start_live(self.config.get(
+            "live_window_frames", DEFAULT_CONFIG["live_window_frames"]))
+        self.live_status.setText("Live: waiting for frames")
+
+    def stop_stream(self):
+        """Stop the live stream, if any, before its files are moved"""
+        if self.stream_worker is None:
+            return
+        self.stream_worker.stop()
+        self.stream_worker.join(timeout=1)
+        self.live_status.setText(
+            f"Live: {self.stream_worker.frame_count} frames")
+        self.stream_worker = None
+
+    @pyqtSlot()
+    def on_stream_frames(self):
+        """Drain decoded batches queued by the stream worker"""
+        if self.stream_worker is None:
+            return
+        import numpy as np
+
+        batches = self.stream_worker.take_batches()
+        # The sanitized phase and Doppler views follow along live, anything
+        # else shows amplitude
+        view = self.current_view()[0]
+        if view != "doppler":
+            # Frames skipped meanwhile would blur the next window
+            self.live_doppler.reset()
+        for batch in batches:
+            if view == "phase_clean":
+                self.csi_viz.push_frames(self.live_sanitizer(batch.csi)[:, :, 0, 0],
+                                         "phase_clean")
+            elif view == "doppler":
+                spectra, _ = self.live_doppler.push(batch.csi)
+                if len(spectra):
+                    self.csi_viz.push_frames(spectra.mean(axis=(2, 3)), "doppler")
+            else:
+                self.csi_viz.push_frames(np.abs(batch.csi[:, :, 0, 0]))
+        if batches:
+            self.live_status.setText(
+                f"Live: {self.stream_worker.frame_count} frames")
+
+    @pyqtSlot(str)
+    def on_stream_error(self, error_msg):
+        print(f"Live view error: {error_msg}")
 
     @pyqtSlot()
     def on_script_finished(self):
+        self.stop_stream()
         print("Processing CSI files...")
-        QApplication.processEvents()
-        self.process_csi_files()
+        for interface, directory in self.scheduler.directories.items():
+            labels = self.parse_labels()
+            if interface is not None:
+                labels["interface"] = interface
+            self.process_csi_files(directory, labels)
+        # Processing runs in the background, the next capture can start now
         self.run_button.setEnabled(True)
 
-    @pyqtSlot(str)
-    def on_script_error(self, error_msg):
+    @pyqtSlot(object)
+    def on_script_stats(self, stats):
+        """Show receive counters parsed from the PicoScenes output"""
+        stalled = stats["idle"] >= self.scheduler.stall_timeout
+        self.receiver_status.setStyleSheet("color: red" if stalled else "")
+        devices = stats.get("devices", {})
+        self.receiver_status.setText(
+            f"RX: {stats['packets']} packets, {stats['rate']:.0f}/s, "
+            f"{stats['errors']} errors"
+            + (f" on {len(devices)} NICs" if len(devices) > 1 else "")
+            + (" (stalled)" if stalled else ""))
+
+    @pyqtSlot(str, str)
+    def on_script_event(self, kind, line):
+        if kind == 'error':
+            self.receiver_status.setToolTip(line)
+
+    @pyqtSlot(str, float)
+    def on_script_stalled(self, interface, idle):
+        nic = f"NIC {interface}" if interface else "the NIC"
+        print(f"Warning: no packets received for {idle:.1f} s, check {nic}")
+
+    @pyqtSlot(str, str)
+    def on_script_error(self, interface, error_msg):
         """Script execution error callback"""
-        print(f"Error running script: {error_msg}")
-        self.run_button.setEnabled(True)
+        prefix = f" on interface {interface}" if interface else ""
+        print(f"Error running script{prefix}: {error_msg}")
+        # Receivers that did capture are still processed when they finish
+        if not self.scheduler.is_running():
+            self.stop_stream()
+            self.run_button.setEnabled(True)
 
     def parse_labels(self):
         """Parse labels from text input"""
@@ -174,77 +589,90 @@ class MainWindow(QMainWindow):
 
         return labels
 
-    def process_csi_files(self):
-        """Find, move CSI files and update manifest"""
-        try:
-            # Get subfolder name
-            subfolder_name = self.subfolder_input.text().strip()
-            if not subfolder_name:
-                subfolder_name = "default"
+    def process_csi_files(self, source_dir='.', labels=None):
+        """Hand the captured CSI files to a background processing task"""
+        from psgui.tasks import create_processing_task
 
-            # Ensure target directory exists
-            target_dir = os.path.join('data', subfolder_name)
-            if not os.path.exists(target_dir):
-                os.makedirs(target_dir)
-
-            # Get all .csi files in current directory
-            csi_files = [f for f in os.listdir('.') if f.endswith('.csi')]
-
-            if not csi_files:
+        try:
+            target_dir = get_target_dir(self.subfolder_input.text())
+            if labels is None:
+                labels = self.parse_labels()
+            task = create_processing_task(source_dir, target_dir, labels,
+                                          view=self.current_view(),
+                                          calibration=self.phase_calibration())
+            if task is None:
                 print("No .csi files found.")
                 self.csi_viz.clear_plot()
                 return
 
-            # Parse labels from input
-            labels_dict = self.parse_labels()
-
-            # Load existing manifest.json if it exists
-            manifest_path = os.path.join(target_dir, 'manifest.json')
-            manifest = []
-            if os.path.exists(manifest_path):
-                try:
-                    with open(manifest_path, 'r') as f:
-                        manifest = json.load(f)
-                except json.JSONDecodeError:
-                    print("Warning: manifest.json exists but is not valid. Creating a new one.")
-
-            # Process each .csi file
-            last_csi_file = None
-            for csi_file in csi_files:
-                # Save last file for visualization
-                if last_csi_file is None:
-                    last_csi_file = csi_file
-
-                # Move file to target directory
-                target_file_path = os.path.join(target_dir, csi_file)
-                shutil.move(csi_file, target_file_path)
-
-                # Add entry to manifest
-                entry = {
-                    "data": csi_file,
-                    "labels": labels_dict
-                }
-                manifest.append(entry)
-                self.last_manifest_entry = entry
-
-            # Save updated manifest to subdirectory
-            with open(manifest_path, 'w') as f:
-                json.dump(manifest, f, indent=2)
-            print(f"Updated manifest saved to {manifest_path}")
-
-            # Print summary
-            print(f"\nSuccess! Processed {len(csi_files)} CSI files.")
-            if self.last_manifest_entry:
-                print(json.dumps(self.last_manifest_entry, indent=2))
-
-            # Visualize last CSI file
-            if last_csi_file:
-                self.last_csi_file_path = os.path.join(
-                    target_dir, last_csi_file)
-                self.csi_viz.plot_csi_heatmap(self.last_csi_file_path)
-            else:
-                self.csi_viz.clear_plot()
+            self.watch_task(task)
+            self.thread_pool.start(task)
 
         except Exception as e:
             print(f"Error: {str(e)}")
             self.csi_viz.clear_plot()
+
+    def watch_task(self, task):
+        """Show the progress and result of a processing task before it is queued"""
+        task.signals.progress.connect(self.on_processing_progress)
+        task.signals.finished.connect(
+            lambda result, task=task: self.on_processing_finished(task, result))
+        task.signals.cancelled.connect(
+            lambda task=task: self.on_processing_cancelled(task))
+        task.signals.error.connect(
+            lambda error_msg, task=task: self.on_processing_error(task, error_msg))
+        # Keep a reference, the pool doesn't own the Python object
+        self.processing_tasks.append(task)
+        self.update_processing_controls()
+
+    @pyqtSlot()
+    def on_cancel_button_clicked(self):
+        """Cancel all running processing tasks"""
+        for task in self.processing_tasks:
+            task.cancel()
+        print("Cancelling CSI processing...")
+
+    @pyqtSlot(int, str)
+    def on_processing_progress(self, percent, message):
+        self.progress_bar.setValue(percent)
+        print(message)
+
+    def on_processing_finished(self, task, result):
+        self.finish_task(task)
+        print(f"Updated manifest saved to {os.path.join(result.target_dir, MANIFEST_DB)}")
+
+        # Print summary
+        print(f"\nSuccess! Processed {len(result.entries)} CSI files.")
+        if result.entries:
+            self.last_manifest_entry = result.entries[-1]
+            print(json.dumps(self.last_manifest_entry, indent=2))
+
+        # Visualize first CSI file of the capture
+        self.last_csi_file_path = result.csi_file_path
+        self.csi_views = result.views
+        if result.views is not None:
+            self.set_antenna_pairs(result.views.antenna_pairs)
+            self.on_view_changed()
+        else:
+            self.csi_viz.clear_plot()
+
+    def on_processing_cancelled(self, task):
+        self.finish_task(task)
+        print("CSI processing cancelled.")
+
+    def on_processing_error(self, task, error_msg):
+        self.finish_task(task)
+        print(f"Error: {error_msg}")
+        self.csi_viz.clear_plot()
+
+    def finish_task(self, task):
+        if task in self.processing_tasks:
+            self.processing_tasks.remove(task)
+        self.update_processing_controls()
+
+    def update_processing_controls(self):
+        busy = bool(self.processing_tasks)
+        self.cancel_button.setEnabled(busy)
+        self.progress_bar.setVisible(busy)
+        if not busy:
+            self.progress_bar.setValue(0)
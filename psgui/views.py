@@ -0,0 +1,263 @@
+import numpy as np
+
+from psgui.doppler import doppler_spectrogram
+from psgui.lod import FramePyramid
+from psgui.phase import PhaseSanitizer
+from psgui.ratio import ratio_phase_grid
+
+# View name -> label shown in the UI
+VIEWS = {
+    "amplitude": "Amplitude",
+    "phase": "Phase",
+    "phase_clean": "Sanitized Phase",
+    "ratio": "Conjugate Ratio Phase",
+    "ratio_grid": "Ratio Phase Grid",
+    "complex": "Complex Plane",
+    "doppler": "Doppler Spectrogram",
+}
+
+
+def _live_mode(title, label, cmap, symmetric=False,
+               xlabel='Frames Before Latest', ylabel='Subcarrier Index'):
+    return {"title": title, "label": label, "cmap": cmap, "symmetric": symmetric,
+            "xlabel": xlabel, "ylabel": ylabel}
+
+
+# Live waterfall modes, symmetric color ranges are centred on 0
+LIVE_MODES = {
+    "amplitude": _live_mode("Live CSI Amplitude (RX1-TX1)", "Amplitude", "viridis"),
+    "phase_clean": _live_mode("Live Sanitized Phase (RX1-TX1)", "Phase (rad)",
+                              "coolwarm", symmetric=True),
+    "doppler": _live_mode("Live Doppler Spectrum (all pairs)", "Normalized Power",
+                          "magma", xlabel='Windows Before Latest',
+                          ylabel='Doppler Bin'),
+}
+
+# Frames per Doppler window and between windows, for the view and live
+DOPPLER_WINDOW = 128
+DOPPLER_HOP = 16
+
+# Frames kept per block of the ratio grid, which has pairs^2 blocks
+GRID_MAX_FRAMES = 500
+
+# Bins per axis of the complex-plane density image
+COMPLEX_BINS = 200
+
+# Amplitude below which the heatmap shows the same colour, in linear units
+DB_FLOOR = 1e-3
+
+
+def amplitude_db(amplitude):
+    """20 log10 of linear amplitudes, like csitools.get_CSI's "amplitude" metric"""
+    return 20 * np.log10(np.maximum(amplitude, DB_FLOOR)).astype(np.float32)
+
+
+def tile_pairs(values):
+    """Tile (frames, subcarriers, rx, tx) into a (tx * frames, rx * subcarriers) image.
+
+    Same layout as tools/amplitude.py: TX blocks side by side along the
+    frame axis, RX blocks stacked along the subcarrier axis.
+    """
+    no_frames, no_subcarriers, no_rx, no_tx = values.shape
+    return values.transpose(3, 0, 2, 1).reshape(no_tx * no_frames,
+                                                 no_rx * no_subcarriers)
+
+
+class ViewImage:
+    """A prepared 2D image plus the labels needed to draw it.
+
+    data is laid out (x, y) like a (frames, subcarriers) magnitude array.
+    """
+
+    def __init__(self, data, title, xlabel, ylabel, cbar_label,
+                 cmap='viridis', vmin=None, vmax=None, extent=None,
+                 tiles=None, reduce='max'):
+        self.data = data
+        self.title = title
+        self.xlabel = xlabel
+        self.ylabel = ylabel
+        self.cbar_label = cbar_label
+        self.cmap = cmap
+        self.vmin = float(np.nanmin(data)) if vmin is None else vmin
+        self.vmax = float(np.nanmax(data)) if vmax is None else vmax
+        self.extent = extent or [0, data.shape[0] - 1, 0, data.shape[1] - 1]
+        # (block width, block height, [(x0, y0, label), ...]) for tiled grids
+        self.tiles = tiles
+        # Pyramid reduction when more frames than pixels are shown
+        self.reduce = reduce
+        self._pyramid = None
+
+    def pyramid(self):
+        """FramePyramid of data along x, built on first use and kept with the image.
+
+        It takes a pass over the image, so worker threads build it before
+        the image is handed to the UI (see ProcessingTask and ViewTask).
+        """
+        if self._pyramid is None:
+            self._pyramid = FramePyramid(self.data, reductions=(self.reduce,))
+        return self._pyramid
+
+
+class CSIViews:
+    """Derived views of one capture, computed once and cached per view"""
+
+    def __init__(self, csi_matrix, calibration=None):
+        self.csi = csi_matrix
+        self.sanitizer = PhaseSanitizer(calibration)
+        self.no_frames, self.no_subcarriers, self.no_rx, self.no_tx = csi_matrix.shape
+        self._arrays = {}
+        self._images = {}
+
+    @property
+    def antenna_pairs(self):
+        return [(rx, tx) for rx in range(self.no_rx) for tx in range(self.no_tx)]
+
+    def precompute(self, reference=(0, 0)):
+        """Compute the per-antenna arrays all heatmap views are sliced from"""
+        self.amplitude_db()
+        self.phase()
+        self.ratio_phase(reference)
+
+    def amplitude(self):
+        if "amplitude" not in self._arrays:
+            self._arrays["amplitude"] = np.abs(self.csi).astype(np.float32)
+        return self._arrays["amplitude"]
+
+    def amplitude_db(self):
+        """Amplitude in dB, what the amplitude heatmap shows"""
+        if "amplitude_db" not in self._arrays:
+            self._arrays["amplitude_db"] = amplitude_db(self.amplitude())
+        return self._arrays["amplitude_db"]
+
+    def phase(self):
+        if "phase" not in self._arrays:
+            self._arrays["phase"] = np.angle(self.csi).astype(np.float32)
+        return self._arrays["phase"]
+
+    def sanitized_phase(self):
+        """Unwrapped phase without STO/CFO trends and calibration offsets"""
+        if "phase_clean" not in self._arrays:
+            self._arrays["phase_clean"] = self.sanitizer.apply(self.csi)
+        return self._arrays["phase_clean"]
+
+    def doppler(self, reference=(0, 0)):
+        """Doppler spectra of the ratio series, (windows, bins, rx, tx)"""
+        key = ("doppler", reference)
+        if key not in self._arrays:
+            # Captures shorter than a window still get one
+            window = min(DOPPLER_WINDOW, self.no_frames)
+            if window < 2:
+                raise ValueError("Too few frames for a Doppler spectrogram")
+            hop = max(window * DOPPLER_HOP // DOPPLER_WINDOW, 1)
+            self._arrays[key] = doppler_spectrogram(self.csi, window, hop,
+                                                    reference=reference)[0]
+        return self._arrays[key]
+
+    def ratio_phase(self, reference=(0, 0)):
+        """Phase of every antenna pair conjugate-multiplied with the reference pair"""
+        key = ("ratio", reference)
+        if key not in self._arrays:
+            ref = self.csi[:, :, reference[0], reference[1]]
+            self._arrays[key] = np.angle(
+                self.csi * np.conj(ref)[:, :, np.newaxis, np.newaxis]
+            ).astype(np.float32)
+        return self._arrays[key]
+
+    def image(self, view, pair=None, reference=(0, 0)):
+        """Return the ViewImage for a view and antenna pair, None pair tiles all pairs"""
+        key = (view, pair, reference)
+        if key not in self._images:
+            self._images[key] = self._make_image(view, pair, reference)
+        return self._images[key]
+
+    def _make_image(self, view, pair, reference):
+        if view == "complex":
+            return self._complex_image(pair)
+        if view == "ratio_grid":
+            return self._ratio_grid_image()
+
+        # Amplitude peaks survive decimation with max, wrapped phases are
+        # averaged as unit phasors and unwrapped ones arithmetically
+        xlabel, ylabel = 'Frame Index', 'Subcarrier Index'
+        if view == "amplitude":
+            values, cmap, label, limits = (self.amplitude_db(), 'viridis',
+                                           'Amplitude (dB)', (None, None))
+            reduce = 'max'
+        elif view == "phase":
+            values, cmap, label, limits = self.phase(), 'twilight', 'Phase (rad)', (-np.pi, np.pi)
+            reduce = 'circular'
+        elif view == "phase_clean":
+            # Unwrapped, so not cyclic and not bounded to [-pi, pi]
+            values, cmap, label, limits = (self.sanitized_phase(), 'coolwarm',
+                                           'Phase (rad)', (None, None))
+            reduce = 'mean'
+        elif view == "doppler":
+            values, cmap, label, limits = (self.doppler(reference), 'magma',
+                                           'Normalized Power', (0, None))
+            reduce = 'max'
+            # Zero Doppler is the middle bin
+            xlabel, ylabel = 'Window Index', 'Doppler Bin'
+        elif view == "ratio":
+            values, cmap, label, limits = (self.ratio_phase(reference), 'twilight',
+                                           'Phase (rad)', (-np.pi, np.pi))
+            reduce = 'circular'
+        else:
+            raise ValueError(f"Unknown view: {view}")
+
+        title = f"CSI {VIEWS[view]}"
+        if view in ("ratio", "doppler"):
+            title += f" (vs RX{reference[0]}-TX{reference[1]})"
+
+        if pair is not None:
+            rx, tx = pair
+            return ViewImage(values[:, :, rx, tx], f"{title} (RX{rx}-TX{tx})",
+                             xlabel, ylabel, label, cmap, *limits, reduce=reduce)
+
+        no_x, no_y = values.shape[:2]
+        tiles = (no_x, no_y,
+                 [(tx * no_x, rx * no_y, f"RX{rx}-TX{tx}")
+                  for rx, tx in self.antenna_pairs])
+        return ViewImage(tile_pairs(values), title, xlabel, ylabel, label, cmap,
+                         *limits, tiles=tiles, reduce=reduce)
+
+    def _ratio_grid_image(self):
+        """Every pair over every other pair, always tiled whatever pair is selected"""
+        grid, no_frames = ratio_phase_grid(self.csi, GRID_MAX_FRAMES)
+        pairs = self.antenna_pairs
+        tiles = (no_frames, self.no_subcarriers,
+                 [(c * no_frames, r * self.no_subcarriers,
+                   f"R{rx_r}T{tx_r}/R{rx_c}T{tx_c}")
+                  for r, (rx_r, tx_r) in enumerate(pairs)
+                  for c, (rx_c, tx_c) in enumerate(pairs)])
+        return ViewImage(grid.T, f"CSI {VIEWS['ratio_grid']}", 'Frame Index',
+                         'Subcarrier Index', 'Phase (rad)', 'twilight',
+                         -np.pi, np.pi, tiles=tiles, reduce='circular')
+
+    def _complex_image(self, pair):
+        """Log-density of CSI values in the complex plane over all frames and subcarriers"""
+        pairs = self.antenna_pairs if pair is None else [pair]
+        limit = float(np.max(self.amplitude())) or 1.0
+        edges = np.linspace(-limit, limit, COMPLEX_BINS + 1)
+
+        densities = np.empty((COMPLEX_BINS, COMPLEX_BINS, self.no_rx, self.no_tx),
+                             dtype=np.float32)
+        for rx, tx in pairs:
+            values = np.asarray(self.csi[:, :, rx, tx]).ravel()
+            counts, _, _ = np.histogram2d(values.real, values.imag,
+                                          bins=(edges, edges))
+            densities[:, :, rx, tx] = np.log1p(counts)
+
+        if pair is not None:
+            rx, tx = pair
+            return ViewImage(densities[:, :, rx, tx],
+                             f"CSI {VIEWS['complex']} (RX{rx}-TX{tx})",
+                             'Real', 'Imaginary', 'log(1 + count)',
+                             extent=[-limit, limit, -limit, limit])
+
+        # Tiles are laid out in bins, so the axes show bin indices
+        tiles = (COMPLEX_BINS, COMPLEX_BINS,
+                 [(tx * COMPLEX_BINS, rx * COMPLEX_BINS, f"RX{rx}-TX{tx}")
+                  for rx, tx in self.antenna_pairs])
+        return ViewImage(tile_pairs(densities), f"CSI {VIEWS['complex']}",
+                         'Real (bin)', 'Imaginary (bin)', 'log(1 + count)',
+                         tiles=tiles)
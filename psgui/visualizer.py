@@ -1,12 +1,16 @@
 from PyQt6.QtWidgets import QSizePolicy
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from PyQt6.QtCore import QTimer
+from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 import os
 import numpy as np
 import matplotlib
-from CSIKit.reader import PicoScenesBeamformReader
-from CSIKit.util import csitools
-matplotlib.use('Qt5Agg')  # Use Qt5Agg backend
+from psgui.decoder import PicoScenesDecoder, stack_frames
+from psgui.lod import LODImage
+from psgui.render import plot_view
+from psgui.ringbuffer import PooledRingBuffer
+from psgui.views import LIVE_MODES, ViewImage, amplitude_db
+matplotlib.use('QtAgg')  # Use QtAgg backend, which picks up PyQt6
 
 
 class CSIVisualizer(FigureCanvas):
@@ -25,11 +29,57 @@ class CSIVisualizer(FigureCanvas):
                                    QSizePolicy.Policy.Expanding)
         FigureCanvas.updateGeometry(self)
 
+        # Decoder and RX1-TX1 magnitudes of the last plotted file, so
+        # re-plotting a growing capture only decodes the appended frames
+        self._decoder = None
+        self._magnitude = None
+
+        # Single colorbar, replaced instead of stacking up on every plot
+        self.colorbar = None
+
+        # Level of detail of the current heatmap, None if it fits the axes.
+        # Wheel zooms along frames, dragging pans, a double click resets
+        self._lod = None
+        self._full_xlim = None
+        self._pan_start = None
+        self.mpl_connect('scroll_event', self._on_scroll)
+        self.mpl_connect('button_press_event', self._on_press)
+        self.mpl_connect('motion_notify_event', self._on_motion)
+        self.mpl_connect('button_release_event', self._on_release)
+        self.mpl_connect('resize_event', self._on_resize)
+
+        # Live waterfall state, see start_live
+        self._live_buffer = None
+        self._live_display = None
+        self._live_image = None
+        self._live_background = None
+        self._live_window = 0
+        self._live_mode = "amplitude"
+        self._live_dirty = False
+        self._live_timer = QTimer(self)
+        self._live_timer.timeout.connect(self._redraw_live)
+        self.mpl_connect('draw_event', self._on_draw)
+
         # Initialize empty plot
         self.clear_plot()
 
+    def _remove_colorbar(self):
+        if self.colorbar is not None:
+            self.colorbar.remove()
+            self.colorbar = None
+
+    def _drop_lod(self):
+        if self._lod is not None:
+            self._lod.disconnect()
+            self._lod = None
+        self._full_xlim = None
+        self._pan_start = None
+
     def clear_plot(self):
         """Clear plot and display default message"""
+        self.stop_live()
+        self._drop_lod()
+        self._remove_colorbar()
         self.axes.clear()
         self.axes.text(0.5, 0.5, "CSI Visualizer",
                        horizontalalignment='center',
@@ -38,84 +88,88 @@ class CSIVisualizer(FigureCanvas):
         self.axes.set_axis_off()
         self.draw()
 
+    def load_csi_magnitude(self, csi_file_path):
+        """Return RX1-TX1 magnitudes in dB of a file, decoding only frames not seen before"""
+        if (self._decoder is None or self._decoder.path != csi_file_path
+                or os.path.getsize(csi_file_path) < self._decoder.offset):
+            self._decoder = PicoScenesDecoder(csi_file_path)
+            self._magnitude = None
+
+        csi_matrix, _ = stack_frames(list(self._decoder.iter_frames()))
+        if csi_matrix is not None:
+            # Directly extract the first rx-tx antenna pair (0,0)
+            # We assume data is in shape (packets, subcarriers, rx, tx)
+            new_magnitude = amplitude_db(np.abs(csi_matrix[:, :, 0, 0]))
+            if self._magnitude is None:
+                self._magnitude = new_magnitude
+            elif new_magnitude.shape[1] == self._magnitude.shape[1]:
+                self._magnitude = np.concatenate(
+                    [self._magnitude, new_magnitude])
+
+        if self._magnitude is None:
+            raise ValueError("no CSI frames in file")
+        return self._magnitude
+
     def plot_csi_heatmap(self, csi_file_path):
-        """Generate heatmap from CSI file using CSIKit"""
+        """Generate heatmap from CSI file"""
         try:
             if not os.path.exists(csi_file_path):
                 print(f"CSI file not found: {csi_file_path}")
                 self.clear_plot()
                 return False
 
-            # Load CSI data using CSIKit
+            # Load CSI data with the incremental PicoScenes decoder
             try:
-                # Removed initial loading log
-                
-                # Initialize PicoScenes reader
-                pico_reader = PicoScenesBeamformReader()
-
-                # Read the CSI file
-                csidata = pico_reader.read_file(csi_file_path, scaled=True)
-
-                # Extract CSI matrix
-                csi_matrix, no_frames, no_subcarriers = csitools.get_CSI(
-                    csidata)
+                csi_magnitude = self.load_csi_magnitude(csi_file_path)
+                no_frames, no_subcarriers = csi_magnitude.shape
 
                 print(f"Successfully loaded CSI data: {no_frames} frames, {no_subcarriers} subcarriers")
-
-                # Get the magnitude of the complex CSI values
-                csi_magnitude = np.abs(csi_matrix)
-                
-                print(f"Original CSI data shape: {csi_magnitude.shape}")
-                
-                # Directly extract the first rx-tx antenna pair (0,0)
-                # We assume data is in shape (packets, subcarriers, rx, tx)
-                csi_magnitude = csi_magnitude[:, :, 0, 0]
-                
-                # Removed antenna pair selection log
-                
-                # Simple bounds for visualization
-                min_sc_idx = 0
-                max_sc_idx = csi_magnitude.shape[1] - 1
                 timestamps = None
-                
+
             except Exception as e:
-                print(f"Failed to parse CSI data with CSIKit: {str(e)}")
+                print(f"Failed to parse CSI data: {str(e)}")
                 # Fallback: generate random data for example
                 no_frames = 100
                 no_subcarriers = 64
                 csi_magnitude = np.random.rand(no_frames, no_subcarriers)
-                min_sc_idx = 0
-                max_sc_idx = no_subcarriers-1
                 timestamps = None
 
+            return self.show_magnitude(csi_magnitude, timestamps)
+
+        except Exception as e:
+            print(f"Visualization error: {str(e)}")
+            self.clear_plot()
+            return False
+
+    def show_magnitude(self, csi_magnitude, timestamps=None):
+        """Plot a prepared (frames, subcarriers) magnitude array in dB, must run in the UI thread"""
+        return self.show_image(ViewImage(csi_magnitude,
+                                         'CSI Amplitude Heatmap (RX1-TX1)',
+                                         'Frame Index', 'Subcarrier Index',
+                                         'Amplitude (dB)'), timestamps)
+
+    def show_image(self, image, timestamps=None):
+        """Plot a prepared ViewImage, must run in the UI thread"""
+        try:
             # Plot heatmap
+            self.stop_live()
+            self._drop_lod()
+            self._remove_colorbar()
             self.axes.clear()
-            im = self.axes.imshow(csi_magnitude.T,  # Transpose for correct orientation
-                                 aspect='auto',
-                                 origin='lower',
-                                 cmap='viridis',
-                                 interpolation='none',
-                                 extent=[0, csi_magnitude.shape[0]-1, min_sc_idx, max_sc_idx])
-            
-            # Set axis labels with data from CSIKit
-            self.axes.set_xlabel('Frame Index' if timestamps is None else 'Time (ms)')
-            self.axes.set_ylabel('Subcarrier Index')
-            self.axes.set_title(f'CSI Amplitude Heatmap (RX1-TX1)')
-            
-            # If timestamps are available, set custom x-ticks at regular intervals
-            if timestamps is not None and len(timestamps) > 1:
-                # Convert timestamps to milliseconds relative to first frame
-                rel_timestamps_ms = [(ts - timestamps[0])/1000 for ts in timestamps]
-                # Set 5 tick marks along the x-axis
-                tick_indices = np.linspace(0, len(timestamps)-1, 5).astype(int)
-                self.axes.set_xticks(tick_indices)
-                self.axes.set_xticklabels([f"{rel_timestamps_ms[idx]:.1f}" for idx in tick_indices])
-
-            # Add colorbar
-            self.fig.colorbar(im, ax=self.axes, label='Amplitude')
+            # Never hand imshow more frames than the axes have pixels
+            width = max(self.axes.bbox.width, 1)
+            self.colorbar = plot_view(self.fig, self.axes, image, timestamps,
+                                      max_columns=width)
 
             # Auto-adjust layout and draw
             self.fig.tight_layout()
+            self._full_xlim = self.axes.get_xlim()
+            if len(image.data) > width:
+                x0, x1 = image.extent[:2]
+                self._lod = LODImage(self.axes, self.colorbar.mappable,
+                                     image.pyramid(), image.reduce,
+                                     frame_x0=x0,
+                                     frame_scale=(x1 - x0) / max(len(image.data) - 1, 1))
             self.draw()
             return True
 
@@ -123,3 +177,151 @@ class CSIVisualizer(FigureCanvas):
             print(f"Visualization error: {str(e)}")
             self.clear_plot()
             return False
+
+    def _set_xlim(self, x0, x1):
+        """Move the view inside the full range, keeping its width if possible"""
+        lo, hi = self._full_xlim
+        width = min(x1 - x0, hi - lo)
+        x0 = min(max(x0, lo), hi - width)
+        self.axes.set_xlim(x0, x0 + width)
+        self.draw_idle()
+
+    def _on_scroll(self, event):
+        if self._full_xlim is None or event.inaxes is not self.axes:
+            return
+        x0, x1 = self.axes.get_xlim()
+        scale = 0.8 if event.button == 'up' else 1.25
+        # Zoom about the frame under the cursor, at least a few frames wide
+        width = max((x1 - x0) * scale, 4 * (self._lod.frame_scale if self._lod else 1))
+        center = event.xdata
+        self._set_xlim(center - (center - x0) * width / (x1 - x0),
+                       center + (x1 - center) * width / (x1 - x0))
+
+    def _on_press(self, event):
+        if self._full_xlim is None or event.inaxes is not self.axes:
+            return
+        if event.dblclick:
+            self._set_xlim(*self._full_xlim)
+        elif event.button == 1:
+            self._pan_start = (event.x, self.axes.get_xlim())
+
+    def _on_motion(self, event):
+        if self._pan_start is None:
+            return
+        x, (x0, x1) = self._pan_start
+        shift = (event.x - x) * (x1 - x0) / max(self.axes.bbox.width, 1)
+        self._set_xlim(x0 - shift, x1 - shift)
+
+    def _on_release(self, event):
+        self._pan_start = None
+
+    def _on_resize(self, event):
+        # Wider axes may need a finer level
+        if self._lod is not None:
+            self._lod.refresh()
+
+    def save_figure(self, path):
+        """Save the current figure"""
+        self.fig.savefig(path)
+        return True
+
+    def start_live(self, window_frames=2000, fps=30):
+        """Switch to a scrolling waterfall of the last window_frames frames"""
+        self.stop_live()
+        self._drop_lod()
+        self._live_window = window_frames
+        self._live_timer.start(int(1000 / fps))
+
+    def stop_live(self):
+        """Leave waterfall mode, the next plot rebuilds the axes"""
+        self._live_timer.stop()
+        self._live_buffer = None
+        self._live_display = None
+        self._live_image = None
+        self._live_background = None
+        self._live_dirty = False
+
+    def push_frames(self, csi_magnitude, mode="amplitude"):
+        """Queue a (frames, subcarriers) block for the next waterfall refresh.
+
+        mode is a key of LIVE_MODES, switching it starts a new waterfall.
+        """
+        if not self._live_timer.isActive():
+            return
+        if (self._live_buffer is None or mode != self._live_mode
+                or self._live_buffer.frame_shape != csi_magnitude.shape[1:]):
+            self._live_mode = mode
+            self._live_buffer = PooledRingBuffer(self._live_window,
+                                                 csi_magnitude.shape[1:])
+            self._live_image = None
+        self._live_buffer.extend(csi_magnitude)
+        self._live_dirty = True
+
+    def _setup_live_axes(self):
+        """Build the waterfall image once, later refreshes only swap its data"""
+        self._remove_colorbar()
+        self.axes.clear()
+        no_subcarriers = self._live_buffer.frame_shape[0]
+        mode = LIVE_MODES[self._live_mode]
+        # animated=True keeps the image out of full redraws, so the saved
+        # background is clean and each refresh blits just the image
+        self._live_image = self.axes.imshow(self._live_display,
+                                            aspect='auto',
+                                            origin='lower',
+                                            cmap=mode["cmap"],
+                                            interpolation='nearest',
+                                            # Resample values, then colormap only
+                                            # the pixels that get drawn
+                                            interpolation_stage='data',
+                                            animated=True,
+                                            extent=[-self._live_window, 0,
+                                                    0, no_subcarriers - 1])
+        self.axes.set_xlabel(mode["xlabel"])
+        self.axes.set_ylabel(mode["ylabel"])
+        self.axes.set_title(mode["title"])
+        self.colorbar = self.fig.colorbar(self._live_image, ax=self.axes,
+                                          label=mode["label"])
+        self.fig.tight_layout()
+
+    def _update_live_limits(self):
+        """Grow the color range when new data exceeds it, return True if it changed"""
+        symmetric = LIVE_MODES[self._live_mode]["symmetric"]
+        display = np.abs(self._live_display) if symmetric else self._live_display
+        latest_max = float(display.max())
+        vmin, vmax = self._live_image.get_clim()
+        if latest_max > vmax or vmax == vmin:
+            vmax = max(latest_max * 1.1, 1e-9)
+            self._live_image.set_clim(-vmax if symmetric else 0, vmax)
+            return True
+        return False
+
+    def _on_draw(self, event):
+        """Save the static background after every full redraw (resizes included)"""
+        if self._live_image is not None:
+            self._live_background = self.copy_from_bbox(self.axes.bbox)
+            self.axes.draw_artist(self._live_image)
+
+    def _redraw_live(self):
+        if not self._live_dirty or self._live_buffer is None:
+            return
+        self._live_dirty = False
+
+        # The buffer keeps the window pooled to the axes size as frames
+        # arrive, the extra detail would never be visible
+        self._live_buffer.fit(self.axes.bbox.height, self.axes.bbox.width)
+        self._live_display = self._live_buffer.display()
+        if self._live_image is None:
+            self._setup_live_axes()
+            self._update_live_limits()
+            self.draw()
+            return
+
+        self._live_image.set_data(self._live_display)
+        if self._update_live_limits() or self._live_background is None:
+            # Colorbar changed, needs a full redraw
+            self.draw()
+            return
+
+        self.restore_region(self._live_background)
+        self.axes.draw_artist(self._live_image)
+        self.blit(self.axes.bbox)
@@ -1,2 +1,3 @@
 #!/bin/bash
-array_prepare_for_picoscenes 2 "5200 160 5250"
+# Usage: prepare.sh ["<interfaces>"] ["<frequency settings>"], e.g. prepare.sh "2 3"
+array_prepare_for_picoscenes "${1:-2}" "${2:-5200 160 5250}"
@@ -1,2 +1,3 @@
 #!/bin/bash
-PicoScenes "-d debug -i 2 --mode logger --preset RX_CBW_160 --plot"
+# Usage: recv.sh [interface], run once per interface to capture on several NICs
+PicoScenes "-d debug -i ${1:-2} --mode logger --preset RX_CBW_160 --plot"
@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Synthetic PicoScenes captures from the benchmark suite
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+
+
+@pytest.fixture
+def capture(tmp_path):
+    """Path of a fresh, uncached 300-frame 20 MHz 2x2 capture"""
+    from synthetic import write_capture
+
+    path = str(tmp_path / "rx_1.csi")
+    write_capture(path, 300, 20)
+    return path
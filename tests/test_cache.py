@@ -0,0 +1,25 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from psgui.cache import cache_paths, load_csi
+
+
+def _load(path):
+    csi, timestamps = load_csi(path)
+    return csi.shape, float(np.abs(csi).sum()), len(timestamps)
+
+
+def test_concurrent_builds(capture):
+    # Every process builds the cache of the same fresh capture at once
+    # (a worker killed by a truncated mapping breaks the pool instead of hanging)
+    with ProcessPoolExecutor(4, mp_context=multiprocessing.get_context("spawn")) as pool:
+        results = list(pool.map(_load, [capture] * 8))
+    assert all(result == results[0] for result in results)
+    assert results[0][0][0] == 300
+
+    # Only the finished sidecar files are left behind
+    cache_dir = os.path.dirname(cache_paths(capture)[0])
+    assert not [name for name in os.listdir(cache_dir) if ".tmp" in name]
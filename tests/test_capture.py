@@ -0,0 +1,31 @@
+import os
+
+from psgui.capture import capture_parallel, device_dir
+from psgui.replay import ReplaySource
+
+
+def test_parallel_replay_per_interface(capture, tmp_path):
+    finished, stats = [], []
+    results = capture_parallel("-d debug", 5, ["2", "3"], str(tmp_path),
+                               replay=ReplaySource(capture, speed=0, loop=False),
+                               on_stats=stats.append,
+                               on_finished=lambda: finished.append(True), output=None)
+    assert finished == [True]
+    for interface in ("2", "3"):
+        result = results[interface]
+        assert result["error"] is None and result["stats"]["packets"] == 300
+        assert result["directory"] == device_dir(interface, str(tmp_path))
+        assert [f for f in os.listdir(result["directory"]) if f.endswith(".csi")]
+    # The last report sums both receivers
+    assert stats[-1]["packets"] == 600 and set(stats[-1]["devices"]) == {"2", "3"}
+
+
+def test_failing_receivers_report_errors(tmp_path, monkeypatch):
+    # No PicoScenes on the PATH, every receiver fails to start
+    monkeypatch.setenv("PATH", str(tmp_path))
+    errors, finished = [], []
+    results = capture_parallel("-d debug", 5, ["2", "3"], str(tmp_path),
+                               on_error=lambda interface, message: errors.append(interface),
+                               on_finished=lambda: finished.append(True), output=None)
+    assert sorted(errors) == ["2", "3"] and finished == [True]
+    assert all(result["error"] for result in results.values())
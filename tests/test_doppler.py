@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from psgui.doppler import DopplerSTFT, doppler_spectrogram
+
+
+def direct_spectra(csi, window, ends):
+    """Hann-weighted power of every window with a plain FFT"""
+    hann = 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(window) / window)
+    ratio = (csi * np.conj(csi[:, :, 0, 0])[:, :, np.newaxis, np.newaxis]).astype(
+        np.complex128)
+    spectra = []
+    for end in ends:
+        segment = ratio[end - window:end]
+        segment = (segment - segment.mean(axis=0)) * hann[:, np.newaxis, np.newaxis,
+                                                          np.newaxis]
+        power = np.abs(np.fft.fft(segment, axis=0)) ** 2
+        power = power.mean(axis=1)
+        spectra.append(np.fft.fftshift(power / power.sum(axis=0), axes=0))
+    return np.array(spectra)
+
+
+# hop 2 takes the sliding DFT, hop 16 an FFT per window
+@pytest.mark.parametrize("hop", [2, 16])
+def test_spectra_match_direct_fft(hop):
+    rng = np.random.default_rng(0)
+    csi = (rng.standard_normal((600, 30, 2, 2))
+           + 1j * rng.standard_normal((600, 30, 2, 2))).astype(np.complex64)
+    assert DopplerSTFT(64, hop).sliding == (hop == 2)
+    spectra, ends = doppler_spectrogram(csi, 64, hop, chunk_frames=97)
+    assert list(ends) == list(range(64, 601, hop))
+    np.testing.assert_allclose(spectra, direct_spectra(csi, 64, ends), atol=1e-6)
@@ -0,0 +1,42 @@
+import numpy as np
+
+from psgui.lod import FramePyramid
+
+
+def test_pyramid_matches_direct_reduction():
+    values = np.random.default_rng(0).random((20001, 3)).astype(np.float32)
+    # Few stored bins, so fine levels come from the source on demand
+    pyramid = FramePyramid(values, chunk_frames=1000, stored_bins=500)
+    assert min(pyramid.levels) > 1
+    for level in range(1, pyramid.no_levels + 1):
+        size = 2 ** level
+        for reduce, op in (("min", np.min), ("max", np.max), ("mean", np.mean)):
+            window, first, end = pyramid.window(7, 19990, 10, reduce, level)
+            expected = [op(values[i:i + size], axis=0) for i in range(first, end, size)]
+            np.testing.assert_allclose(window, expected, rtol=1e-5)
+
+
+def test_pyramid_keeps_only_requested_reductions():
+    values = np.random.default_rng(1).random((4096, 8)).astype(np.float32)
+    pyramid = FramePyramid(values, reductions=("max",))
+    assert all(set(level) == {"max"} for level in pyramid.levels.values())
+    # Everything stored is under the size of the image itself
+    stored = sum(a.nbytes for level in pyramid.levels.values() for a in level.values())
+    assert stored < values.nbytes
+
+
+def test_circular_reduction_across_the_wrap():
+    # Phases alternating just above -pi and just below pi, all close to pi
+    frames = np.arange(4096)
+    values = np.where(frames % 2, np.pi - 0.05, -np.pi + 0.05).astype(np.float32)
+    values = np.stack([values, values + 1], axis=1)
+    values = np.angle(np.exp(1j * values)).astype(np.float32)
+    pyramid = FramePyramid(values, chunk_frames=1000, reductions=("circular",),
+                           stored_bins=256)
+    for level in range(1, pyramid.no_levels + 1):
+        window, first, end = pyramid.window(0, len(values), 10, "circular", level)
+        expected = np.angle(np.exp(1j * values[first:end]).reshape(
+            len(window), -1, 2).sum(axis=1))
+        # The arithmetic mean of the first column would be about 0
+        assert np.all(np.abs(window[:, 0]) > 3.0)
+        np.testing.assert_allclose(np.exp(1j * window), np.exp(1j * expected), atol=1e-4)
@@ -0,0 +1,22 @@
+import os
+
+import numpy as np
+
+import noise
+from psgui.cache import cache_paths
+
+
+def test_write_dataset_uncached(capture, tmp_path):
+    assert not os.path.exists(cache_paths(capture)[0])
+    out_dir = str(tmp_path / "augmented")
+    paths = noise.write_dataset(capture, out_dir, 10, seed=1, batch_size=3, workers=4)
+
+    assert len(paths) == 4
+    batches = [np.load(path) for path in paths]
+    assert [len(batch) for batch in batches] == [3, 3, 3, 1]
+    assert all(batch.shape[1:] == (300, 242, 2, 2) for batch in batches)
+    # Same seed, same samples, whichever worker wrote them
+    again = noise.write_dataset(capture, str(tmp_path / "again"), 10, seed=1,
+                                batch_size=3, workers=2)
+    for first, second in zip(paths, again):
+        assert np.array_equal(np.load(first), np.load(second))
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from psgui.phase import PhaseSanitizer, estimate_calibration
+
+
+def _capture(no_frames=50, no_subcarriers=56, seed=0):
+    """Static 2x2 CSI with per-frame STO/CFO and per-antenna phase offsets.
+
+    Returns the CSI and the channel phase every chain shares, which is
+    what sanitizing should leave once its linear part is removed.
+    """
+    rng = np.random.default_rng(seed)
+    k = np.arange(no_subcarriers)
+    channel = 0.5 * np.cos(k / 9.0)
+    # STO is a slope over subcarriers that wraps many times, CFO a constant
+    sto = rng.uniform(-0.4, 0.4, no_frames)
+    cfo = rng.uniform(-np.pi, np.pi, no_frames)
+    offsets = rng.uniform(-np.pi, np.pi, (2, 2))
+    phase = (channel[np.newaxis, :, np.newaxis, np.newaxis]
+             + (sto[:, np.newaxis] * k + cfo[:, np.newaxis])[:, :, np.newaxis, np.newaxis]
+             + offsets)
+    amplitude = rng.uniform(0.5, 2.0, phase.shape)
+    csi = (amplitude * np.exp(1j * phase)).astype(np.complex64)
+    fit = np.polyval(np.polyfit(k, channel, 1), k)
+    return csi, (channel - fit).astype(np.float32)
+
+
+def test_sanitizer_removes_sto_cfo_and_antenna_offsets():
+    csi, expected = _capture()
+    expected = np.broadcast_to(expected[np.newaxis, :, np.newaxis, np.newaxis], csi.shape)
+
+    calibrated = PhaseSanitizer(estimate_calibration(csi))(csi)
+    np.testing.assert_allclose(calibrated, expected, atol=1e-4)
+    # Without calibration, a fit per chain removes the offsets as well
+    per_antenna = PhaseSanitizer(per_antenna=True)(csi)
+    np.testing.assert_allclose(per_antenna, expected, atol=1e-4)
+
+
+def test_sanitizer_apply_over_chunks_matches_one_call():
+    csi, _ = _capture(no_frames=103)
+    sanitizer = PhaseSanitizer(estimate_calibration(csi, chunk_frames=10))
+    np.testing.assert_allclose(sanitizer.apply(csi, chunk_frames=10), sanitizer(csi),
+                               atol=1e-6)
+
+
+def test_sanitizer_rejects_mismatched_calibration():
+    csi, _ = _capture()
+    with pytest.raises(ValueError, match="subcarriers"):
+        PhaseSanitizer(np.zeros((30, 2, 2)))(csi)
+    with pytest.raises(ValueError, match="antennas"):
+        PhaseSanitizer(np.zeros((56, 2, 3)))(csi)
+    # (rx, tx) offsets apply to every subcarrier
+    PhaseSanitizer(np.zeros((2, 2)))(csi)
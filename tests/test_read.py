@@ -0,0 +1,10 @@
+import numpy as np
+
+from read import iter_csi, read_csi
+
+
+def test_iter_csi_matches_cached_matrix(capture):
+    chunks = list(iter_csi(capture, chunk_frames=128))
+    assert [start for start, _ in chunks] == [0, 128, 256]
+    np.testing.assert_array_equal(np.concatenate([block for _, block in chunks]),
+                                  read_csi(capture))
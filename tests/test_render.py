@@ -0,0 +1,14 @@
+import numpy as np
+
+from psgui.render import max_pool
+
+
+def test_max_pool_keeps_partial_bins():
+    image = np.random.default_rng(0).random((11, 23)).astype(np.float32)
+    # A peak in the first frame and the last subcarrier, where bins are partial
+    image[10, 0] = 5.0
+    pooled = max_pool(image, 3, 5)
+    expected = [[image[i:i + 3, j:j + 4].max() for j in range(0, 23, 4)]
+                for i in range(0, 11, 3)]
+    np.testing.assert_array_equal(pooled, expected)
+    assert pooled[-1, 0] == 5.0
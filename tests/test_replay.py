@@ -0,0 +1,45 @@
+import struct
+import time
+
+from CSIKit.reader.readers.pico.FrameContainer import FrameContainer
+from CSIKit.reader.readers.pico.MVMExtraSegment import MVMExtraSegment
+from CSIKit.reader.readers.pico.RxSBasicSegment import RxSBasicSegment
+
+from psgui.replay import ReplaySource, run_replay
+from synthetic import FRAME_MAGIC, _segment
+
+
+def mvm_frame(timestamp_us, mu_clock):
+    """A 0x2000 (Intel MVM) frame with RxSBasic and MVMExtra segments only"""
+    rx_basic = struct.pack("<HQHBHHBBBBbbbbb", 0x2000, timestamp_us, 5250,
+                           4, 20, 800, 0, 1, 0, 1, -90, -40, -40, -41, -42)
+    mvm_extra = bytearray(96)
+    struct.pack_into("<H", mvm_extra, 0, len(mvm_extra))
+    struct.pack_into("<I", mvm_extra, 90, mu_clock)
+    segments = _segment("RxSBasic", 1, rx_basic) + _segment("MVMExtra", 1, bytes(mvm_extra))
+    body = struct.pack("<IHB", FRAME_MAGIC, 1, 2) + segments
+    return struct.pack("<I", len(body)) + body, rx_basic, bytes(mvm_extra)
+
+
+def test_replay_paces_mvm_frames_on_mu_clock(tmp_path):
+    # RxSBasic timestamps 0.5 s apart, muClock 10 ms apart
+    frames = [mvm_frame(1_000_000 + 500_000 * i, 2_000_000 + 10_000 * i) for i in range(2)]
+    capture = tmp_path / "mvm.csi"
+    capture.write_bytes(b"".join(frame for frame, _, _ in frames))
+
+    # Same clock as CSIKit and decode_frame report for these frames
+    expected = []
+    for _, rx_basic, mvm_extra in frames:
+        container = FrameContainer()
+        container.RxSBasic = RxSBasicSegment(rx_basic, 1)
+        container.MVMExtra = MVMExtraSegment(mvm_extra, 1)
+        expected.append(container.get_timestamp_seconds())
+    source = ReplaySource(str(capture), loop=False)
+    assert [ts for _, ts in source.iter_frames()] == expected == [2.0, 2.01]
+
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    started = time.monotonic()
+    stats = run_replay(source, duration=5, cwd=str(out_dir), output=None)
+    assert stats["packets"] == 2
+    assert time.monotonic() - started < 0.4
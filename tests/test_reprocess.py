@@ -0,0 +1,31 @@
+import os
+import shutil
+import time
+
+import numpy as np
+
+from psgui.manifest import Manifest
+from psgui.reprocess import feature_paths, reprocess
+
+
+def test_reprocess(capture, tmp_path):
+    data_dir = tmp_path / "data"
+    os.makedirs(data_dir / "lab")
+    shutil.move(capture, data_dir / "lab" / "rx_1.csi")
+    with Manifest(str(data_dir / "lab")) as manifest:
+        manifest.add("rx_1.csi", {"activity": "walk"})
+
+    start = time.perf_counter()
+    results = reprocess(str(data_dir), features=["amplitude", "phase"], workers=2)
+    elapsed = time.perf_counter() - start
+    assert [r["status"] for r in results] == ["processed"]
+    assert results[0]["frames"] == 300
+    # Time spent on the file, not a frame index or the process uptime
+    assert 0 < results[0]["seconds"] <= elapsed
+
+    paths, _ = feature_paths(results[0]["path"], ["amplitude"])
+    assert np.load(paths["amplitude"]).shape == (300, 242, 2, 2)
+
+    again = reprocess(str(data_dir), features=["amplitude", "phase"], workers=2)
+    assert [r["status"] for r in again] == ["skipped"]
+    assert 0 < again[0]["seconds"] <= time.perf_counter() - start
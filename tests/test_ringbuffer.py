@@ -0,0 +1,27 @@
+import numpy as np
+
+from psgui.ringbuffer import PooledRingBuffer
+
+
+def _pool(frames, pool_frames, pool_rows):
+    columns = frames.reshape(-1, pool_frames, frames.shape[1]).max(axis=1)
+    return np.stack([columns[:, i:i + pool_rows].max(axis=1)
+                     for i in range(0, columns.shape[1], pool_rows)], axis=1)
+
+
+def test_pooled_ring_matches_pooling_the_window():
+    frames = np.random.default_rng(0).random((97, 7)).astype(np.float32)
+    buffer = PooledRingBuffer(20, (7,))
+    buffer.fit(3, 5)
+    assert (buffer.pool_frames, buffer.pool_rows) == (4, 3)
+    # Odd block sizes, so columns fill across several pushes
+    for start in range(0, 97, 5):
+        buffer.extend(frames[start:start + 5])
+    # 96 whole columns' worth of frames, the ring keeps the last 5 columns
+    expected = _pool(frames[76:96], 4, 3)
+    np.testing.assert_array_equal(buffer.display(), expected.T)
+
+    # A new size re-pools the stored 20-frame window
+    buffer.fit(7, 10)
+    assert (buffer.pool_frames, buffer.pool_rows) == (2, 1)
+    np.testing.assert_array_equal(buffer.display(), _pool(frames[77:], 2, 1).T)
@@ -0,0 +1,111 @@
+import json
+import time
+
+from PyQt6.QtCore import QCoreApplication, QTimer
+
+from psgui.scheduler import CaptureSchedulerSignals
+from psgui.session import CollectionSession, RunSpec
+from psgui.tasks import ProcessingResult, ProcessingSignals
+
+
+class FakeScheduler:
+    """Capture that ends on the next event loop pass, with or without errors"""
+
+    def __init__(self, directories, errors=()):
+        self.directories = directories
+        self.errors = errors
+        self.failed = set()
+        self.signals = CaptureSchedulerSignals()
+
+    def start(self):
+        QTimer.singleShot(0, self._end)
+
+    def _end(self):
+        self.signals.stats.emit({"packets": 10})
+        for interface in self.errors:
+            self.failed.add(interface)
+            self.signals.error.emit(interface, f"{interface} exited")
+        if not self.all_failed():
+            self.signals.finished.emit()
+
+    def stop(self):
+        pass
+
+    def all_failed(self):
+        return self.failed >= set(self.directories)
+
+
+class FakeTask:
+    """Processing task that reports an error if its directory says so"""
+
+    def __init__(self, directory, labels):
+        self.directory = directory
+        self.labels = labels
+        self.signals = ProcessingSignals()
+
+    def run(self):
+        if self.directory.startswith("broken"):
+            self.signals.error.emit("decode failed")
+        else:
+            self.signals.finished.emit(ProcessingResult("target", [{"data": "rx.csi"}]))
+
+
+class FakeThreadPool:
+    def start(self, task):
+        task.run()
+
+
+def test_session_reports_runs_through_signals(tmp_path):
+    app = QCoreApplication.instance() or QCoreApplication([])
+    log_path = tmp_path / "session.jsonl"
+    runs = [RunSpec(0, {"activity": "walking"}, 1.0),
+            RunSpec(1, {"activity": "sitting"}, 1.0),
+            RunSpec(2, {"activity": "standing"}, 1.0)]
+    # Run 0: one of two interfaces fails processing, run 1: every receiver
+    # fails, run 2: captured and processed
+    schedulers = iter([
+        FakeScheduler({"wlan0": "broken0", "wlan1": "dir1"}),
+        FakeScheduler({"wlan0": "dir0", "wlan1": "dir1"}, errors=("wlan0", "wlan1")),
+        FakeScheduler({None: "dir2"}),
+    ])
+    tasks = []
+
+    def task_factory(directory, target_dir, labels, view):
+        tasks.append(FakeTask(directory, labels))
+        return tasks[-1]
+
+    session = CollectionSession(runs, "true", str(tmp_path), log_path=str(log_path),
+                                thread_pool=FakeThreadPool(),
+                                scheduler_factory=lambda *args, **kwargs: next(schedulers),
+                                task_factory=task_factory)
+    events = []
+    summaries = []
+    session.signals.run_started.connect(lambda run, _: events.append(("started", run.index)))
+    session.signals.run_captured.connect(lambda run: events.append(("captured", run.index)))
+    session.signals.run_processed.connect(lambda run: events.append(("processed", run.index)))
+    session.signals.finished.connect(summaries.append)
+
+    session.start()
+    deadline = time.time() + 5
+    while not summaries and time.time() < deadline:
+        app.processEvents()
+
+    assert [run.status for run in runs] == ["failed", "failed", "done"]
+    assert events == [("started", 0), ("captured", 0), ("processed", 0),
+                      ("started", 1), ("captured", 1),
+                      ("started", 2), ("captured", 2), ("processed", 2)]
+    # Every interface's files are labelled with it
+    assert [task.labels for task in tasks] == [
+        {"activity": "walking", "interface": "wlan0"},
+        {"activity": "walking", "interface": "wlan1"},
+        {"activity": "standing"}]
+    assert not session.is_running()
+    summary = summaries[0]
+    assert (summary["done"], summary["failed"], summary["skipped"]) == (1, 2, 0)
+
+    records = [json.loads(line) for line in log_path.read_text().splitlines()]
+    assert [record["status"] for record in records] == ["failed", "failed", "done"]
+    # The failed task's error sticks although the other interface succeeded
+    assert records[0]["error"] == "decode failed" and records[0]["files"] == 1
+    assert records[1]["error"] == "wlan1 exited"
+    assert records[2]["packets"] == 10 and records[2]["files"] == 1
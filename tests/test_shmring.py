@@ -0,0 +1,124 @@
+import json
+import os
+import subprocess
+import sys
+import uuid
+
+import numpy as np
+import pytest
+
+from psgui.shmring import SharedFrameRing, open_writer, remove_ring
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Attaches as a reader in another process, then prints what it reads
+# each time a line arrives on stdin
+READER = """
+import json
+import sys
+from psgui.shmring import SharedFrameRing
+ring = SharedFrameRing.attach(sys.argv[1])
+print("attached", flush=True)
+for _ in sys.stdin:
+    csi, _, seqs = ring.read()
+    print(json.dumps([seqs.tolist(), float(csi.real.sum())]), flush=True)
+ring.close()
+"""
+
+
+@pytest.fixture
+def name():
+    name = f"psgui-test-{uuid.uuid4().hex[:8]}"
+    yield name
+    remove_ring(name)
+
+
+def _frames(start, n):
+    """Frames whose values are their sequence numbers"""
+    values = np.arange(start, start + n, dtype=np.float32)
+    return np.repeat(values[:, None, None], 6, axis=1).reshape(n, 2, 3).astype(np.complex64)
+
+
+def test_publish_larger_than_capacity_keeps_newest(name):
+    with SharedFrameRing.create(name, (2, 3), capacity=8) as ring:
+        ring.publish(_frames(0, 20), np.arange(20.0))
+        assert ring.write_seq == 20
+        csi, timestamps, seqs = ring.read()
+        np.testing.assert_array_equal(seqs, np.arange(12, 20))
+        np.testing.assert_array_equal(timestamps, np.arange(12.0, 20.0))
+        np.testing.assert_array_equal(csi, _frames(12, 8))
+
+
+def test_read_after_wrap_around(name):
+    with SharedFrameRing.create(name, (2, 3), capacity=8) as ring:
+        ring.publish(_frames(0, 5))
+        csi, _, seqs = ring.read()
+        since = int(seqs[-1]) + 1
+        # Wraps past slot 7, and overwrites frames the reader has not read
+        ring.publish(_frames(5, 6))
+        ring.publish(_frames(11, 3))
+        csi, _, seqs = ring.read(since)
+        # Frames 5 and 6 were overwritten, the reader sees the gap in seqs
+        np.testing.assert_array_equal(seqs, np.arange(6, 14))
+        np.testing.assert_array_equal(csi, _frames(6, 8))
+        assert ring.read(14)[2].size == 0
+        _, _, seqs = ring.read(6, max_frames=3)
+        np.testing.assert_array_equal(seqs, [11, 12, 13])
+
+
+def test_read_drops_rewritten_slots(name):
+    with SharedFrameRing.create(name, (2, 3), capacity=8) as ring:
+        ring.publish(_frames(0, 8))
+        # Slot 2 is being written, slot 5 already holds frame 13 while the
+        # header still says 8 frames were published
+        ring.slot_seq[2] = 0
+        ring.slot_seq[5] = 13 + 1
+        csi, _, seqs = ring.read()
+        np.testing.assert_array_equal(seqs, [0, 1, 3, 4, 6, 7])
+        np.testing.assert_array_equal(csi, _frames(0, 8)[[0, 1, 3, 4, 6, 7]])
+
+
+def _reader(name):
+    reader = subprocess.Popen([sys.executable, "-c", READER, name], cwd=ROOT,
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                              stderr=subprocess.PIPE, text=True)
+    assert reader.stdout.readline() == "attached\n", reader.stderr.read()
+    return reader
+
+
+def _read(reader):
+    reader.stdin.write("\n")
+    reader.stdin.flush()
+    return json.loads(reader.stdout.readline())
+
+
+def test_attach_in_subprocess_and_unlink(name):
+    ring = open_writer(name, (2, 3), capacity=8)
+    try:
+        ring.publish(_frames(0, 10))
+        # The reader exiting must not unlink the block under the writer
+        reader = _reader(name)
+        assert _read(reader) == [list(range(2, 10)), 6 * sum(range(2, 10))]
+        reader.communicate()
+        assert reader.returncode == 0
+
+        # A new capture with the same layout keeps the sequence running
+        ring.close()
+        ring = open_writer(name, (2, 3), capacity=8)
+        assert ring.write_seq == 10
+        # Another layout replaces the ring
+        ring.close()
+        ring = open_writer(name, (4,), capacity=8)
+        assert ring.write_seq == 0 and ring.frame_shape == (4,)
+
+        reader = _reader(name)
+        ring.unlink()
+        # Attached readers keep their mapping, new ones can't attach
+        ring.publish(np.ones((1, 4), np.complex64))
+        assert _read(reader) == [[0], 4]
+        reader.communicate()
+        assert reader.returncode == 0
+        with pytest.raises(FileNotFoundError):
+            SharedFrameRing.attach(name)
+    finally:
+        ring.close()
@@ -0,0 +1,57 @@
+import os
+import shutil
+
+from psgui.ingest import find_csi_files, ingest_csi_files
+from psgui.manifest import Manifest
+from psgui.tasks import create_processing_task
+
+
+def test_cancel_moves_every_snapshotted_file(capture, tmp_path):
+    source = tmp_path / "capture"
+    target = tmp_path / "data" / "lab"
+    os.makedirs(source)
+    os.makedirs(target)
+    for i in range(3):
+        shutil.copy(capture, source / f"rx_{i}.csi")
+
+    task = create_processing_task(str(source), str(target), {"activity": "walk"})
+    outcome = []
+    task.signals.cancelled.connect(lambda: outcome.append("cancelled"))
+    task.signals.finished.connect(lambda result: outcome.append("finished"))
+    # Cancelled before it runs, as from a queued task
+    task.cancel()
+    task.run()
+
+    assert outcome == ["cancelled"]
+    # Nothing is left for the next capture's snapshot to mislabel
+    assert find_csi_files(str(source)) == []
+    with Manifest(str(target)) as manifest:
+        assert [e["data"] for e in manifest.query(activity="walk")] == [
+            f"rx_{i}.csi" for i in range(3)]
+
+
+def test_ingest_keeps_files_of_every_nic(tmp_path):
+    target = tmp_path / "data" / "lab"
+    os.makedirs(target)
+    # Both NICs name their capture the same, and so did an earlier run
+    (target / "rx_1.csi").write_bytes(b"earlier")
+    sources = {}
+    for interface in (None, "2", "3"):
+        source = tmp_path / f"nic{interface}"
+        os.makedirs(source)
+        (source / "rx_1.csi").write_bytes(f"nic{interface}".encode())
+        sources[interface] = source
+
+    names = []
+    for interface, source in sources.items():
+        labels = {"activity": "walk"}
+        if interface is not None:
+            labels["interface"] = interface
+        names += [e["data"] for e in ingest_csi_files(["rx_1.csi"], str(target),
+                                                       labels, str(source))]
+
+    assert names == ["rx_1_1.csi", "nic2_rx_1.csi", "nic3_rx_1.csi"]
+    assert (target / "rx_1.csi").read_bytes() == b"earlier"
+    assert (target / "nic3_rx_1.csi").read_bytes() == b"nic3"
+    with Manifest(str(target)) as manifest:
+        assert sorted(e["data"] for e in manifest.query(activity="walk")) == sorted(names)
@@ -1,53 +1,48 @@
+import os
 import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 import numpy as np
 import matplotlib.pyplot as plt
-from matplotlib.ticker import FuncFormatter
 from read import read_csi
+from psgui.lod import FramePyramid, LODImage
 
 
 def plot_amplitude(csi_matrix):
-    shape = csi_matrix.shape
-    amplitude = np.abs(csi_matrix)
+    no_frames, no_subcarriers, no_rx, no_tx = csi_matrix.shape
+    # One chunked pass keeps only the coarse max levels, finer zoom levels
+    # are read from the memmap for the visible window
+    pyramid = FramePyramid(csi_matrix, np.abs, reductions=("max",))
+    amplitude_max = float(pyramid.window(0, no_frames, 1, "max", pyramid.no_levels)[0].max())
 
-    no_frames, no_subcarriers, no_rx, no_tx = shape
-    fig, ax = plt.subplots()
+    fig, axes = plt.subplots(no_rx, no_tx, sharex=True, sharey=True, squeeze=False)
     fig.suptitle("CSI Amplitude Heatmap")
     fig.set_label("CSI Heatmap")
 
-    combined = np.full((no_rx * no_subcarriers, no_tx * no_frames), np.nan, dtype=float)
+    # One panel per RX/TX pair with linked frame axes, zooming or panning
+    # any of them redraws all at the matching pyramid level
+    lod_images = []
     for rx in range(no_rx):
         for tx in range(no_tx):
-            x0 = tx * no_frames
-            y0 = rx * no_subcarriers
-            combined[y0 : y0 + no_subcarriers, x0 : x0 + no_frames] = amplitude[
-                :, :, rx, tx
-            ].T
-            ax.text(
-                x0 + no_frames / 2,
-                y0 + no_subcarriers / 2,
-                f"RX{rx}-TX{tx}",
-                color="white",
-                ha="center",
-                va="center",
-                weight="bold",
-            )
-
-    im = ax.imshow(combined, aspect="auto")
-
-    for tx in range(1, no_tx):
-        ax.axvline(tx * no_frames, color="white", linewidth=1, linestyle="--")
-    for rx in range(1, no_rx):
-        ax.axhline(rx * no_subcarriers, color="white", linewidth=1, linestyle="--")
-
-    ax.set_xlabel("Frame Index")
-    ax.set_ylabel("Subcarrier Index")
-
-    ax.xaxis.set_major_formatter(FuncFormatter(lambda v, pos: int(v % no_frames)))
-    ax.yaxis.set_major_formatter(FuncFormatter(lambda v, pos: int(v % no_subcarriers)))
-
-    plt.colorbar(im, ax=ax, label="Amplitude")
-    plt.tight_layout()
-    plt.savefig("amplitude.pdf")
+            ax = axes[rx, tx]
+            im = ax.imshow(np.zeros((no_subcarriers, 1), dtype=np.float32),
+                           aspect="auto", origin="lower", interpolation="none",
+                           vmin=0, vmax=amplitude_max,
+                           extent=[0, no_frames - 1, 0, no_subcarriers - 1])
+            ax.set_xlim(0, no_frames - 1)
+            ax.set_title(f"RX{rx}-TX{tx}", fontsize=9)
+            lod_images.append(LODImage(ax, im, pyramid, "max",
+                                       select=lambda v, rx=rx, tx=tx: v[:, :, rx, tx]))
+            if rx == no_rx - 1:
+                ax.set_xlabel("Frame Index")
+            if tx == 0:
+                ax.set_ylabel("Subcarrier Index")
+
+    fig.colorbar(im, ax=axes, label="Amplitude")
+    fig.savefig("amplitude.pdf")
+    # Keep the LOD callbacks alive while the window is open
+    fig.lod_images = lod_images
     plt.show()
 
 
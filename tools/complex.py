@@ -1,11 +1,24 @@
+import os
 import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 import numpy as np
 import matplotlib.pyplot as plt
-from read import read_csi
+from read import iter_csi
+from psgui.phase import PhaseSanitizer
 
 
-def plot_complex(csi_matrix):
-    frames = csi_matrix[:, 0, 0, 0]
+def plot_complex(chunks):
+    """Plot RX0-TX0 of the first subcarrier from (index, block) chunks, e.g. iter_csi"""
+    # STO/CFO fitted over all subcarriers and antennas of each frame,
+    # chunk by chunk so only the plotted subcarrier is kept
+    sanitizer = PhaseSanitizer()
+    frames, clean = [], []
+    for _, block in chunks:
+        frames.append(block[:, 0, 0, 0])
+        clean.append(sanitizer(block)[:, 0, 0, 0])
+    frames, clean = np.concatenate(frames), np.concatenate(clean)
 
     fig = plt.figure(figsize=(10, 4))
     plane = fig.add_subplot(1, 2, 1, projection="polar")
@@ -20,11 +33,12 @@ def plot_complex(csi_matrix):
 
     amp_line = amp_ax.plot(np.abs(frames), label="Amplitude", color="tab:blue")
     phase_line = phase_ax.plot(np.angle(frames), label="Phase", color="tab:orange")
+    phase_line += phase_ax.plot(clean, label="Sanitized Phase", color="tab:green")
 
     amp_ax.set_xlabel("Frame Index")
     amp_ax.set_ylabel("Amplitude")
     phase_ax.set_ylabel("Phase (rad)")
-    phase_ax.set_ylim(-np.pi, np.pi)
+    phase_ax.set_ylim(min(-np.pi, clean.min()), max(np.pi, clean.max()))
 
     amp_ax.set_title("Amplitude & Phase")
     lines = amp_line + phase_line
@@ -38,4 +52,4 @@ def plot_complex(csi_matrix):
 
 
 if __name__ == "__main__":
-    plot_complex(read_csi(sys.argv[1]))
+    plot_complex(iter_csi(sys.argv[1]))
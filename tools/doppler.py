@@ -0,0 +1,42 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib.pyplot as plt
+from read import DTYPE
+from psgui.cache import load_csi
+from psgui.doppler import doppler_frequencies, doppler_spectrogram, frame_rate
+
+
+def plot_doppler(csi_matrix, timestamps=None, signal="ratio", window=128, hop=16):
+    # Streamed in chunks through DopplerSTFT, like the live view
+    spectra, ends = doppler_spectrogram(csi_matrix, window, hop, signal)
+    rate = frame_rate(timestamps)
+    frequencies = doppler_frequencies(window, rate)
+    _, _, no_rx, no_tx = spectra.shape
+
+    fig, axes = plt.subplots(no_rx, no_tx, sharex=True, sharey=True,
+                             squeeze=False, figsize=(4 * no_tx, 3 * no_rx))
+    fig.suptitle(f"Doppler Spectrogram ({signal})")
+    for rx in range(no_rx):
+        for tx in range(no_tx):
+            ax = axes[rx, tx]
+            im = ax.imshow(spectra[:, :, rx, tx].T, aspect="auto", origin="lower",
+                           cmap="magma", extent=[ends[0], ends[-1],
+                                                 frequencies[0], frequencies[-1]])
+            ax.set_title(f"RX{rx}-TX{tx}")
+            if rx == no_rx - 1:
+                ax.set_xlabel("Frame Index")
+            if tx == 0:
+                ax.set_ylabel("Doppler (Hz)" if rate else "Doppler (cycles/frame)")
+
+    fig.colorbar(im, ax=axes, label="Normalized Power")
+    plt.savefig("doppler.pdf")
+    plt.show()
+
+
+if __name__ == "__main__":
+    # Optional second argument: ratio (default) or amplitude
+    csi_matrix, timestamps = load_csi(sys.argv[1], dtype=DTYPE)
+    plot_doppler(csi_matrix, timestamps, sys.argv[2] if len(sys.argv) > 2 else "ratio")
@@ -1,95 +1,285 @@
+import os
 import sys
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 import numpy as np
 from read import read_csi
-from amplitude import plot_amplitude
+from psgui.chunks import CHUNK_FRAMES
+
+# Every transform takes a single (frames, subcarriers, rx, tx) matrix or a
+# (batch, frames, subcarriers, rx, tx) batch, and rng as one Generator or a
+# sequence of Generators, one per sample. Random parameters are drawn per
+# sample from its own generator, so sample i of a seeded run is the same
+# whatever batch or worker it ends up in.
+
+
+def sample_rngs(seed, count, start=0):
+    """Generators for samples start .. start + count - 1 of a run seeded with seed"""
+    return [np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(i,)))
+            for i in range(start, start + count)]
+
+
+def _as_batch(csi, rng):
+    """Return (batch, rngs, batched) for either input layout"""
+    batched = csi.ndim == 5
+    batch = csi if batched else csi[np.newaxis]
+    if rng is None:
+        rng = np.random.default_rng()
+    rngs = list(rng) if isinstance(rng, (list, tuple)) else [rng] * len(batch)
+    if len(rngs) != len(batch):
+        raise ValueError(f"Got {len(rngs)} generators for {len(batch)} samples")
+    return batch, rngs, batched
+
+
+def _unbatch(out, batched):
+    return out if batched else out[0]
+
+
+def _per_sample(values):
+    """(batch,) parameters -> broadcastable against (batch, frames, subc, rx, tx)"""
+    return np.asarray(values).reshape(-1, 1, 1, 1, 1)
 
 
-def time_offset(csi, max_shift=20, pad_mode="zero"):
+def time_offset(csi, max_shift=20, pad_mode="zero", rng=None):
     """Shift frames along time axis with padding; positive = delay (shift right)."""
-    frames, subc, rx, tx = csi.shape
-    shift = np.random.randint(-max_shift, max_shift + 1)
-    if shift == 0:
-        return csi
-
-    out = np.zeros_like(csi)
-    if pad_mode == "edge":
-        out[:] = csi[0]
-    # copy overlapping region
-    if shift > 0:
-        out[shift:] = csi[: frames - shift]
-    else:
-        out[: frames + shift] = csi[-shift:]
-    return out
+    batch, rngs, batched = _as_batch(csi, rng)
+    frames = batch.shape[1]
+    shifts = np.array([r.integers(-max_shift, max_shift + 1) for r in rngs])
+
+    # source frame for every output frame, edge padding repeats frame 0
+    src = np.arange(frames) - shifts[:, np.newaxis]
+    valid = (src >= 0) & (src < frames)
+    src[~valid] = 0
+    out = np.take_along_axis(batch, src.reshape(src.shape + (1, 1, 1)), axis=1)
+    if pad_mode != "edge":
+        out[~valid] = 0
+    return _unbatch(out, batched)
 
 
-def time_stretch(csi, stretch_min=0.9, stretch_max=1.1):
+def time_stretch(csi, stretch_min=0.9, stretch_max=1.1, rng=None):
     """Resample along time axis with a random stretch; keeps frame length constant."""
-    frames, subc, rx, tx = csi.shape
-    factor = np.random.uniform(stretch_min, stretch_max)
+    batch, rngs, batched = _as_batch(csi, rng)
+    frames = batch.shape[1]
+    factors = np.array([r.uniform(stretch_min, stretch_max) for r in rngs])
     # new timeline maps current frame index -> source index
-    src_idx = np.arange(frames) / factor
-    src_idx = np.clip(src_idx, 0, frames - 1)
-
-    real_part = np.empty_like(csi.real)
-    imag_part = np.empty_like(csi.imag)
-    flat_real = csi.real.reshape(frames, -1)
-    flat_imag = csi.imag.reshape(frames, -1)
+    src_idx = np.clip(np.arange(frames) / factors[:, np.newaxis], 0, frames - 1)
 
-    for col in range(flat_real.shape[1]):
-        real_part.reshape(frames, -1)[:, col] = np.interp(
-            src_idx, np.arange(frames), flat_real[:, col]
-        )
-        imag_part.reshape(frames, -1)[:, col] = np.interp(
-            src_idx, np.arange(frames), flat_imag[:, col]
-        )
+    # Linear interpolation of all columns at once, complex values interpolate
+    # their real and imaginary parts independently like two np.interp calls
+    lower = np.floor(src_idx).astype(np.intp)
+    upper = np.minimum(lower + 1, frames - 1)
+    shape = src_idx.shape + (1, 1, 1)
+    weight = (src_idx - lower).reshape(shape)
+    before = np.take_along_axis(batch, lower.reshape(shape), axis=1)
+    after = np.take_along_axis(batch, upper.reshape(shape), axis=1)
+    out = before + (after - before) * weight
+    return _unbatch(out.astype(batch.dtype, copy=False), batched)
 
-    return real_part + 1j * imag_part
 
-
-def random_mask(csi, mask_ratio=0.15, contiguous=False):
+def random_mask(csi, mask_ratio=0.15, contiguous=False, rng=None):
     """Zero out random elements (or contiguous stripes if desired)."""
-    frames, subc, rx, tx = csi.shape
-    mask = np.zeros((frames, subc), dtype=bool)
+    batch, rngs, batched = _as_batch(csi, rng)
+    frames, subc = batch.shape[1:3]
     total = frames * subc
     k = int(total * mask_ratio)
+    mask = np.zeros((len(batch), frames, subc), dtype=bool)
 
     if contiguous and k > 0:
         span = max(1, int(mask_ratio * frames))
-        start = np.random.randint(0, max(1, frames - span + 1))
-        mask[start : start + span, :] = True
-    else:
-        idx = np.random.choice(total, size=k, replace=False)
-        mask.flat[idx] = True
+        starts = np.array([r.integers(0, max(1, frames - span + 1)) for r in rngs])
+        t = np.arange(frames)
+        mask[:] = ((t >= starts[:, np.newaxis])
+                   & (t < starts[:, np.newaxis] + span))[:, :, np.newaxis]
+    elif k > 0:
+        # k smallest of uniform keys = k indices without replacement
+        keys = np.stack([r.random(total) for r in rngs])
+        idx = np.argpartition(keys, k - 1, axis=1)[:, :k]
+        np.put_along_axis(mask.reshape(len(batch), total), idx, True, axis=1)
 
-    masked = csi.copy()
+    masked = batch.copy()
     masked[mask, ...] = 0
-    return masked
+    return _unbatch(masked, batched)
 
 
-def amplitude_scale(csi, alpha_min=0.8, alpha_max=1.2):
+def amplitude_scale(csi, alpha_min=0.8, alpha_max=1.2, rng=None):
     """Scale amplitudes by random factor; phase unchanged."""
-    alpha = np.random.uniform(alpha_min, alpha_max)
-    return csi * alpha
+    batch, rngs, batched = _as_batch(csi, rng)
+    alphas = np.array([r.uniform(alpha_min, alpha_max) for r in rngs])
+    out = batch * _per_sample(alphas)
+    return _unbatch(out.astype(batch.dtype, copy=False), batched)
 
 
-def freq_noise(csi, noise_scale=0.05):
+def freq_noise(csi, noise_scale=0.05, rng=None):
     """Add complex Gaussian noise per subcarrier (frequency axis)."""
-    amp = np.abs(csi)
-    valid = amp[np.isfinite(amp)]
-    amp_std = valid.std()
-    sigma = noise_scale * amp_std
-    noise = np.random.normal(0, sigma, size=csi.shape) + 1j * np.random.normal(
-        0, sigma, size=csi.shape
-    )
-    return csi + noise
+    batch, rngs, batched = _as_batch(csi, rng)
+    amp = np.abs(batch)
+    amp[~np.isfinite(amp)] = np.nan
+    sigmas = noise_scale * np.nanstd(amp.reshape(len(batch), -1), axis=1)
+
+    sample_shape = batch.shape[1:]
+    noise = np.empty(batch.shape, dtype=np.result_type(batch.dtype, np.complex64))
+    for i, r in enumerate(rngs):
+        noise[i].real = r.normal(0, sigmas[i], size=sample_shape)
+        noise[i].imag = r.normal(0, sigmas[i], size=sample_shape)
+    return _unbatch(batch + noise, batched)
+
+
+# The default augmentation chain, as (transform, keyword arguments) steps
+DEFAULT_PIPELINE = [
+    (time_offset, {}),
+    (time_stretch, {}),
+    (random_mask, {}),
+    (amplitude_scale, {}),
+    (freq_noise, {}),
+]
+
+
+def augment(csi, count, seed=None, start=0, pipeline=None):
+    """Return count augmented variants of one matrix as a (count, ...) batch.
+
+    Sample i uses the generator for index start + i of seed, so a dataset
+    can be produced in any number of chunks with identical results.
+    """
+    rngs = sample_rngs(seed, count, start)
+    batch = np.broadcast_to(csi, (count, *csi.shape))
+    for transform, kwargs in pipeline or DEFAULT_PIPELINE:
+        batch = transform(batch, rng=rngs, **kwargs)
+    return batch
+
+
+def _gather(csi, window, lo, src):
+    """Frames src of csi from the window read at lo, zero outside the capture"""
+    valid = (src >= 0) & (src < len(csi))
+    if not len(window):
+        return np.zeros((len(src), *csi.shape[1:]), dtype=csi.dtype)
+    frames = window[np.clip(src - lo, 0, len(window) - 1)]
+    frames[~valid] = 0
+    return frames
+
+
+def augment_stream(csi, out_path, seed=None, index=0, chunk_frames=CHUNK_FRAMES,
+                   max_shift=20, stretch_min=0.9, stretch_max=1.1, mask_ratio=0.15,
+                   contiguous=False, alpha_min=0.8, alpha_max=1.2, noise_scale=0.05):
+    """Write one augmented variant of a capture of any length to an .npy file.
+
+    The DEFAULT_PIPELINE steps run chunk by chunk over a memmap: offset and
+    stretch become one source index per output frame, so each chunk only
+    reads the input frames it maps to. Shift, stretch, scale and the
+    contiguous stripe are drawn once for the whole capture, scattered masks
+    per chunk with the same ratio. The noise sigma needs the std of the whole
+    augmented amplitude, so noise is added in a second pass over the output.
+    Memory use is bounded by chunk_frames, not by the capture.
+    """
+    # Fix the entropy so every chunk generator derives from the same seed
+    seed = np.random.SeedSequence(seed).entropy
+    rng = sample_rngs(seed, 1, index)[0]
+    no_frames, no_subcarriers = csi.shape[:2]
+    shift = rng.integers(-max_shift, max_shift + 1)
+    factor = rng.uniform(stretch_min, stretch_max)
+    alpha = rng.uniform(alpha_min, alpha_max)
+    span = max(1, int(mask_ratio * no_frames))
+    stripe = rng.integers(0, max(1, no_frames - span + 1))
+
+    starts = range(0, no_frames, chunk_frames)
+    chunk_rngs = [np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(index, c)))
+                  for c in range(len(starts))]
+    out = np.lib.format.open_memmap(out_path, mode="w+", dtype=csi.dtype, shape=csi.shape)
+    total = total_sq = count = 0.0
+
+    for start, chunk_rng in zip(starts, chunk_rngs):
+        t = np.arange(start, min(start + chunk_frames, no_frames))
+        # Stretch position in the shifted capture, then back to source frames
+        position = np.clip(t / factor, 0, no_frames - 1)
+        lower = np.floor(position).astype(np.intp)
+        upper = np.minimum(lower + 1, no_frames - 1)
+        lo = max(lower[0] - shift, 0)
+        hi = min(upper[-1] - shift, no_frames - 1)
+        window = np.asarray(csi[lo:hi + 1]) if hi >= lo else csi[:0]
+        before = _gather(csi, window, lo, lower - shift)
+        after = _gather(csi, window, lo, upper - shift)
+        block = before + (after - before) * (position - lower).reshape(-1, 1, 1, 1)
+        block = block.astype(csi.dtype, copy=False)
+
+        cells = len(t) * no_subcarriers
+        k = int(cells * mask_ratio)
+        if contiguous and k > 0:
+            block[(t >= stripe) & (t < stripe + span)] = 0
+        elif k > 0:
+            idx = np.argpartition(chunk_rng.random(cells), k - 1)[:k]
+            block.reshape(cells, *block.shape[2:])[idx] = 0
+        block *= alpha
+
+        amp = np.abs(block)
+        amp = amp[np.isfinite(amp)]
+        total += amp.sum()
+        total_sq += (amp.astype(np.float64) ** 2).sum()
+        count += amp.size
+        out[start:start + len(t)] = block
+
+    mean = total / count if count else 0.0
+    sigma = noise_scale * np.sqrt(max(total_sq / count - mean ** 2, 0.0)) if count else 0.0
+    for start, chunk_rng in zip(starts, chunk_rngs):
+        block = out[start:start + chunk_frames]
+        noise = np.empty(block.shape, dtype=block.dtype)
+        noise.real = chunk_rng.normal(0, sigma, size=block.shape)
+        noise.imag = chunk_rng.normal(0, sigma, size=block.shape)
+        block += noise
+    out.flush()
+    return out_path
+
+
+def _write_chunk(source, out_path, count, seed, start):
+    if isinstance(source, tuple):
+        # (finished sidecar cache, frames), only ever mapped read-only here
+        matrix_path, frames = source
+        csi = np.load(matrix_path, mmap_mode="r")[:frames]
+    else:
+        csi = source
+    np.save(out_path, augment(csi, count, seed, start))
+    return out_path
+
+
+def write_dataset(csi_path, out_dir, count, seed=None, batch_size=32, workers=None):
+    """Write count augmented variants of a capture to out_dir in parallel.
+
+    Each batch of batch_size samples is augmented and saved as one .npy file
+    by a worker process. Returns the list of written files.
+    """
+    # Fix the entropy up front so every worker derives from the same seed
+    seed = np.random.SeedSequence(seed).entropy
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, "augment.json"), "w") as f:
+        json.dump({"source": os.path.abspath(csi_path), "count": count,
+                   "seed": seed, "batch_size": batch_size}, f, indent=2)
+
+    # Build or open the cache once here, workers only map the finished file
+    csi = read_csi(csi_path)
+    source = (csi.filename, len(csi)) if isinstance(csi, np.memmap) else csi
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_write_chunk, source,
+                        os.path.join(out_dir, f"aug_{start:06d}.npy"),
+                        min(batch_size, count - start), seed, start)
+            for start in range(0, count, batch_size)
+        ]
+        return [future.result() for future in futures]
 
 
 if __name__ == "__main__":
-    csi = read_csi(sys.argv[1])
-    csi = time_offset(csi)
-    csi = time_stretch(csi)
-    csi = random_mask(csi)
-    csi = amplitude_scale(csi)
-    csi = freq_noise(csi)
-
-    plot_amplitude(csi)
+    if len(sys.argv) == 3 and sys.argv[2].endswith(".npy"):
+        # noise.py <file.csi> <out.npy>: one variant, streamed from the cache
+        augment_stream(read_csi(sys.argv[1]), sys.argv[2])
+        print(f"Wrote {sys.argv[2]}")
+    elif len(sys.argv) > 3:
+        # noise.py <file.csi> <out_dir> <count> [seed]
+        seed = int(sys.argv[4]) if len(sys.argv) > 4 else None
+        paths = write_dataset(sys.argv[1], sys.argv[2], int(sys.argv[3]), seed)
+        print(f"Wrote {len(paths)} batches to {sys.argv[2]}")
+    else:
+        from amplitude import plot_amplitude
+
+        csi = read_csi(sys.argv[1])
+        plot_amplitude(augment(csi, 1)[0])
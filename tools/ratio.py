@@ -1,34 +1,36 @@
+import os
 import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.ticker import FuncFormatter
 from read import read_csi
+from psgui.ratio import antenna_pairs, frame_step, ratio_phase_grid
 
+# Frames per ratio block drawn, the grid holds pairs^2 blocks
+MAX_PLOT_FRAMES = 1000
 
-def plot_ratio(csi_matrix):
+
+def plot_ratio(csi_matrix, max_frames=MAX_PLOT_FRAMES):
     shape = csi_matrix.shape
 
-    no_frames, no_subcarriers, no_rx, no_tx = shape
-    pairs = [(rx, tx) for rx in range(no_rx) for tx in range(no_tx)]
+    _, no_subcarriers, no_rx, no_tx = shape
+    pairs = antenna_pairs(no_rx, no_tx)
     no_pairs = len(pairs)
 
     fig, ax = plt.subplots()
     fig.suptitle("CSI Ratio Phase Grid")
 
-    # Grid of ratio blocks: row pair / column pair.
-    combined = np.full(
-        (no_pairs * no_subcarriers, no_pairs * no_frames), np.nan, dtype=float
-    )
+    # Grid of ratio blocks: row pair / column pair, all pairs in one broadcast
+    # per chunk of frames.
+    combined, no_frames = ratio_phase_grid(csi_matrix, max_frames)
 
     for r_idx, (rx_r, tx_r) in enumerate(pairs):
-        first = csi_matrix[:, :, rx_r, tx_r].T  # shape: subcarriers x frames
         y0 = r_idx * no_subcarriers
         for c_idx, (rx_c, tx_c) in enumerate(pairs):
-            second = csi_matrix[:, :, rx_c, tx_c].T
             x0 = c_idx * no_frames
-            combined[y0 : y0 + no_subcarriers, x0 : x0 + no_frames] = np.angle(
-                first / second
-            )
 
             # Label center of the block with row/col pair names.
             ax.text(
@@ -52,7 +54,8 @@ def plot_ratio(csi_matrix):
     ax.set_xlabel("Frame Index")
     ax.set_ylabel("Subcarrier Index")
 
-    ax.xaxis.set_major_formatter(FuncFormatter(lambda v, pos: int(v % no_frames)))
+    step = frame_step(len(csi_matrix), max_frames)
+    ax.xaxis.set_major_formatter(FuncFormatter(lambda v, pos: int(v % no_frames * step)))
     ax.yaxis.set_major_formatter(FuncFormatter(lambda v, pos: int(v % no_subcarriers)))
 
     plt.colorbar(im, ax=ax, label="Phase")
@@ -62,4 +65,6 @@ def plot_ratio(csi_matrix):
 
 
 if __name__ == "__main__":
-    plot_ratio(read_csi(sys.argv[1]))
+    # Optional second argument caps the frames drawn per block
+    max_frames = int(sys.argv[2]) if len(sys.argv) > 2 else MAX_PLOT_FRAMES
+    plot_ratio(read_csi(sys.argv[1]), max_frames)
@@ -1,17 +1,58 @@
+import os
 import sys
-from CSIKit.reader import get_reader
-from CSIKit.util import csitools
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-def read_csi(path):
-    reader = get_reader(path)
-    csidata = reader.read_file(path, scaled=True)
-    csi_matrix = csitools.get_CSI(csidata, metric="complex")[0]
+from psgui.cache import load_csi
+from psgui.chunks import CHUNK_FRAMES
+from psgui.decoder import PicoScenesDecoder, decode_file
+
+# CSI_DTYPE=complex64 halves memory and cache size for every tool
+DTYPE = os.environ.get("CSI_DTYPE", "complex128")
+
+
+def read_csi(path, offset=0, cache=True, dtype=DTYPE):
+    if cache and offset == 0:
+        # Memory-mapped from data/<subfolder>/.cache, decoded only once.
+        # Tools read it in chunks, so captures larger than RAM work too
+        try:
+            csi_matrix, _ = load_csi(path, dtype=dtype)
+        except OSError as e:
+            print(f"CSI cache unavailable ({e}), decoding {path}")
+            csi_matrix, _, _ = decode_file(path)
+    else:
+        csi_matrix, _, _ = decode_file(path, offset)
+    if csi_matrix is not None and csi_matrix.dtype != dtype:
+        csi_matrix = csi_matrix.astype(dtype)
     shape = csi_matrix.shape
     print(f"CSI with (frames, subcarriers, rx, tx): {shape}")
 
     return csi_matrix
 
 
+def iter_csi(path, chunk_frames=CHUNK_FRAMES, dtype=DTYPE):
+    """Decode a capture block by block without building a cache.
+
+    Yields (first frame index, block) like psgui.chunks.iter_chunks, so
+    tools that make one pass take either.
+    """
+    decoder = PicoScenesDecoder(path)
+    start = 0
+    for csi_matrix, _ in decoder.iter_chunks(chunk_frames, dtype):
+        yield start, csi_matrix
+        start += len(csi_matrix)
+
+
+def read_new_csi(path, state_path):
+    """Read only the frames appended since the offset saved in state_path."""
+    decoder = PicoScenesDecoder.load_state(path, state_path)
+    csi_matrix, _, decoder = decode_file(path, decoder.offset)
+    decoder.save_state(state_path)
+    if csi_matrix is not None:
+        print(f"New CSI with (frames, subcarriers, rx, tx): {csi_matrix.shape}")
+
+    return csi_matrix
+
+
 if __name__ == "__main__":
     print(read_csi(sys.argv[1]))
@@ -0,0 +1,44 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from psgui.shmring import SharedFrameRing
+
+
+def follow(name, interval=1.0, poll_interval=0.01):
+    """Read a live ring as it fills, print frames/s, dropped frames and mean amplitude"""
+    ring = SharedFrameRing.attach(name)
+    print(f"Attached to {name}: {ring.capacity} frames of {ring.frame_shape} {ring.dtype}")
+    since = ring.write_seq
+    received = dropped = 0
+    amplitude = 0.0
+    next_report = time.monotonic() + interval
+    try:
+        while True:
+            csi, _, seqs = ring.read(since)
+            if len(seqs):
+                # Frames overwritten before we got to them
+                dropped += int(seqs[0]) - since
+                since = int(seqs[-1]) + 1
+                received += len(seqs)
+                amplitude = float(np.abs(csi).mean())
+            else:
+                since = max(since, ring.write_seq - ring.capacity)
+                time.sleep(poll_interval)
+            now = time.monotonic()
+            if now >= next_report:
+                print(f"{received / interval:8.0f} frames/s  {dropped} dropped  "
+                      f"mean amplitude {amplitude:.3f}")
+                received = 0
+                next_report = now + interval
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ring.close()
+
+
+if __name__ == "__main__":
+    follow(sys.argv[1] if len(sys.argv) > 1 else "psgui")
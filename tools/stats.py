@@ -0,0 +1,27 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from read import iter_csi
+from psgui.chunks import amplitude_stats
+
+
+def print_amplitude_stats(chunks):
+    """Amplitude stats of (index, block) chunks, e.g. iter_csi or iter_chunks of a memmap"""
+    # One pass, a block at a time, the capture may exceed RAM
+    stats = amplitude_stats(chunks)
+    _, no_rx, no_tx = stats.mean.shape
+    print(f"Amplitude over {stats.count} frames")
+    print("pair       mean       std       min       max")
+    for rx in range(no_rx):
+        for tx in range(no_tx):
+            print(f"RX{rx}-TX{tx} {stats.mean[:, rx, tx].mean():9.3f} "
+                  f"{stats.std[:, rx, tx].mean():9.3f} "
+                  f"{stats.min[:, rx, tx].min():9.3f} {stats.max[:, rx, tx].max():9.3f}")
+    return stats
+
+
+if __name__ == "__main__":
+    # Decoded as it is read, a single pass needs no cache
+    print_amplitude_stats(iter_csi(sys.argv[1]))